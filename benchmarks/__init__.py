@@ -0,0 +1,12 @@
+"""
+Benchmarks of RRSS backend subsystems.
+
+Run all suites and save results to `bench_results/latest.json`:
+
+```
+python -m benchmarks run
+```
+
+Or use the `bench.*` commands in `scripts.py`. Each module could also be run alone,
+e.g.: `python -m benchmarks.event_emit`.
+"""
@@ -0,0 +1,102 @@
+"""
+Command line entry of the benchmark suites.
+
+```
+# run some suites, compare with a baseline report
+python -m benchmarks run event translation --baseline bench_results/baseline.json
+
+# compare two saved reports
+python -m benchmarks compare bench_results/baseline.json bench_results/latest.json
+```
+
+Commands exit with code 1 if any regression is found.
+"""
+
+from types import ModuleType
+
+import anyio
+import fire
+from loguru import logger
+
+from . import (
+    entity_dict,
+    event_alloc,
+    event_emit,
+    event_outbox,
+    event_validation,
+    translation,
+)
+from .suite import (
+    BenchmarkReport,
+    BenchmarkResult,
+    compare as compare_reports,
+    format_diffs,
+    format_results,
+    new_report,
+)
+
+SUITES: dict[str, list[ModuleType]] = {
+    "event": [event_emit, event_validation, event_alloc, event_outbox],
+    "utils": [entity_dict],
+    "translation": [translation],
+}
+
+DEFAULT_OUTPUT = "bench_results/latest.json"
+
+
+def _check_diffs(old: BenchmarkReport, new: BenchmarkReport, threshold: float) -> None:
+    diffs = compare_reports(old, new, threshold=threshold)
+    print(format_diffs(diffs))
+
+    regressions = [d.name for d in diffs if d.status == "regression"]
+    if regressions:
+        print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+        exit(1)
+
+
+def run(
+    *suites: str,
+    output: str = DEFAULT_OUTPUT,
+    baseline: str | None = None,
+    threshold: float = 0.1,
+) -> None:
+    """
+    Run benchmark suites and save the report as JSON.
+
+    Args:
+        suites: Names of suites to run, run all suites if not provided.
+        output: Path of the JSON report.
+        baseline: Path of a previous report to compare with.
+        threshold: Relative slowdown of the median flagged as a regression.
+    """
+    logger.remove()
+
+    names = list(suites) or list(SUITES)
+    unknown = [name for name in names if name not in SUITES]
+    if unknown:
+        print(f"Unknown suite(s): {', '.join(unknown)}, available: {', '.join(SUITES)}")
+        exit(2)
+
+    results: list[BenchmarkResult] = []
+    for name in names:
+        for module in SUITES[name]:
+            module_results = anyio.run(module.run)
+            print(format_results(module_results))
+            results += module_results
+
+    report = new_report(results)
+    report.save(output)
+    print(f"\nReport saved to {output}")
+
+    if baseline is not None:
+        print(f"Compare with {baseline}:\n")
+        _check_diffs(BenchmarkReport.load(baseline), report, threshold)
+
+
+def compare(old: str, new: str, threshold: float = 0.1) -> None:
+    """Compare two saved reports, flag cases slower than `threshold` as regressions"""
+    _check_diffs(BenchmarkReport.load(old), BenchmarkReport.load(new), threshold)
+
+
+if __name__ == "__main__":
+    fire.Fire({"run": run, "compare": compare})
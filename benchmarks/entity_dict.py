@@ -0,0 +1,43 @@
+"""
+Insert cost of `RRSSEntityIdKeyDict`, which validates every key, compared with a
+plain `dict`.
+
+Run with:
+
+```
+python -m benchmarks.entity_dict
+```
+"""
+
+from utils.types import RRSSEntityIdKeyDict
+
+from .suite import BenchmarkResult, measure, run_standalone
+
+KEY_COUNT = 1000
+KEYS = [f"rrss.bench.entity_{i}" for i in range(KEY_COUNT)]
+
+
+def _insert_entity_dict() -> None:
+    d: RRSSEntityIdKeyDict[int] = RRSSEntityIdKeyDict()
+    for i, key in enumerate(KEYS):
+        d[key] = i
+
+
+def _insert_plain_dict() -> None:
+    d: dict[str, int] = dict()
+    for i, key in enumerate(KEYS):
+        d[key] = i
+
+
+async def run() -> list[BenchmarkResult]:
+    """Results are seconds per inserted key"""
+    return [
+        await measure("utils.entity_dict.insert", _insert_entity_dict, ops=KEY_COUNT),
+        await measure(
+            "utils.entity_dict.insert_plain", _insert_plain_dict, ops=KEY_COUNT
+        ),
+    ]
+
+
+if __name__ == "__main__":
+    run_standalone(run)
@@ -0,0 +1,107 @@
+"""
+Memory allocated for each emitted event, `Event` models compared with `LightEvent`.
+
+- `retained_bytes`: Size of the event object itself, measured by keeping many events.
+- `in_flight_bytes`: Peak memory of an emit while its handlers are running, divided
+  by the number of concurrent emits.
+
+Run with:
+
+```
+python -m benchmarks.event_alloc
+```
+"""
+
+import gc
+import tracemalloc
+from typing import Any, Callable
+
+import anyio
+
+from extensions.event.types import Event, EventHandler, LightEvent
+from extensions.event.manager import EventManager
+
+from .suite import BenchmarkResult, measure, run_standalone
+
+EVENT_NAME = "rrss.bench.alloc"
+SENDER = "rrss.bench.alloc_sender"
+EVENT_COUNT = 2000
+
+
+class _LightHandler(EventHandler[int]):
+    accept_light_event: bool = True
+
+    async def handler(self, event: Any) -> None:
+        await anyio.sleep(0)
+
+
+def _retained(factory: Callable[[int], Any]) -> tuple[float, float]:
+    """Return bytes and memory blocks of each object built by `factory`"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    objects = [factory(i) for i in range(EVENT_COUNT)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    stats = after.compare_to(before, "filename")
+    size = sum(s.size_diff for s in stats) / len(objects)
+    blocks = sum(s.count_diff for s in stats) / len(objects)
+    return size, blocks
+
+
+async def _in_flight(emit: Callable[[int], Any]) -> float:
+    """Return peak bytes of each emit, with `EVENT_COUNT` emits running concurrently"""
+    gc.collect()
+    tracemalloc.start()
+    base, _ = tracemalloc.get_traced_memory()
+    async with anyio.create_task_group() as tg:
+        for i in range(EVENT_COUNT):
+            tg.start_soon(emit, i)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return (peak - base) / EVENT_COUNT
+
+
+async def run() -> list[BenchmarkResult]:
+    mgr = EventManager(enable_stats=False)
+    mgr.add_event(EVENT_NAME)
+    mgr.add_handler(
+        _LightHandler(event_name=EVENT_NAME, registrant="rrss.bench", identifier="h")
+    )
+
+    def model_event(i: int) -> Event[int]:
+        return Event.trusted(event_name=EVENT_NAME, data=i, sender=SENDER)
+
+    def light_event(i: int) -> LightEvent[int]:
+        return LightEvent(event_name=EVENT_NAME, data=i, sender=SENDER)
+
+    async def emit_model(i: int) -> None:
+        await mgr.emit_trusted(model_event(i))
+
+    async def emit_light(i: int) -> None:
+        await mgr.emit_light(EVENT_NAME, data=i, sender=SENDER)
+
+    results: list[BenchmarkResult] = []
+    for kind, factory, emit in [
+        ("model", model_event, emit_model),
+        ("light", light_event, emit_light),
+    ]:
+        retained_bytes, retained_blocks = _retained(factory)
+        in_flight_bytes = await _in_flight(emit)
+        results.append(
+            await measure(
+                f"event.emit_alloc.{kind}",
+                lambda: emit(0),
+                extra={
+                    "retained_bytes": retained_bytes,
+                    "retained_blocks": retained_blocks,
+                    "in_flight_bytes": in_flight_bytes,
+                },
+            )
+        )
+    return results
+
+
+if __name__ == "__main__":
+    run_standalone(run)
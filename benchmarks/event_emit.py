@@ -0,0 +1,113 @@
+"""
+Per-emit cost of `EventManager.emit` by handler count, with sync (worker thread),
+inline and async handlers, and of `EventManager.emit_sync` with inline handlers.
+
+`event.emit.sender_check` and `event.emit.sender_filter` compare handlers each waiting
+for a different sender, returning early in `handler()` versus declaring `filters`.
+
+Run with:
+
+```
+python -m benchmarks.event_emit
+```
+"""
+
+from extensions.event.types import Event, EventFilter, EventHandler, ExecutionPolicy
+from extensions.event.manager import EventManager
+
+from .suite import BenchmarkResult, measure, run_standalone
+
+EVENT_NAME = "rrss.bench.emit"
+HANDLER_COUNTS = (1, 10, 100, 1000)
+
+
+class _SyncHandler(EventHandler[int]):
+    def handler(self, event: Event[int]) -> None:
+        pass
+
+
+class _SenderCheckHandler(EventHandler[int]):
+    def handler(self, event: Event[int]) -> None:
+        if event.sender != f"rrss.bench.{self.identifier}":
+            return
+
+
+class _AsyncHandler(EventHandler[int]):
+    async def handler(self, event: Event[int]) -> None:
+        pass
+
+
+def _make_mgr(handler_count: int, kind: str) -> EventManager:
+    mgr = EventManager()
+    mgr.add_event(EVENT_NAME)
+    handler_cls = _AsyncHandler if kind == "async" else _SyncHandler
+    execution = ExecutionPolicy.INLINE if kind == "inline" else ExecutionPolicy.THREAD
+    mgr.add_handlers(
+        [
+            handler_cls(
+                event_name=EVENT_NAME,
+                registrant="rrss.bench",
+                identifier=f"handler_{i}",
+                execution=execution,
+            )
+            for i in range(handler_count)
+        ]
+    )
+    return mgr
+
+
+def _make_sender_mgr(handler_count: int, use_filters: bool) -> EventManager:
+    mgr = EventManager()
+    mgr.add_event(EVENT_NAME)
+    mgr.add_handlers(
+        [
+            _SenderCheckHandler(
+                event_name=EVENT_NAME,
+                registrant="rrss.bench",
+                identifier=f"handler_{i}",
+                filters=(
+                    EventFilter(sender=f"rrss.bench.handler_{i}")
+                    if use_filters
+                    else None
+                ),
+            )
+            for i in range(handler_count)
+        ]
+    )
+    return mgr
+
+
+async def run() -> list[BenchmarkResult]:
+    results: list[BenchmarkResult] = []
+    event = Event[int](event_name=EVENT_NAME, data=0)
+    for kind in ("sync", "inline", "async"):
+        for handler_count in HANDLER_COUNTS:
+            mgr = _make_mgr(handler_count, kind)
+            results.append(
+                await measure(
+                    f"event.emit.{kind}.h{handler_count}",
+                    lambda: mgr.emit(event),
+                )
+            )
+            if kind == "inline":
+                results.append(
+                    await measure(
+                        f"event.emit_sync.inline.h{handler_count}",
+                        lambda: mgr.emit_sync(event),
+                    )
+                )
+
+    sender_event = Event[int](
+        event_name=EVENT_NAME, data=0, sender="rrss.bench.handler_0"
+    )
+    for use_filters in (False, True):
+        mgr = _make_sender_mgr(100, use_filters)
+        kind = "sender_filter" if use_filters else "sender_check"
+        results.append(
+            await measure(f"event.emit.{kind}.h100", lambda: mgr.emit(sender_event))
+        )
+    return results
+
+
+if __name__ == "__main__":
+    run_standalone(run)
@@ -0,0 +1,87 @@
+"""
+Throughput of durable emits through the SQLite outbox, compared with in-memory emits.
+
+Run with:
+
+```
+python -m benchmarks.event_outbox
+```
+"""
+
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import anyio
+
+from extensions.event.types import Event, EventHandler
+from extensions.event.manager import EventManager
+from extensions.event.outbox import SQLiteOutbox
+
+from .suite import BenchmarkResult, measure, run_standalone
+
+EVENT_NAME = "rrss.bench.outbox"
+
+
+class _AsyncHandler(EventHandler[int]):
+    async def handler(self, event: Event[int]) -> None:
+        pass
+
+
+def _make_mgr(outbox_path: Path | None) -> EventManager:
+    mgr = EventManager(enable_stats=False)
+    if outbox_path is not None:
+        mgr.attach_outbox(SQLiteOutbox(outbox_path))
+    mgr.add_event(EVENT_NAME, durable=outbox_path is not None)
+    mgr.add_handler(
+        _AsyncHandler(event_name=EVENT_NAME, registrant="rrss.bench", identifier="h")
+    )
+    return mgr
+
+
+async def _emit_concurrently(mgr: EventManager, total: int, concurrency: int) -> None:
+    """Emit `total` events with `concurrency` concurrent emitters"""
+    event = Event.trusted(event_name=EVENT_NAME, data=0)
+
+    async def emitter(count: int):
+        for _ in range(count):
+            await mgr.emit_trusted(event)
+
+    async with anyio.create_task_group() as tg:
+        for _ in range(concurrency):
+            tg.start_soon(emitter, total // concurrency)
+
+
+async def run(total: int = 1000) -> list[BenchmarkResult]:
+    """Results are seconds per event, `slowdown` is relative to in-memory emits"""
+    results: list[BenchmarkResult] = []
+    with TemporaryDirectory() as tmp_dir:
+        for concurrency in (1, 10, 100):
+            memory_mgr = _make_mgr(None)
+            memory = await measure(
+                f"event.outbox.memory.c{concurrency}",
+                lambda: _emit_concurrently(memory_mgr, total, concurrency),
+                repeats=3,
+                ops=total,
+            )
+
+            durable_mgr = _make_mgr(Path(tmp_dir) / f"outbox_{concurrency}.sqlite3")
+            durable = await measure(
+                f"event.outbox.durable.c{concurrency}",
+                lambda: _emit_concurrently(durable_mgr, total, concurrency),
+                repeats=3,
+                ops=total,
+            )
+            assert durable_mgr.outbox is not None
+            durable_mgr.outbox.commits = 0
+            await _emit_concurrently(durable_mgr, total, concurrency)
+            durable.extra = {
+                "slowdown": durable.median / memory.median,
+                "ops_per_commit": 2 * total / durable_mgr.outbox.commits,
+            }
+            durable_mgr.shutdown()
+            results += [memory, durable]
+    return results
+
+
+if __name__ == "__main__":
+    run_standalone(run)
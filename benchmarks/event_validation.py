@@ -0,0 +1,45 @@
+"""
+Micro benchmark of event validation overhead, compare validated and trusted paths
+of `EventManager.emit` and `Event` construction.
+
+Run with:
+
+```
+python -m benchmarks.event_validation
+```
+"""
+
+from extensions.event.types import Event
+from extensions.event.manager import EventManager
+
+from .suite import BenchmarkResult, measure, run_standalone
+
+EVENT_NAME = "rrss.bench.feed.entry_added"
+SENDER = "rrss.bench.feed.poller"
+
+
+async def run() -> list[BenchmarkResult]:
+    """
+    Events of `emit()` cases have no handler, so only the validation and dispatch
+    overhead is measured.
+    """
+    mgr = EventManager()
+    mgr.add_event(EVENT_NAME)
+    event = Event.trusted(sender=SENDER, event_name=EVENT_NAME, data=0)
+
+    return [
+        await measure(
+            "event.construct.validated",
+            lambda: Event(sender=SENDER, event_name=EVENT_NAME, data=0),
+        ),
+        await measure(
+            "event.construct.trusted",
+            lambda: Event.trusted(sender=SENDER, event_name=EVENT_NAME, data=0),
+        ),
+        await measure("event.emit.validated", lambda: mgr.emit(event)),
+        await measure("event.emit.trusted", lambda: mgr.emit_trusted(event)),
+    ]
+
+
+if __name__ == "__main__":
+    run_standalone(run)
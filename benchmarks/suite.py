@@ -0,0 +1,215 @@
+"""
+Shared runner of RRSS benchmarks.
+
+Each benchmark module exposes an `async def run() -> list[BenchmarkResult]` function,
+and is registered to a suite in `benchmarks.__main__.SUITES`. Results of a run are saved as a JSON
+`BenchmarkReport`, two reports could be compared to flag regressions.
+"""
+
+import platform
+import statistics
+from datetime import datetime, timezone
+from inspect import isawaitable
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Awaitable, Callable, Literal
+
+from pydantic import BaseModel, Field
+
+
+class BenchmarkResult(BaseModel):
+    """Timing of a single benchmark case, all times are seconds per operation"""
+
+    name: str
+    """Dotted name of the case, e.g.: `event.emit.sync.h100`"""
+    rounds: int
+    """Calls measured in each repeat"""
+    repeats: int
+    median: float
+    min: float
+    mean: float
+    extra: dict[str, float] = Field(default_factory=dict)
+    """Other metrics of this case, not used in comparison"""
+
+
+class BenchmarkReport(BaseModel):
+    """Results of a benchmark run, saved as JSON"""
+
+    created_at: datetime
+    python: str
+    platform: str
+    results: list[BenchmarkResult]
+
+    @classmethod
+    def load(cls, path: str | Path) -> "BenchmarkReport":
+        return cls.model_validate_json(Path(path).read_text())
+
+    def save(self, path: str | Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(self.model_dump_json(indent=2))
+
+
+DiffStatus = Literal["ok", "regression", "improvement", "new", "removed"]
+
+
+class BenchmarkDiff(BaseModel):
+    """Comparison of a case between two reports"""
+
+    name: str
+    old: float | None
+    """Median of the old report, `None` if the case is new"""
+    new: float | None
+    """Median of the new report, `None` if the case is removed"""
+    status: DiffStatus
+
+    @property
+    def ratio(self) -> float | None:
+        if self.old is None or self.new is None:
+            return None
+        return self.new / self.old
+
+
+async def measure(
+    name: str,
+    func: Callable[[], Any] | Callable[[], Awaitable[Any]],
+    min_time: float = 0.2,
+    repeats: int = 5,
+    ops: int = 1,
+    extra: dict[str, float] | None = None,
+) -> BenchmarkResult:
+    """
+    Measure seconds per operation of `func`, which could be sync or async.
+
+    Rounds of each repeat are calibrated so a repeat takes about `min_time` seconds,
+    slow operations are called at least once per repeat.
+
+    Args:
+        ops: Number of operations performed by each call of `func`.
+    """
+    # also detect sync functions returning an awaitable, e.g.: lambda of a coroutine
+    is_async = isawaitable(first := func())
+    if is_async:
+        await first
+
+    async def run_rounds(rounds: int) -> float:
+        start = perf_counter()
+        if is_async:
+            for _ in range(rounds):
+                await func()  # type: ignore[misc]
+        else:
+            for _ in range(rounds):
+                func()
+        return perf_counter() - start
+
+    # warm up and calibrate
+    rounds = 1
+    while True:
+        elapsed = await run_rounds(rounds)
+        if elapsed >= min_time / 10 or rounds >= 1_000_000:
+            break
+        rounds *= 10
+    rounds = max(1, int(rounds * min_time / max(elapsed, 1e-9)))
+
+    timings = [await run_rounds(rounds) / rounds / ops for _ in range(repeats)]
+    return BenchmarkResult(
+        name=name,
+        rounds=rounds,
+        repeats=repeats,
+        median=statistics.median(timings),
+        min=min(timings),
+        mean=statistics.fmean(timings),
+        extra=extra or {},
+    )
+
+
+def new_report(results: list[BenchmarkResult]) -> BenchmarkReport:
+    return BenchmarkReport(
+        created_at=datetime.now(timezone.utc),
+        python=platform.python_version(),
+        platform=platform.platform(),
+        results=results,
+    )
+
+
+def compare(
+    old: BenchmarkReport, new: BenchmarkReport, threshold: float = 0.1
+) -> list[BenchmarkDiff]:
+    """
+    Compare medians of two reports.
+
+    A case is a regression if it's more than `threshold` (relative) slower in `new`,
+    and an improvement if it's more than `threshold` faster.
+    """
+    old_results = {r.name: r for r in old.results}
+    new_results = {r.name: r for r in new.results}
+
+    diffs: list[BenchmarkDiff] = []
+    for name in [*old_results, *(n for n in new_results if n not in old_results)]:
+        old_result = old_results.get(name, None)
+        new_result = new_results.get(name, None)
+        status: DiffStatus
+        if old_result is None:
+            status = "new"
+        elif new_result is None:
+            status = "removed"
+        elif new_result.median > old_result.median * (1 + threshold):
+            status = "regression"
+        elif new_result.median < old_result.median * (1 - threshold):
+            status = "improvement"
+        else:
+            status = "ok"
+        diffs.append(
+            BenchmarkDiff(
+                name=name,
+                old=old_result.median if old_result is not None else None,
+                new=new_result.median if new_result is not None else None,
+                status=status,
+            )
+        )
+    return diffs
+
+
+def format_time(seconds: float | None) -> str:
+    if seconds is None:
+        return "-"
+    if seconds >= 1:
+        return f"{seconds:.3f}s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.3f}ms"
+    return f"{seconds * 1e6:.2f}us"
+
+
+def format_results(results: list[BenchmarkResult]) -> str:
+    width = max((len(r.name) for r in results), default=0)
+    lines = []
+    for r in results:
+        line = (
+            f"{r.name:<{width}}  median={format_time(r.median):>10}  "
+            f"min={format_time(r.min):>10}  rounds={r.rounds}"
+        )
+        if r.extra:
+            line += "  " + " ".join(f"{k}={v:.4g}" for k, v in r.extra.items())
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def format_diffs(diffs: list[BenchmarkDiff]) -> str:
+    width = max((len(d.name) for d in diffs), default=0)
+    lines = []
+    for d in diffs:
+        ratio = f"{d.ratio:6.2f}x" if d.ratio is not None else "      -"
+        lines.append(
+            f"{d.name:<{width}}  {format_time(d.old):>10} -> "
+            f"{format_time(d.new):>10}  {ratio}  {d.status}"
+        )
+    return "\n".join(lines)
+
+
+def run_standalone(run: Callable[[], Awaitable[list[BenchmarkResult]]]) -> None:
+    """Run a single benchmark module and print its results"""
+    import anyio
+    from loguru import logger
+
+    logger.remove()
+    print(format_results(anyio.run(run)))
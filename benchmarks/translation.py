@@ -0,0 +1,145 @@
+"""
+Cost of translation resource lookup and discovery.
+
+Resources are generated in a temporary package, with `LNG_CODES` languages and
+`NAMESPACE_COUNT` namespaces each.
+
+Run with:
+
+```
+python -m benchmarks.translation
+```
+"""
+
+import json
+import sys
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from translation.cache import ResourceCache
+from translation.encoding import ContentEncoding
+from translation.manager import _TranslationResourceManager
+
+from .suite import BenchmarkResult, measure, run_standalone
+
+PACKAGE_NAME = "rrss_bench_locale"
+LNG_CODES = ("en", "de", "fr", "ja", "zh", "es", "it", "ko")
+NAMESPACE_COUNT = 20
+KEY_COUNT = 200
+"""Number of translation keys in each resource file"""
+PLUGIN_COUNT = 50
+"""
+Number of plugin packages generated for `discover_all()`, each has 2 languages and
+namespaces of its own
+"""
+
+
+def make_locale_package(
+    root: Path,
+    name: str = PACKAGE_NAME,
+    lng_codes: tuple[str, ...] = LNG_CODES,
+    namespace_count: int = NAMESPACE_COUNT,
+    ns_prefix: str = "ns",
+) -> None:
+    """
+    Generate a translation resource package named `name` under `root`, with
+    namespaces named `[ns_prefix]_[i]`
+    """
+    package_dir = root / name
+    package_dir.mkdir()
+    (package_dir / "__init__.py").touch()
+    for lng in lng_codes:
+        lng_dir = package_dir / lng
+        lng_dir.mkdir()
+        for i in range(namespace_count):
+            content = {
+                f"key_{k}": f"{lng} text {k} of {ns_prefix}_{i}"
+                for k in range(KEY_COUNT)
+            }
+            (lng_dir / f"{ns_prefix}_{i}.json").write_text(json.dumps(content))
+
+
+async def run() -> list[BenchmarkResult]:
+    with TemporaryDirectory() as tmp_dir:
+        make_locale_package(Path(tmp_dir))
+        plugins = [f"{PACKAGE_NAME}_plugin_{i}" for i in range(PLUGIN_COUNT)]
+        for i, plugin in enumerate(plugins):
+            # distinct namespaces, so none is skipped as duplicated when registered
+            make_locale_package(Path(tmp_dir), plugin, LNG_CODES[:2], 4, f"plugin_{i}")
+        manifest = Path(tmp_dir) / "manifest.json"
+        sys.path.insert(0, tmp_dir)
+        try:
+
+            def discover(
+                cache: ResourceCache | None = None,
+            ) -> _TranslationResourceManager:
+                mgr = _TranslationResourceManager(cache=cache)
+                mgr.discover(PACKAGE_NAME)
+                return mgr
+
+            mgr = discover()
+            # stat the file on every lookup
+            revalidating_mgr = discover(ResourceCache(revalidate_interval=0))
+            uncached_mgr = discover(ResourceCache(max_bytes=0))
+            resource_count = len(LNG_CODES) * NAMESPACE_COUNT
+            # a page with active and fallback languages
+            bundle_lngs = ["de", "en"]
+            bundle_nss = [f"ns_{i}" for i in range(8)]
+            return [
+                await measure(
+                    "translation.get_resource_json",
+                    lambda: mgr.get_resource_json("de", "ns_0"),
+                ),
+                await measure(
+                    "translation.get_resource_json.revalidate",
+                    lambda: revalidating_mgr.get_resource_json("de", "ns_0"),
+                ),
+                await measure(
+                    "translation.get_resource_json.uncached",
+                    lambda: uncached_mgr.get_resource_json("de", "ns_0"),
+                ),
+                await measure(
+                    "translation.get_resource_variant.br",
+                    lambda: mgr.get_resource_variant(
+                        "de", "ns_0", ContentEncoding.BROTLI
+                    ),
+                ),
+                await measure(
+                    "translation.get_bundle.l2n8",
+                    lambda: mgr.get_bundle(bundle_lngs, bundle_nss),
+                ),
+                await measure(
+                    "translation.get_resource_json.l2n8",
+                    lambda: [
+                        mgr.get_resource_json(lng, ns)
+                        for lng in bundle_lngs
+                        for ns in bundle_nss
+                    ],
+                ),
+                await measure(
+                    "translation.discover",
+                    discover,
+                    extra={"resources": resource_count},
+                ),
+                await measure(
+                    "translation.discover_all",
+                    lambda: _TranslationResourceManager().discover_all(plugins),
+                    extra={"anchors": PLUGIN_COUNT},
+                ),
+                await measure(
+                    "translation.discover_all.manifest",
+                    lambda: _TranslationResourceManager().discover_all(
+                        plugins, manifest=manifest
+                    ),
+                    extra={"anchors": PLUGIN_COUNT},
+                ),
+            ]
+        finally:
+            sys.path.remove(tmp_dir)
+            sys.modules.pop(PACKAGE_NAME, None)
+            for plugin in plugins:
+                sys.modules.pop(plugin, None)
+
+
+if __name__ == "__main__":
+    run_standalone(run)
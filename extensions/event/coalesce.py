@@ -0,0 +1,207 @@
+"""
+Coalescing (debouncing) of events which fire in storms, where only the latest
+event matters, e.g.: `feed.updated`.
+"""
+
+from time import perf_counter
+from typing import Any, Awaitable, Callable, Hashable
+
+import anyio
+from pydantic import BaseModel, ConfigDict, Field
+
+from .types import Event
+
+
+class CoalescePolicy(BaseModel):
+    """
+    Determine how events of a single event name are coalesced.
+
+    Events with the same key are merged into one pending event, which is dispatched
+    after no new event with this key arrived for `window` seconds, or `max_wait`
+    seconds after the first of them arrived.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True, frozen=True)
+
+    window: float = Field(gt=0)
+    """Debounce window in seconds"""
+
+    max_wait: float | None = Field(default=None, gt=0)
+    """
+    Max seconds an event could be delayed, even if new events keep arriving.
+    If `None`, the pending event is only dispatched after a quiet window.
+    """
+
+    key: Callable[[Any], Hashable] | None = None
+    """
+    Function called with `event.data` to get the coalescing key.
+    If `None`, all events of this event name share the same key.
+    """
+
+    merge: Callable[[Event[Any], Event[Any]], Event[Any]] | None = None
+    """
+    Function called with `(pending_event, new_event)` and returns the merged event.
+    If `None`, the new event replaces the pending one.
+    """
+
+    def key_of(self, event: Event[Any]) -> Hashable:
+        return self.key(event.data) if self.key is not None else None
+
+    def combine(self, pending: Event[Any], new: Event[Any]) -> Event[Any]:
+        return self.merge(pending, new) if self.merge is not None else new
+
+    def collapse(self, events: list[Event[Any]]) -> list[Event[Any]]:
+        """Coalesce a batch of events immediately, ignoring the time window"""
+        collapsed: dict[Hashable, Event[Any]] = dict()
+        for event in events:
+            key = self.key_of(event)
+            pending = collapsed.get(key, None)
+            collapsed[key] = event if pending is None else self.combine(pending, event)
+        return list(collapsed.values())
+
+
+class CoalesceStats(BaseModel):
+    """Snapshot of event counts of an `EventCoalescer`"""
+
+    event_name: str
+    received: int
+    """Total number of events submitted"""
+    dispatched: int
+    """Total number of events actually dispatched to handlers"""
+    pending: int
+    """Number of keys with a pending event"""
+
+
+class _PendingSlot:
+    __slots__ = (
+        "event",
+        "first_at",
+        "last_at",
+        "done",
+        "error",
+        "changed",
+        "driving",
+        "callers",
+    )
+
+    def __init__(self, event: Event[Any], now: float):
+        self.event = event
+        self.first_at = now
+        self.last_at = now
+        self.done = False
+        self.error: Exception | None = None
+        """Raised by the dispatch, re-raised to every caller"""
+        self.changed = anyio.Event()
+        """Set when the slot is dispatched, or its driver is cancelled"""
+        self.driving = False
+        """If a caller is waiting for the window and dispatching"""
+        self.callers = 0
+
+    def notify(self) -> None:
+        changed, self.changed = self.changed, anyio.Event()
+        changed.set()
+
+
+class EventCoalescer:
+    """
+    Coalesce events of a single event name following a `CoalescePolicy`.
+
+    The first caller of `submit()` for a key waits for the debounce window and then
+    dispatches the pending event; later callers with the same key only update the
+    pending event and wait until it's dispatched. So every caller returns after the
+    handlers handled an event at least as new as the one it submitted.
+
+    If the dispatching caller is cancelled, a waiting caller takes over, the pending
+    event is only dropped when all of its callers are cancelled. If the dispatch
+    fails, the error is raised to every caller, the event is never dispatched again.
+
+    Note that only events submitted while another one is pending are merged, a loop
+    awaiting `submit()` one by one waits a full window for every event. Submit
+    concurrently, e.g.: with `EventManager.publish()`, to coalesce them.
+    """
+
+    def __init__(
+        self,
+        event_name: str,
+        policy: CoalescePolicy,
+        dispatch: Callable[[Event[Any]], Awaitable[Any]],
+    ):
+        self.event_name = event_name
+        self.policy = policy
+        self._dispatch = dispatch
+        self._pending: dict[Hashable, _PendingSlot] = dict()
+
+        self.received = 0
+        """Total number of submitted events"""
+        self.dispatched = 0
+        """Total number of events actually dispatched to handlers"""
+
+    async def submit(self, event: Event[Any]) -> None:
+        policy = self.policy
+        key = policy.key_of(event)
+        now = perf_counter()
+        self.received += 1
+
+        slot = self._pending.get(key, None)
+        if slot is not None:
+            slot.event = policy.combine(slot.event, event)
+            slot.last_at = now
+        else:
+            slot = _PendingSlot(event, now)
+            self._pending[key] = slot
+
+        slot.callers += 1
+        try:
+            while not slot.done:
+                if slot.driving:
+                    await slot.changed.wait()
+                    continue
+                slot.driving = True
+                try:
+                    await self._drive(key, slot)
+                finally:
+                    slot.driving = False
+                    # dispatched, failed, or cancelled, wake a waiting caller to take over
+                    slot.notify()
+            if slot.error is not None:
+                raise slot.error
+        finally:
+            slot.callers -= 1
+            if not slot.done and slot.callers == 0:
+                # all callers cancelled, drop the slot so it won't be updated anymore
+                if self._pending.get(key, None) is slot:
+                    del self._pending[key]
+
+    async def _drive(self, key: Hashable, slot: _PendingSlot) -> None:
+        """Wait for the debounce window of `slot` and dispatch it"""
+        policy = self.policy
+        while True:
+            deadline = slot.last_at + policy.window
+            if policy.max_wait is not None:
+                deadline = min(deadline, slot.first_at + policy.max_wait)
+            delay = deadline - perf_counter()
+            if delay <= 0:
+                break
+            await anyio.sleep(delay)
+
+        # events arrive from now on start a new slot
+        if self._pending.get(key, None) is slot:
+            del self._pending[key]
+            self.dispatched += 1
+        # dispatched again if the previous driver is cancelled during dispatching
+        try:
+            await self._dispatch(slot.event)
+        except Exception as e:
+            # only a cancelled driver hands the slot over, a failed one doesn't
+            slot.error = e
+            slot.done = True
+            raise
+        slot.done = True
+
+    def stats(self) -> CoalesceStats:
+        return CoalesceStats(
+            event_name=self.event_name,
+            received=self.received,
+            dispatched=self.dispatched,
+            pending=len(self._pending),
+        )
@@ -40,3 +40,111 @@ class EventNotRegistered(RRSSEventSystemError):
     def __init__(self, title="event_not_registered", event_name: str | None = None):
         super().__init__(title)
         self.event_name = event_name
+
+
+class ExecutorPoolNotFound(RRSSEventSystemError):
+    """
+    Raise when a handler requires an executor pool which is not configured
+    """
+
+    def __init__(
+        self,
+        title="executor_pool_not_found",
+        execution: str | None = None,
+        pool: str | None = None,
+    ):
+        super().__init__(title)
+        self.execution = execution
+        self.pool = pool
+
+
+class EventQueueNotFound(RRSSEventSystemError):
+    """
+    Raise when trying to use an event queue which is not added
+    """
+
+    def __init__(self, title="event_queue_not_found", queue: str | None = None):
+        super().__init__(title)
+        self.queue = queue
+
+
+class EventQueueFull(RRSSEventSystemError):
+    """
+    Raise when publishing to a full event queue with `FAIL` overflow policy
+    """
+
+    def __init__(
+        self,
+        title="event_queue_full",
+        queue: str | None = None,
+        event_name: str | None = None,
+    ):
+        super().__init__(title)
+        self.queue = queue
+        self.event_name = event_name
+
+
+class OutboxNotAttached(RRSSEventSystemError):
+    """
+    Raise when adding a durable event to a manager without an outbox
+    """
+
+    def __init__(self, title="outbox_not_attached", event_name: str | None = None):
+        super().__init__(title)
+        self.event_name = event_name
+
+
+class HandlerNotInline(RRSSEventSystemError):
+    """
+    Raise when emitting synchronously to an event which has handlers that could not
+    run without an event loop, i.e.: async handlers, or sync handlers not using
+    `INLINE` execution policy
+    """
+
+    def __init__(
+        self,
+        title="handler_not_inline",
+        event_name: str | None = None,
+        handlers: list[tuple[str, str]] | None = None,
+    ):
+        super().__init__(title)
+        self.event_name = event_name
+        self.handlers = handlers or []
+        """`(registrant, identifier)` of handlers could not run inline"""
+
+
+class HandlerCallTimeout(RRSSEventSystemError):
+    """
+    Raise from a single call of a handler with retry or isolation, when the call ran
+    past the handler timeout, so the call is retried or stored as a dead letter
+    """
+
+    def __init__(
+        self,
+        title="handler_call_timeout",
+        registrant: str | None = None,
+        identifier: str | None = None,
+        timeout: float | None = None,
+    ):
+        super().__init__(title)
+        self.registrant = registrant
+        self.identifier = identifier
+        self.timeout = timeout
+
+
+class HandlerTimeout(RRSSEventSystemError):
+    """
+    Raise after an emit finished, when some handlers were cancelled or abandoned
+    because they ran past their deadline
+    """
+
+    def __init__(
+        self,
+        title="handler_timeout",
+        event_name: str | None = None,
+        handlers: list[tuple[str, str]] | None = None,
+    ):
+        super().__init__(title)
+        self.event_name = event_name
+        self.handlers = handlers or []
+        """`(registrant, identifier)` of timed out handlers"""
@@ -0,0 +1,268 @@
+import os
+from asyncio import iscoroutinefunction
+from concurrent.futures import ProcessPoolExecutor
+from contextvars import ContextVar
+from functools import partial
+from multiprocessing.context import BaseContext
+from typing import Any, Awaitable, Callable
+
+from anyio import CapacityLimiter, to_thread
+from loguru import logger as _logger
+from pydantic import BaseModel
+
+from .types import ExecutionPolicy
+from . import errors as event_errors
+from utils.asyncers import inlinify, processify
+
+DEFAULT_POOL_NAME = "default"
+
+abandon_on_cancel: ContextVar[bool] = ContextVar(
+    "rrss_event_abandon_on_cancel", default=False
+)
+"""
+If `True`, handlers running in a worker thread are abandoned instead of waited when
+cancelled. Set by deadline wrappers, so only handlers timed out return early, while
+handlers cancelled for other reasons, e.g.: a sibling handler failed, are still waited.
+"""
+
+
+def _threadify[
+    T_Ret
+](func: Callable[..., T_Ret], limiter: CapacityLimiter | None) -> Callable[
+    ..., Awaitable[T_Ret]
+]:
+    """Wrap a sync function into a coroutine function which run it in a worker thread"""
+
+    async def wrapper(*args: Any, **kwargs: Any) -> T_Ret:
+        return await to_thread.run_sync(
+            partial(func, *args, **kwargs),
+            abandon_on_cancel=abandon_on_cancel.get(),
+            limiter=limiter,
+        )
+
+    return wrapper
+
+
+class PoolStats(BaseModel):
+    """Snapshot of the usage of an executor pool"""
+
+    name: str
+    """Name of the pool"""
+    execution: ExecutionPolicy
+    """Execution policy served by this pool, `THREAD` or `PROCESS`"""
+    size: int
+    """Max number of handlers could be run concurrently with this pool"""
+    in_use: int
+    """Number of handlers currently running with this pool"""
+    waiting: int
+    """Number of handlers waiting for a free slot of this pool"""
+
+
+class _ProcessPool:
+    """Lazily created process pool with in-flight tracking"""
+
+    def __init__(self, max_workers: int | None, mp_context: BaseContext | None):
+        self.max_workers = max_workers
+        self.mp_context = mp_context
+        self.in_flight = 0
+        self._executor: ProcessPoolExecutor | None = None
+        self._limiter: CapacityLimiter | None = None
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=self.mp_context
+            )
+        return self._executor
+
+    @property
+    def limiter(self) -> CapacityLimiter:
+        """
+        Limiter of the threads waiting for results, one for each worker process, so
+        waiting never takes the threads of `THREAD` handlers
+        """
+        if self._limiter is None:
+            self._limiter = CapacityLimiter(self.size)
+        return self._limiter
+
+    @property
+    def size(self) -> int:
+        if self.max_workers is not None:
+            return self.max_workers
+        # same as the default of `ProcessPoolExecutor`
+        return os.process_cpu_count() or 1
+
+    def asyncify[
+        T_Ret
+    ](self, func: Callable[..., T_Ret]) -> Callable[..., Awaitable[T_Ret]]:
+        async def wrapper(*args: Any, **kwargs: Any) -> T_Ret:
+            self.in_flight += 1
+            try:
+                return await processify(func, self.executor, self.limiter)(
+                    *args, **kwargs
+                )
+            finally:
+                self.in_flight -= 1
+
+        return wrapper
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+
+
+class HandlerExecutors:
+    """
+    Manage the pools used to execute sync event handlers.
+
+    - Thread pools are `anyio.CapacityLimiter` with a fixed number of tokens. Handlers
+      using `THREAD` policy with no pool name share the default thread limiter of `anyio`.
+    - Process pools are lazily created `ProcessPoolExecutor`. Handlers using `PROCESS`
+      policy with no pool name use the `default` process pool, which has one worker
+      for each CPU.
+    """
+
+    def __init__(self):
+        self._thread_pools: dict[str, CapacityLimiter] = dict()
+        self._process_pools: dict[str, _ProcessPool] = {
+            DEFAULT_POOL_NAME: _ProcessPool(max_workers=None, mp_context=None)
+        }
+
+    def add_thread_pool(self, name: str, size: int) -> None:
+        """
+        Add a new bounded thread pool, or resize it if the pool already exists.
+
+        Resizing takes effect immediately for all handlers using this pool.
+        """
+        if size < 1:
+            raise ValueError("Thread pool size must be a positive integer")
+
+        if name in self._thread_pools:
+            self._thread_pools[name].total_tokens = size
+        else:
+            self._thread_pools[name] = CapacityLimiter(size)
+
+        _logger.debug(f"Thread pool configured: name={name!r}, size={size}")
+
+    def add_process_pool(
+        self,
+        name: str,
+        max_workers: int | None = None,
+        mp_context: BaseContext | None = None,
+    ) -> None:
+        """
+        Add a new process pool, replace the existing one if name is already used.
+
+        Args:
+            max_workers:
+                Max worker process count, `None` means the number of CPUs.
+            mp_context:
+                Multiprocessing context used to start worker processes.
+        """
+        old_pool = self._process_pools.get(name, None)
+        self._process_pools[name] = _ProcessPool(
+            max_workers=max_workers, mp_context=mp_context
+        )
+        if old_pool is not None:
+            old_pool.shutdown(wait=False)
+
+        _logger.debug(
+            f"Process pool configured: name={name!r}, max_workers={max_workers}"
+        )
+
+    def check_pool(self, execution: ExecutionPolicy, pool: str | None) -> None:
+        """
+        Check if the pool required by an execution policy exists.
+
+        Raises:
+            ExecutorPoolNotFound
+        """
+        if pool is None or execution == ExecutionPolicy.INLINE:
+            return
+
+        if execution == ExecutionPolicy.THREAD:
+            pools: dict[str, Any] = self._thread_pools
+        else:
+            pools = self._process_pools
+
+        if pool not in pools:
+            raise event_errors.ExecutorPoolNotFound(execution=execution, pool=pool)
+
+    def asyncify(
+        self,
+        func: Callable[..., Any],
+        execution: ExecutionPolicy,
+        pool: str | None = None,
+    ) -> Callable[..., Awaitable[Any]]:
+        """
+        Convert `func` into a coroutine function which follows the execution policy.
+
+        Coroutine functions are always returned as-is.
+
+        Raises:
+            ExecutorPoolNotFound
+        """
+        self.check_pool(execution=execution, pool=pool)
+
+        # coroutine function, policy is ignored
+        if iscoroutinefunction(func):
+            return func
+
+        if execution == ExecutionPolicy.INLINE:
+            return inlinify(func)
+
+        if execution == ExecutionPolicy.PROCESS:
+            return self._process_pools[pool or DEFAULT_POOL_NAME].asyncify(func)
+
+        limiter = None if pool is None else self._thread_pools[pool]
+        return _threadify(func, limiter=limiter)
+
+    def stats(self) -> list[PoolStats]:
+        """
+        Return usage snapshot of all pools.
+
+        The default `anyio` thread limiter is only included when called inside
+        an event loop.
+        """
+        thread_pools = dict(self._thread_pools)
+        try:
+            thread_pools.setdefault(
+                DEFAULT_POOL_NAME, to_thread.current_default_thread_limiter()
+            )
+        except Exception:
+            # no running event loop
+            pass
+
+        ret: list[PoolStats] = []
+        for name, limiter in thread_pools.items():
+            limiter_stats = limiter.statistics()
+            ret.append(
+                PoolStats(
+                    name=name,
+                    execution=ExecutionPolicy.THREAD,
+                    size=int(limiter_stats.total_tokens),
+                    in_use=limiter_stats.borrowed_tokens,
+                    waiting=limiter_stats.tasks_waiting,
+                )
+            )
+
+        for name, process_pool in self._process_pools.items():
+            size = process_pool.size
+            ret.append(
+                PoolStats(
+                    name=name,
+                    execution=ExecutionPolicy.PROCESS,
+                    size=size,
+                    in_use=min(process_pool.in_flight, size),
+                    waiting=max(process_pool.in_flight - size, 0),
+                )
+            )
+
+        return ret
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Shutdown all process pools"""
+        for process_pool in self._process_pools.values():
+            process_pool.shutdown(wait=wait)
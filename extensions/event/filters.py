@@ -0,0 +1,154 @@
+"""
+Index of event handler filters, check out `EventFilter`.
+
+Handlers are indexed by the most selective condition of their filter:
+
+1. `sender`: Exact sender lookup.
+2. `sender_prefix`: Lookup of each segment prefix of the sender, e.g.: `rrss`,
+   `rrss.feed` and `rrss.feed.xyz` for sender `rrss.feed.xyz`.
+3. `data`: Lookup of the value of one data field, if the required value is hashable.
+
+Remaining conditions of a handler are checked on the candidates only. Selections by
+sender, which are the same for every emit of that sender, are cached.
+"""
+
+from typing import Any, Hashable, Sequence
+
+from .types import EventFilter, get_data_field
+
+_SENDER_CACHE_SIZE = 1024
+"""Max number of senders whose selection is cached, the cache is cleared when full"""
+
+
+def _position(pair: tuple[int, Any]) -> int:
+    return pair[0]
+
+
+class _Entry[T]:
+    __slots__ = ("position", "item", "filters", "needs_check")
+
+    def __init__(self, position: int, item: T, filters: EventFilter, needs_check: bool):
+        self.position = position
+        self.item = item
+        self.filters = filters
+        self.needs_check = needs_check
+        """If conditions other than the indexed one should be checked"""
+
+
+class HandlerFilterIndex[T]:
+    """
+    Select the items whose filter matches an event, in their original order.
+
+    Built once from `(filter, item)` pairs, items with no filter always match.
+    """
+
+    __slots__ = (
+        "_unfiltered",
+        "_by_sender",
+        "_by_prefix",
+        "_by_data",
+        "_scanned",
+        "_sender_cache",
+    )
+
+    def __init__(self, filtered_items: Sequence[tuple[EventFilter | None, T]]):
+        self._unfiltered: list[tuple[int, T]] = []
+        self._by_sender: dict[str, list[_Entry[T]]] = dict()
+        self._by_prefix: dict[str, list[_Entry[T]]] = dict()
+        self._by_data: dict[str, dict[Hashable, list[_Entry[T]]]] = dict()
+        self._scanned: list[_Entry[T]] = []
+        """Entries filtered by unhashable data values only, checked one by one"""
+        self._sender_cache: dict[
+            str | None, tuple[list[tuple[int, T]], list[_Entry[T]]]
+        ] = dict()
+
+        for position, (filters, item) in enumerate(filtered_items):
+            if filters is None or filters.is_empty:
+                self._unfiltered.append((position, item))
+            elif filters.sender is not None:
+                needs_check = filters.sender_prefix is not None or bool(filters.data)
+                self._by_sender.setdefault(filters.sender, []).append(
+                    _Entry(position, item, filters, needs_check)
+                )
+            elif filters.sender_prefix is not None:
+                self._by_prefix.setdefault(filters.sender_prefix, []).append(
+                    _Entry(position, item, filters, bool(filters.data))
+                )
+            else:
+                self._index_data(_Entry(position, item, filters, True))
+
+    def _index_data(self, entry: _Entry[T]) -> None:
+        for name, value in entry.filters.data.items():
+            try:
+                values = self._by_data.setdefault(name, dict())
+                values.setdefault(value, []).append(entry)
+                entry.needs_check = len(entry.filters.data) > 1
+                return
+            except TypeError:
+                # unhashable value, try next field
+                continue
+        self._scanned.append(entry)
+
+    def _select_by_sender(
+        self, sender: str | None
+    ) -> tuple[list[tuple[int, T]], list[_Entry[T]]]:
+        """
+        Return `(matched, candidates)` by sender only, candidates still need their
+        data conditions checked
+        """
+        cached = self._sender_cache.get(sender, None)
+        if cached is not None:
+            return cached
+
+        matched = list(self._unfiltered)
+        candidates: list[_Entry[T]] = []
+        if sender is not None:
+            entries = list(self._by_sender.get(sender, ()))
+            if self._by_prefix:
+                segments = sender.split(".")
+                for end in range(1, len(segments) + 1):
+                    entries.extend(self._by_prefix.get(".".join(segments[:end]), ()))
+            for entry in entries:
+                if not entry.needs_check:
+                    matched.append((entry.position, entry.item))
+                elif entry.filters.data:
+                    candidates.append(entry)
+                elif entry.filters.matches(sender, None):
+                    matched.append((entry.position, entry.item))
+
+        matched.sort(key=_position)
+        if len(self._sender_cache) >= _SENDER_CACHE_SIZE:
+            self._sender_cache.clear()
+        self._sender_cache[sender] = (matched, candidates)
+        return matched, candidates
+
+    def select(self, sender: str | None, data: Any) -> list[T]:
+        """Return items whose filter matches an event with `sender` and `data`"""
+        matched, candidates = self._select_by_sender(sender)
+        if not candidates and not self._by_data and not self._scanned:
+            # already in order
+            return [item for _, item in matched]
+
+        selected = list(matched)
+        for entry in candidates:
+            if entry.filters.matches(sender, data):
+                selected.append((entry.position, entry.item))
+
+        for name, values in self._by_data.items():
+            try:
+                entries = values.get(get_data_field(data, name), None)
+            except TypeError:
+                # unhashable field value, could not equal a hashable filter value
+                continue
+            if entries is None:
+                continue
+            for entry in entries:
+                if not entry.needs_check or entry.filters.matches(sender, data):
+                    selected.append((entry.position, entry.item))
+
+        for entry in self._scanned:
+            if entry.filters.matches(sender, data):
+                selected.append((entry.position, entry.item))
+
+        selected.sort(key=_position)
+        return [item for _, item in selected]
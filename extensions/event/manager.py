@@ -1,54 +1,214 @@
-from typing import Any
+from asyncio import iscoroutinefunction
+from contextlib import asynccontextmanager
+from functools import partial
+from datetime import datetime, timezone
+from math import inf
+from threading import Lock, RLock, Thread
+from time import perf_counter
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterable,
+    Sequence,
+)
 from loguru import logger as _logger
-from pydantic import BaseModel, ConfigDict, validate_call
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    PositiveFloat,
+    PrivateAttr,
+    TypeAdapter,
+    validate_call,
+)
+from anyio.abc import TaskGroup
+from anyio import CancelScope, create_memory_object_stream, current_time, to_thread
 from asyncer import create_task_group
 
-from .types import Event, EventHandler
+from .types import (
+    AnyEvent,
+    Event,
+    EventFilter,
+    EventHandler,
+    ExecutionPolicy,
+    LightEvent,
+)
 from . import errors as event_errors
-from utils.types import RRSSEntityIdField, RRSSEntityIdKeyDict, SnakeCaseField
-from utils.asyncers import ensure_asyncify
+from .executors import HandlerExecutors, PoolStats
+from .queue import DEFAULT_QUEUE_NAME, EventQueue, OverflowPolicy, QueueStats
+from .patterns import EventPatternTrie, is_pattern, match_pattern
+from .stats import (
+    EventStatsRegistry,
+    HandlerStats,
+    HandlerStatsSnapshot,
+    dispatch_started_at,
+)
+from .tracing import SpanExporter, Tracer, current_span
+from .coalesce import CoalescePolicy, CoalesceStats, EventCoalescer
+from .transport import EventScope, UnixSocketTransport
+from .timeouts import (
+    run_before,
+    timed_out_handlers,
+    wrap_report_timeout,
+    wrap_timeout,
+)
+from .outbox import SQLiteOutbox
+from .filters import HandlerFilterIndex
+from .retry import DeadLetter, DeadLetterQueue, redriving, wrap_isolated, wrap_retry
+from utils.types import (
+    RRSSEntityIdField,
+    RRSSEntityIdKeyDict,
+    RRSSEntityIdPatternField,
+    SnakeCaseField,
+)
 
 
 class _SingleEventMgr[EventDataType](BaseModel):
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
-    name: RRSSEntityIdField
-    """Name of the event this `SingleEventManager` instance should process"""
+    name: RRSSEntityIdPatternField
+    """
+    Name of the event this `SingleEventManager` instance should process
+
+    Could also be a wildcard pattern, in which case this manager only holds handlers
+    and is never emitted directly.
+    """
 
-    handler_dict: RRSSEntityIdKeyDict[list[EventHandler[EventDataType]]] = (
+    handler_dict: RRSSEntityIdKeyDict[dict[str, EventHandler[EventDataType]]] = (
         RRSSEntityIdKeyDict()
     )
     """
     Dictionary to store handlers of this event
     
     - key: Registrant EntityId of this handler
-    - value: `EventHandlerModel` object
+    - value: Dictionary from handler identifier to `EventHandlerModel` object,
+      in insertion order
+
+    Copy-on-write: dictionaries are never modified after being assigned here, adding
+    or removing handlers assigns new ones, so readers could iterate without locking.
+    """
+
+    _snapshot: "_DispatchSnapshot" = PrivateAttr(
+        default_factory=lambda: _EMPTY_SNAPSHOT
+    )
+    """
+    Immutable snapshot of everything `emit()` needs, including the handlers inherited
+    from matching pattern managers.
+
+    Rebuilt by `add()` and `remove()`, so `emit()` don't need to walk `handler_dict`
+    nor asyncify sync handlers on every call. A new snapshot is published with a single
+    attribute assignment, each emit reads it once and keeps using that version, even if
+    handlers are added or removed concurrently.
+    """
+
+    _own_dispatch_records: tuple["_DispatchRecord", ...] = PrivateAttr(default=())
+    """Dispatch records of the handlers of this manager only, in insertion order"""
+
+    _built_records: dict[tuple[str, str], "_DispatchRecord"] = PrivateAttr(
+        default_factory=dict
+    )
+    """
+    Dispatch records by `(registrant, identifier)`, so adding a handler only wraps
+    the new one
+    """
+
+    _inherited: tuple["_SingleEventMgr", ...] = PrivateAttr(default=())
+    """
+    Pattern managers whose pattern matches the name of this manager, their handlers
+    are appended to the dispatch plans of this manager.
+    """
+
+    _executors: HandlerExecutors = PrivateAttr()
+    """Executor pools used to run sync handlers, shared with the `EventManager`"""
+
+    _stats: EventStatsRegistry | None = PrivateAttr(default=None)
+    """Handler statistics registry, shared with the `EventManager`, `None` to disable"""
+
+    _tracer: Tracer | None = PrivateAttr(default=None)
+    """Tracer shared with the `EventManager`, `None` to disable"""
+
+    _dead_letters: DeadLetterQueue | None = PrivateAttr(default=None)
+    """
+    Dead letters of isolated handlers, shared with the `EventManager`, if `None`,
+    failures of isolated handlers are only logged
     """
 
-    def __init__(self, name: str):
+    _handler_timeout: float | None = PrivateAttr(default=None)
+    """Default timeout of handlers with no `timeout` of their own, `None` for no limit"""
+
+    def __init__(
+        self,
+        name: str,
+        executors: HandlerExecutors | None = None,
+        stats: EventStatsRegistry | None = None,
+        tracer: Tracer | None = None,
+        dead_letters: DeadLetterQueue | None = None,
+    ):
         super().__init__(name=name)
         self.name = name
+        self._executors = executors if executors is not None else HandlerExecutors()
+        self._stats = stats
+        self._tracer = tracer
+        self._dead_letters = dead_letters
 
     def add(self, handler: EventHandler[EventDataType]) -> None:
-        """Add a new handler to this single event"""
-        # set default, then get the list of handlers of this registrant
-        self.handler_dict.setdefault(handler.registrant, list())
-        handler_list = self.handler_dict[handler.registrant]
+        """
+        Add a new handler to this single event
 
-        # try add handlers
-        handler_list.append(handler)
+        Raises:
+            DuplicatedHandlerID
+            ExecutorPoolNotFound: The executor pool required by the handler not exists.
+        """
+        self.add_many([handler])
 
-        # check identifier duplication
-        handler_identifier_list = [
-            h.identifier for h in self.handler_dict[handler.registrant]
-        ]
-        # rollback & raise if duplicated
-        if len(set(handler_identifier_list)) < len(handler_identifier_list):
-            handler_list.pop()
-            raise event_errors.DuplicatedHandlerID(
-                duplicated_identifier=handler.identifier
+    def add_many(self, handlers: list[EventHandler[EventDataType]]) -> None:
+        """
+        Add handlers to this single event, the dispatch plan is rebuilt only once.
+
+        If any handler fails the checks, none of the handlers will be added.
+
+        Raises:
+            DuplicatedHandlerID
+            ExecutorPoolNotFound: The executor pool required by the handler not exists.
+        """
+        self.check_new(handlers)
+        if not handlers:
+            return
+
+        handler_dict = RRSSEntityIdKeyDict(self.handler_dict)
+        copied: set[str] = set()
+        for handler in handlers:
+            registrant = handler.registrant
+            if registrant not in copied:
+                handler_dict[registrant] = dict(handler_dict.get(registrant, ()))
+                copied.add(registrant)
+            handler_dict[registrant][handler.identifier] = handler
+        self.handler_dict = handler_dict
+        self._rebuild_dispatch_plan()
+
+    def check_new(self, handlers: list[EventHandler[EventDataType]]) -> None:
+        """
+        Check if `handlers` could be added to this single event without modifying it
+
+        Raises:
+            DuplicatedHandlerID
+            ExecutorPoolNotFound: The executor pool required by the handler not exists.
+        """
+        new_ids: set[tuple[str, str]] = set()
+        for handler in handlers:
+            self._executors.check_pool(
+                execution=handler.execution, pool=handler.executor_pool
             )
 
+            handler_id = (handler.registrant, handler.identifier)
+            if handler_id in new_ids or self.has(*handler_id):
+                raise event_errors.DuplicatedHandlerID(
+                    duplicated_identifier=handler.identifier
+                )
+            new_ids.add(handler_id)
+
     def has(
         self,
         registrant: RRSSEntityIdField,
@@ -59,16 +219,12 @@ class _SingleEventMgr[EventDataType](BaseModel):
 
         If `identifier` is None, only check if `registrant` exists
         """
-
-        if self.handler_dict.get(registrant, None) is None:
+        handlers_of_registrant = self.handler_dict.get(registrant, None)
+        if handlers_of_registrant is None:
             return False
 
         if identifier is not None:
-            handler_list = self.handler_dict[registrant]
-            for handler in handler_list:
-                if handler.identifier == identifier:
-                    return True
-            return False
+            return identifier in handlers_of_registrant
         else:
             return True
 
@@ -76,6 +232,9 @@ class _SingleEventMgr[EventDataType](BaseModel):
         """
         Yield all handlers models added to this event
 
+        Handlers added or removed during the iteration are not reflected, the iteration
+        always sees a consistent version of the handlers.
+
         Examples:
 
         ```
@@ -84,36 +243,524 @@ class _SingleEventMgr[EventDataType](BaseModel):
             # do sth
         ```
         """
-        for registrant, handler_list in self.handler_dict.items():
-            for handler in handler_list:
-                yield handler
+        # pin current version, it's never modified
+        handler_dict = self.handler_dict
+        for handlers_of_registrant in handler_dict.values():
+            yield from handlers_of_registrant.values()
 
-    async def emit(self, event: Event[EventDataType]) -> None:
+    def set_handler_timeout(self, timeout: float | None) -> None:
+        """
+        Set the default timeout of handlers of this event, handlers with their own
+        `timeout` are not affected.
+        """
+        if timeout == self._handler_timeout:
+            return
+        self._handler_timeout = timeout
+        self._rebuild_dispatch_plan(rebuild_calls=True)
+
+    def set_inherited(self, pattern_mgrs: tuple["_SingleEventMgr[Any]", ...]) -> None:
+        """
+        Set the pattern managers matching this event and re-combine dispatch plans.
+
+        Should be called when matching patterns changed, or handlers of any inherited
+        pattern manager changed.
+        """
+        self._inherited = pattern_mgrs
+        self._combine_dispatch_plan()
+
+    def _combine_dispatch_plan(self) -> None:
+        """
+        Combine own dispatch records with the records of inherited pattern managers,
+        and publish them as a new snapshot
+        """
+        self._snapshot = _DispatchSnapshot(
+            self._own_dispatch_records
+            + tuple(
+                record
+                for mgr in self._inherited
+                for record in mgr._own_dispatch_records
+            ),
+            version=self._snapshot.version + 1,
+        )
+
+    def _rebuild_dispatch_plan(self, rebuild_calls: bool = False) -> None:
+        """
+        Re-generate dispatch records from current handlers, and publish a new snapshot.
+
+        Should be called every time `handler_dict` is modified. Async callables of
+        existing handlers are reused unless `rebuild_calls` is `True`, which is
+        required after changing how handlers are wrapped, e.g.: enabling tracing.
+        """
+        # private attributes are slow to access on pydantic models, read it once
+        cached_records = dict() if rebuild_calls else self._built_records
+        built_records: dict[tuple[str, str], _DispatchRecord] = dict()
+        for handler_model in self.handlers():
+            handler_id = (handler_model.registrant, handler_model.identifier)
+            record = cached_records.get(handler_id, None)
+            # handler with the same ID may be replaced by another handler model
+            if record is None or record.handler is not handler_model:
+                async_handler = self._build_async_call(
+                    handler_model, handler_model.handler
+                )
+                record = _DispatchRecord(
+                    handler=handler_model,
+                    call=async_handler,
+                    inline_call=self._build_inline_call(
+                        handler_model, handler_model.handler
+                    ),
+                    batch_item=(
+                        (
+                            True,
+                            self._build_async_call(
+                                handler_model, handler_model.batch_handler, batch=True
+                            ),
+                        )
+                        if handler_model.accept_batch
+                        else (False, async_handler)
+                    ),
+                )
+            built_records[handler_id] = record
+        self._built_records = built_records
+
+        self._own_dispatch_records = tuple(built_records.values())
+        self._combine_dispatch_plan()
+
+    def _handler_instruments(
+        self, handler_model: EventHandler[EventDataType], func: Callable[..., Any]
+    ) -> tuple[HandlerStats | None, Tracer | None, dict[str, Any]]:
+        """Return stats record, enabled tracer and span attributes of a handler"""
+        record = (
+            self._stats.get(
+                handler_model.event_name,
+                handler_model.registrant,
+                handler_model.identifier,
+            )
+            if self._stats is not None
+            else None
+        )
+        tracer = (
+            self._tracer if self._tracer is not None and self._tracer.enabled else None
+        )
+
+        span_attributes: dict[str, Any] = dict()
+        if tracer is not None:
+            execution = handler_model.execution
+            if iscoroutinefunction(func) or execution == ExecutionPolicy.INLINE:
+                runs_on = "loop"
+            else:
+                runs_on = str(execution)
+            span_attributes = {
+                "event_name": handler_model.event_name,
+                "registrant": handler_model.registrant,
+                "identifier": handler_model.identifier,
+                "execution": runs_on,
+            }
+        return record, tracer, span_attributes
+
+    def _build_inline_call(
+        self, handler_model: EventHandler[EventDataType], func: Callable[..., Any]
+    ) -> Callable[..., Any] | None:
+        """
+        Instrument a sync handler method with `INLINE` execution policy, the result
+        is called directly in the event loop, or by `emit_sync()`.
+
+        Returns `None` for async methods, other execution policies, and handlers with
+        retry or isolation, which are run as tasks.
+        """
+        if (
+            handler_model.execution != ExecutionPolicy.INLINE
+            or iscoroutinefunction(func)
+            or handler_model.retry is not None
+            or handler_model.isolated
+        ):
+            return None
+
+        record, tracer, span_attributes = self._handler_instruments(handler_model, func)
+        if record is not None:
+            func = record.wrap_sync(func)
+        if tracer is not None:
+            func = tracer.wrap_sync(func, span_attributes)
+        return func
+
+    def _build_async_call(
+        self,
+        handler_model: EventHandler[EventDataType],
+        func: Callable[..., Any],
+        batch: bool = False,
+    ) -> Callable[..., Awaitable[Any]]:
+        """
+        Convert a handler method into a ready-to-run async callable, following the
+        execution policy of the handler, instrumented if stats or tracing is enabled.
+
+        Each retry of the handler has its own timeout, and isolation applies after
+        all retries failed.
+
+        Args:
+            batch: If `func` is the `batch_handler()` of the handler.
+        """
+        execution = handler_model.execution
+        pool = handler_model.executor_pool
+        asyncify = self._executors.asyncify
+        record, tracer, span_attributes = self._handler_instruments(handler_model, func)
+
+        is_async = iscoroutinefunction(func)
+        # process pool could not pickle the wrappers, instrument outside
+        if is_async or execution == ExecutionPolicy.PROCESS:
+            call = func if is_async else asyncify(func, execution, pool)
+            if record is not None:
+                call = record.wrap_async(call)
+            if tracer is not None:
+                call = tracer.wrap_async(call, span_attributes)
+        else:
+            # instrument inside, so time waiting for a worker thread counts as queued
+            if record is not None:
+                func = record.wrap_sync(func)
+            if tracer is not None:
+                func = tracer.wrap_sync(func, span_attributes)
+            call = asyncify(func, execution, pool)
+
+        timeout = (
+            handler_model.timeout
+            if handler_model.timeout is not None
+            else self._handler_timeout
+        )
+        retry = handler_model.retry
+        isolated = handler_model.isolated
+        if timeout is not None:
+            # timed out attempts raise, so they are retried or stored as dead letters
+            call = wrap_timeout(
+                call,
+                handler_model,
+                timeout,
+                record,
+                raise_timeout=retry is not None or isolated,
+            )
+        if retry is not None:
+            call = wrap_retry(call, retry)
+        if isolated:
+            call = wrap_isolated(call, handler_model, self._dead_letters, batch=batch)
+        elif timeout is not None and retry is not None:
+            call = wrap_report_timeout(call, handler_model)
+        return call
+
+    def _with_deadline(
+        self,
+        dispatch_plan: tuple[Callable[[Event[EventDataType]], Awaitable[Any]], ...],
+        records: tuple["_DispatchRecord", ...],
+        deadline: float,
+    ) -> tuple[Callable[[Event[EventDataType]], Awaitable[Any]], ...]:
+        """Bind a deadline of a single emit to all calls of a dispatch plan"""
+        stats = self._stats
+        return tuple(
+            partial(
+                run_before,
+                deadline,
+                async_handler,
+                record.handler,
+                (
+                    stats.get(
+                        record.handler.event_name,
+                        record.registrant,
+                        record.identifier,
+                    )
+                    if stats is not None
+                    else None
+                ),
+            )
+            for record, async_handler in zip(records, dispatch_plan)
+        )
+
+    async def emit(
+        self,
+        event: Event[EventDataType] | LightEvent[EventDataType],
+        timeout: float | None = None,
+    ) -> None:
         """
         Emit an event, execute all handlers managed by this _SingleEventMgr.
 
+        About Timeouts:
+            Handlers running longer than their own timeout, the default handler timeout
+            of this event, or `timeout` seconds of this call, are cancelled. Sync
+            handlers running in a worker thread or process are abandoned instead.
+            `HandlerTimeout` is raised after all other handlers finished.
+
         About Handlers:
             Handlers could be sync or async function.
-            Sync function handlers will first be converted into async function using `ensure_asyncify()`,
-            then all handlers will be gathered into a task group and executed.
+            Sync function handlers are converted into async function according to their
+            `execution` policy when they are added, then all handlers will be gathered into
+            a task group and executed.
+
+            About sync-to-async conversion, check out `HandlerExecutors.asyncify()`.
+
+        About Tracing:
+            If tracing is enabled, an `event.emit` span is recorded for each call.
+
+        About Light Events:
+            A `LightEvent` is converted to `Event` before dispatching, unless all
+            handlers accept light events.
+
+        About Filters:
+            Handlers whose `filters` don't match the event are skipped, without
+            starting a task for them.
 
-            About sync-to-async conversion, check out `ensure_asyncify()` function.
+        About Inline Handlers:
+            Sync handlers with `INLINE` execution policy are called directly, before
+            tasks of other handlers start. They never block so timeouts don't apply.
         """
+        # pin current snapshot, it may be replaced while handlers are running
+        snapshot = self._snapshot
+        inline_plan, dispatch_plan, task_records = snapshot.select(event)
+        if timeout is not None:
+            dispatch_plan = self._with_deadline(
+                dispatch_plan, task_records, current_time() + timeout
+            )
+        if snapshot.needs_event_model:
+            event = event.as_event()
+
+        tracer = self._tracer
+        if tracer is not None and tracer.enabled:
+            span = tracer.start_span(
+                "event.emit",
+                parent=current_span.get(),
+                attributes={
+                    "event_name": self.name,
+                    "sender": event.sender or "",
+                    "handler_count": len(inline_plan) + len(dispatch_plan),
+                },
+            )
+            span_token = current_span.set(span)
+            error: BaseException | None = None
+            try:
+                await self._run_dispatch_plan(dispatch_plan, event, inline_plan)
+            except BaseException as e:
+                error = e
+                raise
+            finally:
+                tracer.end_span(span, error)
+                current_span.reset(span_token)
+        else:
+            await self._run_dispatch_plan(dispatch_plan, event, inline_plan)
+
+    def emit_sync(
+        self, event: Event[EventDataType] | LightEvent[EventDataType]
+    ) -> None:
+        """
+        Emit an event without an event loop, only works if all handlers are sync
+        handlers with `INLINE` execution policy.
 
-        _logger.info(f"Emit event: {self.name!r}")
+        Handlers are called one by one in the current thread, an exception of a handler
+        stops the remaining handlers, and is raised in an `ExceptionGroup` like `emit()`.
 
-        async with create_task_group() as task_group:
-            for handler_model in self.handlers():
-                task_group.soonify(ensure_asyncify(handler_model.handler))(event=event)
-                _logger.debug(f"Handler added to task: {handler_model}")
+        Raises:
+            HandlerNotInline: Some handlers could not be run without an event loop,
+                no handler is called.
+        """
+        snapshot = self._snapshot
+        if snapshot.task_records:
+            raise event_errors.HandlerNotInline(
+                event_name=self.name,
+                handlers=[
+                    (record.registrant, record.identifier)
+                    for record in snapshot.task_records
+                ],
+            )
+        inline_plan, _, _ = snapshot.select(event)
+        if snapshot.needs_event_model:
+            event = event.as_event()
+
+        tracer = self._tracer
+        if tracer is None or not tracer.enabled:
+            _run_inline_plan(inline_plan, event)
+            return
+
+        span = tracer.start_span(
+            "event.emit",
+            parent=current_span.get(),
+            attributes={
+                "event_name": self.name,
+                "sender": event.sender or "",
+                "handler_count": len(inline_plan),
+            },
+        )
+        span_token = current_span.set(span)
+        error: BaseException | None = None
+        try:
+            _run_inline_plan(inline_plan, event)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            tracer.end_span(span, error)
+            current_span.reset(span_token)
+
+    @asynccontextmanager
+    async def collect(
+        self,
+        event: Event[EventDataType] | LightEvent[EventDataType],
+        first: int | None = None,
+        timeout: float | None = None,
+    ) -> AsyncIterator[AsyncIterator[tuple[EventHandler[EventDataType], Any]]]:
+        """
+        Emit an event and iterate `(handler, result)` pairs in completion order.
+
+        If a handler raised an `Exception`, the exception is used as the result.
+        Remaining handlers are cancelled once `first` results which are not exceptions
+        are received, the `timeout` seconds deadline is reached, or the context exits.
+        """
+        if first is not None and first < 1:
+            raise ValueError("first must be a positive integer")
+
+        snapshot = self._snapshot
+        if snapshot.filter_index is None:
+            records = snapshot.records
+        else:
+            records = tuple(snapshot.filter_index.select(event.sender, event.data))
+        handlers = tuple(record.handler for record in records)
+        dispatch_plan = tuple(record.call for record in records)
+        if snapshot.needs_event_model:
+            event = event.as_event()
+        deadline = inf if timeout is None else current_time() + timeout
+
+        send_stream, receive_stream = create_memory_object_stream[
+            tuple[EventHandler[EventDataType], Any]
+        ](max_buffer_size=len(dispatch_plan))
+
+        async def run(
+            handler_model: EventHandler[EventDataType],
+            async_handler: Callable[..., Awaitable[Any]],
+        ) -> None:
+            timed_out: list[EventHandler[Any]] = []
+            timed_out_handlers.set(timed_out)
+            try:
+                result = await async_handler(event)
+            except Exception as e:
+                result = e
+            if timed_out:
+                result = _handler_timeout_error(self.name, timed_out)
+            send_stream.send_nowait((handler_model, result))
+
+        async def results(
+            cancel_scope: CancelScope,
+        ) -> AsyncIterator[tuple[EventHandler[EventDataType], Any]]:
+            answered = 0
+            for _ in range(len(dispatch_plan)):
+                # do not yield inside the cancel scope
+                with CancelScope(deadline=deadline) as deadline_scope:
+                    item = await receive_stream.receive()
+                if deadline_scope.cancelled_caught:
+                    break
+
+                yield item
+                if not isinstance(item[1], Exception):
+                    answered += 1
+                    if first is not None and answered >= first:
+                        break
+            cancel_scope.cancel()
+
+        with send_stream, receive_stream:
+            async with create_task_group() as task_group:
+                token = dispatch_started_at.set(perf_counter())
+                try:
+                    for handler_model, async_handler in zip(handlers, dispatch_plan):
+                        task_group.start_soon(run, handler_model, async_handler)
+                finally:
+                    dispatch_started_at.reset(token)
+
+                try:
+                    yield results(task_group.cancel_scope)
+                finally:
+                    task_group.cancel_scope.cancel()
+
+    async def _run_dispatch_plan(
+        self,
+        dispatch_plan: tuple[Callable[..., Awaitable[Any]], ...],
+        event: Event[EventDataType] | LightEvent[EventDataType],
+        inline_plan: tuple[Callable[..., Any], ...] = (),
+    ) -> None:
+        """
+        Run all callables of the dispatch plan in a task group, and the sync functions
+        of `inline_plan` directly.
+
+        The task group is skipped if `dispatch_plan` is empty.
+
+        Raises:
+            HandlerTimeout: Some handlers ran past their deadline.
+        """
+        if not dispatch_plan:
+            _run_inline_plan(inline_plan, event)
+            return
+
+        timed_out: list[EventHandler[Any]] = []
+        token = dispatch_started_at.set(perf_counter())
+        timed_out_token = timed_out_handlers.set(timed_out)
+        try:
+            async with create_task_group() as task_group:
+                for async_handler in dispatch_plan:
+                    task_group.start_soon(async_handler, event)
+                # errors raised here cancel the tasks, same as a failing task
+                for inline_handler in inline_plan:
+                    inline_handler(event)
+        finally:
+            dispatch_started_at.reset(token)
+            timed_out_handlers.reset(timed_out_token)
+
+        if timed_out:
+            raise _handler_timeout_error(self.name, timed_out)
+
+    def schedule_batch(
+        self, task_group: TaskGroup, events: list[Event[EventDataType]]
+    ) -> None:
+        """
+        Schedule all handlers of this event for a batch of events into `task_group`.
+
+        Handlers with `accept_batch` receive the whole `events` list in one call,
+        other handlers are called once for each event.
+
+        Handlers with `filters` only receive the events matching their filters,
+        batch handlers are not called if no event matches.
+
+        This method only start tasks, it's the caller's responsibility to wait for
+        the `task_group` to finish.
+        """
+        snapshot = self._snapshot
+        filter_index = snapshot.filter_index
+        if filter_index is None:
+            for accept_batch, async_handler in snapshot.batch_dispatch_plan:
+                if accept_batch:
+                    task_group.start_soon(async_handler, events)
+                else:
+                    for event in events:
+                        task_group.start_soon(async_handler, event)
+            return
 
-        _logger.info(f"Event emit finished: {self.name!r}")
+        batches: dict[Callable[..., Awaitable[Any]], list[Event[EventDataType]]] = (
+            dict()
+        )
+        for event in events:
+            for record in filter_index.select(event.sender, event.data):
+                accept_batch, async_handler = record.batch_item
+                if accept_batch:
+                    batches.setdefault(async_handler, []).append(event)
+                else:
+                    task_group.start_soon(async_handler, event)
+        for async_handler, batch in batches.items():
+            task_group.start_soon(async_handler, batch)
+
+    def find_record(self, registrant: str, identifier: str) -> "_DispatchRecord | None":
+        """
+        Return the dispatch record of a handler in the dispatch plan, including
+        handlers inherited from pattern managers
+        """
+        for record in self._snapshot.records:
+            if record.registrant == registrant and record.identifier == identifier:
+                return record
+        return None
 
     def remove(
         self,
         registrant: RRSSEntityIdField,
         identifier: RRSSEntityIdField | None,
-    ) -> EventHandler[EventDataType]:
+    ) -> EventHandler[EventDataType] | None:
         """
         Remove an existing handler by registrant and identifier
 
@@ -122,34 +769,211 @@ class _SingleEventMgr[EventDataType](BaseModel):
                 Registrant ID
             identifier:
                 Identifier ID, if `None`, will try to remove all handlers registered by the `registrant`
+
+        Returns:
+            The removed handler, or `None` if all handlers of `registrant` are removed.
         """
         # registrant not exists
         try:
-            handler_list_of_registrant = self.handler_dict[registrant]
+            handlers_of_registrant = self.handler_dict[registrant]
         except KeyError as e:
             raise event_errors.HandlerNotFound(
                 registrant=registrant, identifier=identifier
             )
 
+        # copy-on-write, check out `handler_dict`
+        handler_dict = RRSSEntityIdKeyDict(self.handler_dict)
+
         # remove all
         if identifier is None:
-            handler_list_of_registrant.clear()
+            del handler_dict[registrant]
+            self.handler_dict = handler_dict
+            self._rebuild_dispatch_plan()
+            return None
 
         # remove based on identifier
-        for i in range(len(handler_list_of_registrant)):
-            cur_handler = handler_list_of_registrant[i]
+        if identifier not in handlers_of_registrant:
+            raise event_errors.HandlerNotFound(
+                registrant=registrant, identifier=identifier
+            )
+        handlers_of_registrant = dict(handlers_of_registrant)
+        ret = handlers_of_registrant.pop(identifier)
+
+        # if no handler of this registrant, remove key
+        if len(handlers_of_registrant) == 0:
+            del handler_dict[registrant]
+        else:
+            handler_dict[registrant] = handlers_of_registrant
+
+        self.handler_dict = handler_dict
+        self._rebuild_dispatch_plan()
+        return ret
+
+
+class _DispatchSnapshot:
+    """
+    Immutable version of the dispatch plans of a `_SingleEventMgr`.
+
+    All fields are derived from `records` when created and never modified, so a
+    snapshot could be shared by any number of emits, on any thread, without locking.
+    """
+
+    __slots__ = (
+        "version",
+        "records",
+        "dispatch_plan",
+        "batch_dispatch_plan",
+        "inline_plan",
+        "task_records",
+        "task_plan",
+        "filter_index",
+        "needs_event_model",
+    )
+
+    def __init__(self, records: tuple["_DispatchRecord", ...], version: int = 0):
+        self.version: int = version
+        """Increased by one each time the plans of the manager change"""
+        self.records: tuple[_DispatchRecord, ...] = records
+        """Dispatch records of all handlers, in dispatching order"""
+        self.dispatch_plan: tuple[Callable[..., Awaitable[Any]], ...] = tuple(
+            record.call for record in records
+        )
+        """Ready-to-run async callables, one for each record"""
+        self.batch_dispatch_plan: tuple[
+            tuple[bool, Callable[..., Awaitable[Any]]], ...
+        ] = tuple(record.batch_item for record in records)
+        """
+        Same as `dispatch_plan` but used by batched emit.
+
+        Each item is a `(accept_batch, async_callable)` pair, when `accept_batch` is
+        `True`, the callable is the asyncified `batch_handler()` of the handler.
+        """
+        inline_plan, task_plan, task_records = _split_records(records)
+        self.inline_plan: tuple[Callable[..., Any], ...] = inline_plan
+        self.task_plan: tuple[Callable[..., Awaitable[Any]], ...] = task_plan
+        self.task_records: tuple[_DispatchRecord, ...] = task_records
+        """
+        `inline_plan` holds instrumented sync functions of the `INLINE` sync handlers,
+        called directly by `emit()` without starting a task. Other handlers are in
+        `task_plan` and run in a task group.
+        """
+        self.filter_index: HandlerFilterIndex[_DispatchRecord] | None = (
+            HandlerFilterIndex([(record.filters, record) for record in records])
+            if any(record.filters is not None for record in records)
+            else None
+        )
+        """
+        Index of the records by handler filters, `None` if no handler has filters,
+        in which case the whole plans are used
+        """
+        self.needs_event_model: bool = not all(
+            record.accept_light_event for record in records
+        )
+        """If any handler doesn't accept `LightEvent`"""
+
+    def select(self, event: Any) -> tuple[
+        tuple[Callable[..., Any], ...],
+        tuple[Callable[..., Awaitable[Any]], ...],
+        tuple["_DispatchRecord", ...],
+    ]:
+        """
+        Return `(inline_plan, task_plan, task_records)` of the handlers whose filters
+        match `event`
+        """
+        filter_index = self.filter_index
+        if filter_index is None:
+            return self.inline_plan, self.task_plan, self.task_records
+        return _split_records(filter_index.select(event.sender, event.data))
+
 
-            # found handler to be removed
-            if cur_handler.identifier == identifier:
-                ret = handler_list_of_registrant.pop(i)
+def _split_records(
+    records: Sequence["_DispatchRecord"],
+) -> tuple[
+    tuple[Callable[..., Any], ...],
+    tuple[Callable[..., Awaitable[Any]], ...],
+    tuple["_DispatchRecord", ...],
+]:
+    """Split dispatch records into `(inline_plan, task_plan, task_records)`"""
+    inline_plan = tuple(
+        record.inline_call for record in records if record.inline_call is not None
+    )
+    task_records = tuple(record for record in records if record.inline_call is None)
+    return inline_plan, tuple(record.call for record in task_records), task_records
+
+
+def _run_inline_plan(inline_plan: tuple[Callable[..., Any], ...], event: Any) -> None:
+    """
+    Call sync functions of an inline plan one by one, exceptions are raised in an
+    `ExceptionGroup`, same as handlers run in a task group.
+    """
+    if not inline_plan:
+        return
+
+    token = dispatch_started_at.set(perf_counter())
+    try:
+        for inline_handler in inline_plan:
+            inline_handler(event)
+    except Exception as e:
+        raise ExceptionGroup("unhandled errors in inline event handlers", [e])
+    finally:
+        dispatch_started_at.reset(token)
 
-                # if no handler of this registrant, remove key
-                if len(handler_list_of_registrant) == 0:
-                    del self.handler_dict[registrant]
 
-                return ret
+def _handler_timeout_error(
+    event_name: str, timed_out: list[EventHandler[Any]]
+) -> event_errors.HandlerTimeout:
+    return event_errors.HandlerTimeout(
+        event_name=event_name,
+        handlers=[(h.registrant, h.identifier) for h in timed_out],
+    )
 
-        raise event_errors.HandlerNotFound(registrant=registrant, identifier=identifier)
+
+class _DispatchRecord:
+    """
+    Compact record of a handler built at registration, holding everything dispatching
+    needs, so the handler model is not touched when emitting.
+    """
+
+    __slots__ = (
+        "handler",
+        "registrant",
+        "identifier",
+        "accept_light_event",
+        "filters",
+        "call",
+        "inline_call",
+        "batch_item",
+    )
+
+    def __init__(
+        self,
+        handler: EventHandler[Any],
+        call: Callable[..., Awaitable[Any]],
+        batch_item: tuple[bool, Callable[..., Awaitable[Any]]],
+        inline_call: Callable[..., Any] | None = None,
+    ):
+        self.handler = handler
+        """The validated handler model"""
+        self.registrant: str = handler.registrant
+        self.identifier: str = handler.identifier
+        self.accept_light_event: bool = handler.accept_light_event
+        self.filters: EventFilter | None = handler.filters
+        self.call = call
+        """Ready-to-run async callable of `handler()`"""
+        self.inline_call = inline_call
+        """
+        Instrumented `handler()` if it could be called directly, check out
+        `_DispatchSnapshot.inline_plan`
+        """
+        self.batch_item = batch_item
+        """Item of the batch dispatch plan, check out `_DispatchSnapshot`"""
+
+
+_EMPTY_SNAPSHOT: _DispatchSnapshot = _DispatchSnapshot(())
+"""Snapshot of managers with no handlers"""
+
+_EventBatchAdapter = TypeAdapter(list[AnyEvent])
+"""Type adapter used to validate a batch of events in a single call"""
 
 
 class EventManager:
@@ -161,11 +985,101 @@ class EventManager:
     Value is the corresponding single event manager.
     """
 
-    def __init__(self):
+    pattern_mgr_dict: dict[str, _SingleEventMgr[Any]]
+    """
+    Store _SingleEventMgr instances holding handlers subscribed with wildcard patterns.
+
+    Key is the pattern, e.g.: `rrss.feed.*`.
+    """
+
+    registrant_index: dict[str, set[str]]
+    """
+    Index from registrant to the event names and patterns it has handlers on, used to
+    unload a registrant without scanning all events.
+    """
+
+    executors: HandlerExecutors
+    """Executor pools used to run sync handlers of all events in this manager"""
+
+    queues: dict[str, EventQueue]
+    """
+    Event queues used by `publish()`, key is the name of the queue.
+
+    A `default` queue always exists, and is used by events with no dedicated queue.
+    """
+
+    handler_stats: EventStatsRegistry | None
+    """Per-handler call count, error count and latency, `None` if disabled"""
+
+    tracer: Tracer
+    """Tracer of emits and handler calls, disabled by default"""
+
+    transport: UnixSocketTransport | None
+    """
+    Transport used to forward broadcast events to other processes, set by
+    `UnixSocketTransport.connect()`
+    """
+
+    outbox: SQLiteOutbox | None
+    """Outbox storing durable events until handled, set by `attach_outbox()`"""
+
+    dead_letters: DeadLetterQueue
+    """
+    Failed calls of isolated handlers, check out `redrive_dead_letters()` and
+    `EventHandler.isolated`
+    """
+
+    def __init__(
+        self,
+        enable_stats: bool = True,
+        slow_handler_threshold: float | None = None,
+        dead_letter_size: int = 1024,
+    ):
+        """
+        Args:
+            enable_stats:
+                Instrument all handlers to collect statistics, check out `stats()`.
+            slow_handler_threshold:
+                Log a warning when a handler runs longer than this many seconds,
+                only works when `enable_stats` is `True`.
+            dead_letter_size:
+                Max number of dead letters kept, the oldest are dropped when full.
+        """
         self.event_handler_mgr_dict = RRSSEntityIdKeyDict()
+        self.pattern_mgr_dict = dict()
+        self._pattern_trie = EventPatternTrie()
+        self.registrant_index = dict()
+        self.executors = HandlerExecutors()
+        self.handler_stats = (
+            EventStatsRegistry(slow_threshold=slow_handler_threshold)
+            if enable_stats
+            else None
+        )
+        self.tracer = Tracer()
+        self.queues = {DEFAULT_QUEUE_NAME: EventQueue(DEFAULT_QUEUE_NAME)}
+        self._event_queue_dict: dict[str, str] = dict()
+        self._coalescer_dict: dict[str, EventCoalescer] = dict()
+        self._broadcast_events: set[str] = set()
+        self.transport = None
+        self._durable_events: set[str] = set()
+        self.outbox = None
+        self.dead_letters = DeadLetterQueue(max_size=dead_letter_size)
+        self._registry_lock = RLock()
+        """
+        Serialize adding and removing events and handlers, which could happen on any
+        thread. Emits never take this lock, they pin immutable snapshots instead,
+        check out `_SingleEventMgr._snapshot`.
+        """
+        self._in_flight = 0
+        """Number of emits running, check out `retire()`"""
+        self._in_flight_lock = Lock()
+        self._retiring = False
+        self._retired = False
+        self._retire_thread: Thread | None = None
+        """Thread flushing traces and shutting down this manager once retired"""
 
     @validate_call
-    async def emit(self, event: Event[Any]):
+    async def emit(self, event: AnyEvent, timeout: PositiveFloat | None = None):
         """
         Emit an event which is managed by this EventManager.
 
@@ -176,25 +1090,777 @@ class EventManager:
                 2. Be passed to handlers as the only parameter.
 
                 This event object will be validated using Pydantic.
+            timeout:
+                Seconds before handlers still running are cancelled, or abandoned
+                for sync handlers running in a worker thread or process. Handlers
+                could also have timeouts of their own, or a default timeout set
+                by `add_event()`. Not applied to coalesced events.
 
         Raises:
             EventNotRegistered: Could not found corresponding event name.
+            HandlerTimeout: Some handlers ran past their deadline, raised after
+                all other handlers finished.
             ValidationError: Event validation failed.
         """
+        await self.emit_trusted(event, timeout=timeout)
+
+    async def emit_trusted(
+        self, event: Event[Any] | LightEvent[Any], timeout: float | None = None
+    ) -> None:
+        """
+        Same as `emit()`, but the event will NOT be validated.
+
+        This is the fast path for events built by RRSS internal code, e.g.: using
+        `Event.trusted()` or an `Event` constructor with validated fields. Skipping
+        validation saves the regex checks of `sender` and `event_name` for every emit.
+
+        Events from plugins or any other third-party input should always use `emit()`.
+
+        Raises:
+            EventNotRegistered: Could not found corresponding event name.
+            HandlerTimeout: Some handlers ran past their deadline.
+        """
         single_event_mgr = self._try_get_single_mgr(event_name=event.event_name)
-        await single_event_mgr.emit(event)
+
+        self._begin_emit()
+        try:
+            if (
+                self.transport is not None
+                and event.event_name in self._broadcast_events
+            ):
+                self.transport.send(event.as_event())
+
+            if self.outbox is not None and event.event_name in self._durable_events:
+                row_id = await self.outbox.append(event.as_event())
+                await self._emit_local(single_event_mgr, event, timeout)
+                # not reached if any handler failed, so the event will be replayed
+                await self.outbox.mark_done(row_id)
+            else:
+                await self._emit_local(single_event_mgr, event, timeout)
+        finally:
+            self._end_emit()
+
+    async def emit_light(
+        self,
+        event_name: str,
+        data: Any,
+        sender: str | None = None,
+        timeout: float | None = None,
+    ) -> None:
+        """
+        Same as `emit_trusted()`, but build a compact `LightEvent` instead of an `Event`.
+
+        This is the cheapest way for RRSS internal code to emit high volume events.
+        The `Event` model is only built if some handler doesn't set `accept_light_event`,
+        or the event is broadcast, durable or coalesced.
+
+        Check out `emit_trusted()` about when it's safe to skip validation.
+
+        Raises:
+            EventNotRegistered: Could not found corresponding event name.
+            HandlerTimeout: Some handlers ran past their deadline.
+        """
+        await self.emit_trusted(
+            LightEvent(event_name=event_name, data=data, sender=sender),
+            timeout=timeout,
+        )
 
     @validate_call
-    def add_event(self, event_name: RRSSEntityIdField):
+    def emit_sync(self, event: AnyEvent) -> None:
+        """
+        Emit an event from sync code, without an event loop.
+
+        All handlers of the event must be sync handlers with `INLINE` execution policy,
+        they are called one by one in the current thread. This is the cheapest way to
+        emit to trivial handlers, e.g.: counters, from code outside the event loop.
+
+        The event is only dispatched to handlers in this process, coalescing, outbox
+        and broadcast are not applied.
+
+        Raises:
+            EventNotRegistered: Could not found corresponding event name.
+            HandlerNotInline: Some handlers could not run without an event loop,
+                no handler is called.
+            ValidationError: Event validation failed.
+        """
+        single_event_mgr = self._try_get_single_mgr(event_name=event.event_name)
+        self._begin_emit()
+        try:
+            single_event_mgr.emit_sync(event)
+        finally:
+            self._end_emit()
+
+    @validate_call
+    @asynccontextmanager
+    async def emit_collect(
+        self,
+        event: AnyEvent,
+        first: int | None = None,
+        timeout: float | None = None,
+    ) -> AsyncIterator[AsyncIterator[tuple[EventHandler[Any], Any]]]:
+        """
+        Emit an event and collect return values of the handlers as they complete.
+
+        Yield an async iterator of `(handler, result)` pairs in completion order, if
+        a handler raised an `Exception`, the exception is used as the result. Once
+        enough results are received, the remaining handlers are cancelled.
+
+        The event is only dispatched to handlers in this process, coalescing, outbox
+        and broadcast are not applied.
+
+        Args:
+            first:
+                Stop after this many results which are not exceptions. If `None`,
+                wait for all handlers.
+            timeout:
+                Seconds before the remaining handlers are cancelled and the iteration
+                stops. If `None`, no deadline.
+
+        Raises:
+            EventNotRegistered: Could not found corresponding event name.
+            ValidationError: Event validation failed.
+
+        Example:
+
+            async with mgr.emit_collect(event, first=1, timeout=2) as results:
+                async for handler, summary in results:
+                    ...
+        """
+        single_event_mgr = self._try_get_single_mgr(event_name=event.event_name)
+        self._begin_emit()
+        try:
+            async with single_event_mgr.collect(
+                event, first=first, timeout=timeout
+            ) as results:
+                yield results
+        finally:
+            self._end_emit()
+
+    async def emit_remote(self, events: list[Event[Any]]) -> None:
+        """
+        Dispatch events received from other processes to local handlers.
+
+        Events not registered in this manager are ignored, and events are never
+        forwarded again. Errors of handlers are logged instead of raised.
+        """
+
+        async def emit_logged(
+            single_event_mgr: _SingleEventMgr[Any], event: Event[Any]
+        ):
+            try:
+                await self._emit_local(single_event_mgr, event)
+            except Exception:
+                _logger.exception(
+                    f"Error occurred when handling remote event {event.event_name!r}"
+                )
+
+        self._begin_emit()
+        try:
+            async with create_task_group() as task_group:
+                for event in events:
+                    single_event_mgr = self.event_handler_mgr_dict.get(event.event_name)
+                    if single_event_mgr is not None:
+                        task_group.start_soon(emit_logged, single_event_mgr, event)
+        finally:
+            self._end_emit()
+
+    async def redrive_dead_letters(
+        self, letters: Iterable[DeadLetter] | None = None
+    ) -> list[DeadLetter]:
+        """
+        Call the failed handlers of dead letters again, only with the events they
+        failed, other handlers of the events are not called.
+
+        Letters are removed from `dead_letters` first. Letters failing again are put
+        back with the new error and increased `attempts`, retries of the handler's
+        `RetryPolicy` are applied as usual.
+
+        Args:
+            letters:
+                Letters to re-drive, e.g.: from `dead_letters.take()`. If `None`, all
+                letters in `dead_letters` are re-driven.
+
+        Returns:
+            Letters not handled: failed again, or whose handler is no longer added.
+        """
+        if letters is None:
+            letters = self.dead_letters.take()
+        else:
+            letters = list(letters)
+            for letter in letters:
+                self.dead_letters.remove(letter)
+
+        failed: list[DeadLetter] = []
+
+        async def redrive(letter: DeadLetter) -> None:
+            single_event_mgr = self.event_handler_mgr_dict.get(letter.event_name)
+            record = (
+                single_event_mgr.find_record(letter.registrant, letter.identifier)
+                if single_event_mgr is not None
+                else None
+            )
+            if record is None:
+                _logger.warning(
+                    f"Handler of dead letter not found, skipped: "
+                    f"registrant={letter.registrant!r}, "
+                    f"identifier={letter.identifier!r}"
+                )
+                failed.append(letter)
+                return
+
+            accept_batch, batch_call = record.batch_item
+            call = batch_call if letter.batch and accept_batch else record.call
+            timed_out: list[EventHandler[Any]] = []
+            redriving.set(True)
+            timed_out_handlers.set(timed_out)
+            try:
+                if letter.batch and not accept_batch:
+                    # the handler no longer accepts batches
+                    for event in letter.payload:
+                        await call(event)
+                else:
+                    await call(letter.payload)
+                if timed_out:
+                    raise _handler_timeout_error(letter.event_name, timed_out)
+            except Exception as e:
+                retry_policy = record.handler.retry
+                new_letter = letter.model_copy(
+                    update={
+                        "error": e,
+                        "attempts": letter.attempts
+                        + (retry_policy.attempts if retry_policy is not None else 1),
+                        "failed_at": datetime.now(timezone.utc),
+                    }
+                )
+                self.dead_letters.append(new_letter)
+                failed.append(new_letter)
+
+        # each task has its own context, so context variables are not leaked
+        self._begin_emit()
+        try:
+            async with create_task_group() as task_group:
+                for letter in letters:
+                    task_group.start_soon(redrive, letter)
+        finally:
+            self._end_emit()
+        return failed
+
+    async def _emit_local(
+        self,
+        single_event_mgr: _SingleEventMgr[Any],
+        event: Event[Any] | LightEvent[Any],
+        timeout: float | None = None,
+    ) -> None:
+        """Emit to handlers in this process, coalesce the event if required"""
+        coalescer = self._coalescer_dict.get(event.event_name, None)
+        if coalescer is not None:
+            await coalescer.submit(event.as_event())
+        else:
+            await single_event_mgr.emit(event, timeout=timeout)
+
+    @validate_call
+    async def publish(self, event: AnyEvent) -> None:
+        """
+        Put an event into its queue and return without waiting for the handlers.
+
+        Events in queues are emitted by dispatcher tasks started by `dispatching()`.
+        If the queue is full, the overflow policy of the queue is followed.
+
+        Raises:
+            EventNotRegistered: Could not found corresponding event name.
+            EventQueueFull: Queue is full and its overflow policy is `FAIL`.
+            ValidationError: Event validation failed.
+        """
+        await self.publish_trusted(event)
+
+    async def publish_trusted(self, event: Event[Any]) -> None:
+        """
+        Same as `publish()`, but the event will NOT be validated.
+
+        Check out `emit_trusted()` about when it's safe to skip validation.
+
+        Raises:
+            EventNotRegistered: Could not found corresponding event name.
+            EventQueueFull: Queue is full and its overflow policy is `FAIL`.
+        """
+        self._try_get_single_mgr(event_name=event.event_name)
+        queue_name = self._event_queue_dict.get(event.event_name, DEFAULT_QUEUE_NAME)
+        await self.queues[queue_name].put(event)
+
+    @asynccontextmanager
+    async def dispatching(self, drain: bool = True) -> AsyncIterator[None]:
+        """
+        Async context manager that runs dispatcher tasks of all queues.
+
+        Queues should be added before entering this context.
+
+        Args:
+            drain:
+                If `True`, wait until all published events are handled when
+                exiting normally, otherwise pending events are left in the queues.
+
+        Example:
+
+            async with mgr.dispatching():
+                await mgr.publish(event)
+        """
+        async with create_task_group() as task_group:
+            for queue in self.queues.values():
+                for _ in range(queue.workers):
+                    task_group.start_soon(self._dispatch_worker, queue, task_group)
+
+            yield
+
+            if drain:
+                for queue in self.queues.values():
+                    await queue.join()
+            task_group.cancel_scope.cancel()
+
+    async def _dispatch_worker(self, queue: EventQueue, task_group: TaskGroup) -> None:
+        """
+        Keep taking events from `queue` and emit them
+
+        Coalesced events are handed over to a new task of `task_group`, so the worker
+        won't be blocked by debounce windows.
+        """
+        while True:
+            event = await queue.get()
+            if event.event_name in self._coalescer_dict:
+                task_group.start_soon(self._dispatch_queued, queue, event)
+            else:
+                await self._dispatch_queued(queue, event)
+
+    async def _dispatch_queued(self, queue: EventQueue, event: Event[Any]) -> None:
+        """Emit an event taken from `queue` and mark it done"""
+        try:
+            await self.emit_trusted(event)
+        except Exception:
+            _logger.exception(
+                f"Error occurred when dispatching event from queue {queue.name!r}"
+            )
+        finally:
+            await queue.task_done()
+
+    async def emit_many(self, events: Iterable[Event[Any]]) -> None:
+        """
+        Emit a batch of events which are managed by this EventManager.
+
+        Events are grouped by `event_name`, the whole batch is validated once and the
+        handlers of all events are executed in a single task group.
+
+        Handlers with `accept_batch` set will receive all events of their event name in
+        one `batch_handler()` call, other handlers are called once for each event.
+
+        Raises:
+            EventNotRegistered: Could not found corresponding event name of any event,
+                in this case no handler will be executed.
+            HandlerTimeout: Some handlers ran past their deadline.
+            ValidationError: Event validation failed.
+        """
+        event_list = _EventBatchAdapter.validate_python(events)
+        if not event_list:
+            return
+        self._begin_emit()
+        try:
+            await self._emit_many(event_list)
+        finally:
+            self._end_emit()
+
+    async def _emit_many(self, event_list: list[Event[Any]]) -> None:
+
+        # group by event name, and make sure all events exist before dispatching
+        grouped_events: dict[str, list[Event[Any]]] = dict()
+        for event in event_list:
+            grouped_events.setdefault(event.event_name, []).append(event)
+        batches = [
+            (self._try_get_single_mgr(event_name=event_name), event_group)
+            for event_name, event_group in grouped_events.items()
+        ]
+
+        if self.transport is not None:
+            for event in event_list:
+                if event.event_name in self._broadcast_events:
+                    self.transport.send(event)
+
+        outbox_row_ids: list[int] = []
+        if self.outbox is not None and self._durable_events:
+            durable_events = [
+                event
+                for event in event_list
+                if event.event_name in self._durable_events
+            ]
+            if durable_events:
+                outbox_row_ids = await self.outbox.append_many(durable_events)
+
+        # coalesce within the batch, no debounce window waiting
+        for i, (single_event_mgr, event_group) in enumerate(batches):
+            coalescer = self._coalescer_dict.get(single_event_mgr.name, None)
+            if coalescer is not None:
+                batches[i] = (single_event_mgr, coalescer.policy.collapse(event_group))
+
+        tracer = self.tracer
+        span = None
+        if tracer.enabled:
+            span = tracer.start_span(
+                "event.emit_many",
+                parent=current_span.get(),
+                attributes={
+                    "event_count": len(event_list),
+                    "event_names": ",".join(grouped_events),
+                },
+            )
+            span_token = current_span.set(span)
+
+        error: BaseException | None = None
+        timed_out: list[EventHandler[Any]] = []
+        token = dispatch_started_at.set(perf_counter())
+        timed_out_token = timed_out_handlers.set(timed_out)
+        try:
+            async with create_task_group() as task_group:
+                for single_event_mgr, event_group in batches:
+                    single_event_mgr.schedule_batch(task_group, event_group)
+            if timed_out:
+                raise _handler_timeout_error(
+                    ",".join(sorted({h.event_name for h in timed_out})), timed_out
+                )
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            dispatch_started_at.reset(token)
+            timed_out_handlers.reset(timed_out_token)
+            if span is not None:
+                tracer.end_span(span, error)
+                current_span.reset(span_token)
+
+        if outbox_row_ids and self.outbox is not None:
+            await self.outbox.mark_done(*outbox_row_ids)
+
+    async def emit_stream(
+        self, events: AsyncIterable[Event[Any]], batch_size: int = 100
+    ) -> None:
+        """
+        Async iterable variant of `emit_many()`.
+
+        Events are consumed from `events` and emitted in batches of at most `batch_size`
+        events, a batch is fully handled before the next one is collected.
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be a positive integer")
+
+        batch: list[Event[Any]] = []
+        async for event in events:
+            batch.append(event)
+            if len(batch) >= batch_size:
+                await self.emit_many(batch)
+                batch = []
+
+        if batch:
+            await self.emit_many(batch)
+
+    @validate_call
+    def add_event(
+        self,
+        event_name: RRSSEntityIdField,
+        queue: SnakeCaseField | None = None,
+        coalesce: CoalescePolicy | None = None,
+        scope: EventScope | None = None,
+        durable: bool | None = None,
+        timeout: PositiveFloat | None = None,
+    ):
         """
         Add a new event to this manager.
 
         Handlers could only be added to an event after this event been added using this method.
 
+        Args:
+            queue:
+                Name of the queue used when this event is published, should be added
+                with `add_queue()` first. If `None`, the `default` queue is used.
+            coalesce:
+                Coalescing policy of this event. If set, events are debounced and merged
+                before reaching the handlers, check out `CoalescePolicy` for more info.
+
+                With coalescing, `emit()` returns after the merged event is handled,
+                and `emit_many()` coalesces events within the batch without waiting.
+                Only concurrent emits are merged, each of sequentially awaited
+                `emit()` calls waits a full window, use `publish()` or `emit_many()`
+                for bulk updates.
+            scope:
+                Set to `BROADCAST` to forward this event to other processes through
+                the attached transport, check out `UnixSocketTransport`.
+                If `None`, keep current scope, which defaults to `LOCAL`.
+            durable:
+                Set to `True` to store this event in the attached outbox until all
+                handlers finished, so it could be replayed after a crash, check out
+                `attach_outbox()`. If `None`, keep current setting, which defaults
+                to `False`.
+            timeout:
+                Default timeout in seconds of handlers of this event with no `timeout`
+                of their own. Handlers subscribed with wildcard patterns are not
+                affected. If `None`, keep current timeout, which defaults to no limit.
+
         Raises:
             ValidationError
+            EventQueueNotFound
+            OutboxNotAttached: `durable` is `True` but no outbox is attached.
         """
-        self.event_handler_mgr_dict.setdefault(event_name, _SingleEventMgr(event_name))
+        if durable and self.outbox is None:
+            raise event_errors.OutboxNotAttached(event_name=event_name)
+
+        with self._registry_lock:
+            if queue is not None:
+                if queue not in self.queues:
+                    raise event_errors.EventQueueNotFound(queue=queue)
+                self._event_queue_dict[event_name] = queue
+
+            if event_name not in self.event_handler_mgr_dict:
+                single_event_mgr = self._new_single_mgr(event_name)
+                single_event_mgr.set_inherited(self._match_pattern_mgrs(event_name))
+                self.event_handler_mgr_dict[event_name] = single_event_mgr
+
+            if scope == EventScope.BROADCAST:
+                self._broadcast_events.add(event_name)
+            elif scope == EventScope.LOCAL:
+                self._broadcast_events.discard(event_name)
+
+            if timeout is not None:
+                self.event_handler_mgr_dict[event_name].set_handler_timeout(timeout)
+
+            if durable is True:
+                self._durable_events.add(event_name)
+            elif durable is False:
+                self._durable_events.discard(event_name)
+
+            if coalesce is not None:
+                self._coalescer_dict[event_name] = EventCoalescer(
+                    event_name=event_name,
+                    policy=coalesce,
+                    dispatch=self.event_handler_mgr_dict[event_name].emit,
+                )
+
+    def coalesce_stats(self) -> list[CoalesceStats]:
+        """
+        Return received and dispatched event counts of all coalesced events
+        """
+        return [coalescer.stats() for coalescer in self._coalescer_dict.values()]
+
+    @validate_call
+    def add_queue(
+        self,
+        name: SnakeCaseField,
+        max_size: int = 1024,
+        overflow: OverflowPolicy = OverflowPolicy.BLOCK,
+        workers: int = 1,
+    ) -> None:
+        """
+        Add a new event queue for `publish()`, replace the existing one with the same name.
+
+        Use this with `default` name to re-configure the default queue.
+        Only queues added before entering `dispatching()` have dispatcher tasks.
+
+        Args:
+            max_size: Max number of pending events in this queue.
+            overflow: What to do when publishing to a full queue.
+            workers: Number of dispatcher tasks draining this queue.
+        """
+        self.queues[name] = EventQueue(
+            name=name, max_size=max_size, overflow=overflow, workers=workers
+        )
+
+    def attach_outbox(self, outbox: SQLiteOutbox) -> None:
+        """
+        Attach a durable outbox used by events added with `durable=True`.
+
+        Durable events are written to the outbox before dispatching, and removed after
+        all handlers finished without error. Events published to a queue become durable
+        when taken from the queue. Call `replay_outbox()` on startup to re-emit events
+        left by the previous run.
+
+        Example:
+
+            mgr.attach_outbox(SQLiteOutbox("event_outbox.sqlite3"))
+            mgr.add_event("rrss.feed.updated", durable=True)
+        """
+        self.outbox = outbox
+
+    async def replay_outbox(self) -> int:
+        """
+        Re-emit all events left in the attached outbox, return number of events replayed
+        successfully.
+
+        Should be called after all events and handlers are added. Events which are not
+        registered, or with failed handlers, are kept in the outbox. Since handlers
+        may have run before a crash, handlers of durable events should be idempotent.
+        """
+        if self.outbox is None:
+            return 0
+
+        done_ids: list[int] = []
+        for row_id, event in await to_thread.run_sync(self.outbox.pending):
+            single_event_mgr = self.event_handler_mgr_dict.get(event.event_name)
+            if single_event_mgr is None:
+                _logger.warning(
+                    f"Skip replaying unregistered event {event.event_name!r}"
+                )
+                continue
+            try:
+                await self._emit_local(single_event_mgr, event)
+            except Exception:
+                _logger.exception(
+                    f"Error occurred when replaying event {event.event_name!r}"
+                )
+            else:
+                done_ids.append(row_id)
+
+        if done_ids:
+            await self.outbox.mark_done(*done_ids)
+        return len(done_ids)
+
+    def queue_stats(self) -> list[QueueStats]:
+        """
+        Return depth, enqueue-to-dispatch latency and drop count of all queues
+        """
+        return [queue.stats() for queue in self.queues.values()]
+
+    @validate_call
+    def add_thread_pool(self, name: SnakeCaseField, size: int) -> None:
+        """
+        Add a named bounded thread pool for sync handlers with `THREAD` execution policy,
+        resize the pool if it already exists.
+        """
+        self.executors.add_thread_pool(name=name, size=size)
+
+    @validate_call
+    def add_process_pool(
+        self, name: SnakeCaseField, max_workers: int | None = None
+    ) -> None:
+        """
+        Add a named process pool for sync handlers with `PROCESS` execution policy.
+
+        A `default` process pool with one worker for each CPU is always available.
+        """
+        self.executors.add_process_pool(name=name, max_workers=max_workers)
+
+    def executor_stats(self) -> list[PoolStats]:
+        """
+        Return size and usage of all executor pools of this manager
+        """
+        return self.executors.stats()
+
+    def stats(self) -> list[HandlerStatsSnapshot]:
+        """
+        Return call count, error count, queued and running latency histograms of
+        all handlers ever added to this manager.
+
+        Handlers subscribed with a wildcard pattern are reported under the pattern.
+        Return an empty list if stats is disabled.
+        """
+        if self.handler_stats is None:
+            return []
+        return self.handler_stats.snapshot()
+
+    def enable_tracing(
+        self, exporter: SpanExporter, buffer_size: int | None = None
+    ) -> None:
+        """
+        Start recording a span for each emit and each handler call.
+
+        Finished spans are kept in a ring buffer of `buffer_size` spans, and written to
+        `exporter` by `flush_traces()`, or periodically by running
+        `self.tracer.run_exporter()` as a background task.
+
+        Example:
+
+            mgr.enable_tracing(JsonLinesSpanExporter("event_spans.jsonl"))
+        """
+        self.tracer.enable(exporter=exporter, buffer_size=buffer_size)
+        self._rebuild_all_dispatch_plans()
+
+    def disable_tracing(self) -> None:
+        """
+        Stop tracing, handlers are no longer wrapped so tracing costs nothing.
+
+        Buffered spans are kept until next `flush_traces()`.
+        """
+        self.tracer.disable()
+        self._rebuild_all_dispatch_plans()
+
+    def flush_traces(self) -> int:
+        """
+        Export all buffered spans, return number of exported spans.
+
+        This method blocks on file I/O.
+        """
+        return self.tracer.flush()
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Release resources held by this manager, e.g.: worker processes, outbox database
+
+        Emits still running may fail, use `retire()` to wait for them.
+
+        Args:
+            wait:
+                Wait for handlers still running in process pools. If `False`, they
+                are abandoned and left to finish in background.
+        """
+        self.executors.shutdown(wait=wait)
+        if self.outbox is not None:
+            self.outbox.close()
+
+    def retire(self) -> None:
+        """
+        Flush traces and shutdown this manager once all emits in flight finished,
+        immediately if there is none.
+
+        Never blocks, traces are flushed and the manager is shut down in a background
+        thread, without waiting for handlers abandoned in process pools, e.g.: timed
+        out ones.
+
+        Used when the manager is replaced, e.g.: by `restart_manager()`. Emits started
+        after this call still delay the shutdown, but callers should switch to the new
+        manager instead.
+        """
+        with self._in_flight_lock:
+            self._retiring = True
+            if self._in_flight > 0:
+                return
+        self._finish_retire()
+
+    @property
+    def in_flight(self) -> int:
+        """Number of emits running on this manager"""
+        return self._in_flight
+
+    def _begin_emit(self) -> None:
+        with self._in_flight_lock:
+            self._in_flight += 1
+
+    def _end_emit(self) -> None:
+        with self._in_flight_lock:
+            self._in_flight -= 1
+            if not self._retiring or self._in_flight > 0:
+                return
+        self._finish_retire()
+
+    def _finish_retire(self) -> None:
+        with self._in_flight_lock:
+            if self._retired:
+                return
+            self._retired = True
+        # may be called in the event loop, never block it with I/O or process pools
+        self._retire_thread = Thread(
+            target=self._shutdown_retired, name="rrss-event-retire", daemon=True
+        )
+        self._retire_thread.start()
+
+    def _shutdown_retired(self) -> None:
+        try:
+            self.flush_traces()
+        finally:
+            self.shutdown(wait=False)
+        _logger.debug("Retired RRSS event manager shut down")
 
     def has_event(self, event_name: str) -> bool:
         """
@@ -204,12 +1870,67 @@ class EventManager:
 
     @validate_call
     def add_handler(self, handler: EventHandler):
-        """Add a new handler"""
-        single_event_mgr = self._try_get_single_mgr(handler.event_name)
-        single_event_mgr.add(handler=handler)
+        """
+        Add a new handler
 
+        If `event_name` of the handler is a wildcard pattern, e.g.: `rrss.feed.*`, the handler
+        will be triggered by all existing and future events matching this pattern, and it's
+        not required to add the event first.
+        """
+        self._add_handlers([handler])
         _logger.debug(f"New handler added: {handler}")
 
+    @validate_call
+    def add_handlers(self, handlers: list[EventHandler]):
+        """
+        Add multiple handlers at once, e.g.: all handlers of a plugin
+
+        The handler list is validated once, and the dispatch plan of each affected event
+        is rebuilt only once. If any handler could not be added, none of the handlers
+        will be added.
+
+        Raises:
+            EventNotRegistered
+            DuplicatedHandlerID
+            ExecutorPoolNotFound
+        """
+        self._add_handlers(handlers)
+        _logger.debug(f"{len(handlers)} new handlers added")
+
+    def _add_handlers(self, handlers: list[EventHandler]) -> None:
+        with self._registry_lock:
+            grouped_handlers: dict[str, list[EventHandler]] = dict()
+            for handler in handlers:
+                grouped_handlers.setdefault(handler.event_name, []).append(handler)
+
+            # check all handlers before modifying anything
+            targets: list[tuple[_SingleEventMgr[Any], list[EventHandler]]] = []
+            for event_name, handler_group in grouped_handlers.items():
+                single_mgr: _SingleEventMgr[Any]
+                if is_pattern(event_name):
+                    existing_mgr = self.pattern_mgr_dict.get(event_name, None)
+                    if existing_mgr is None:
+                        single_mgr = self._new_single_mgr(event_name)
+                    else:
+                        single_mgr = existing_mgr
+                else:
+                    single_mgr = self._try_get_single_mgr(event_name)
+                single_mgr.check_new(handler_group)
+                targets.append((single_mgr, handler_group))
+
+            for single_mgr, handler_group in targets:
+                single_mgr.add_many(handler_group)
+                for handler in handler_group:
+                    self.registrant_index.setdefault(handler.registrant, set()).add(
+                        single_mgr.name
+                    )
+
+                if is_pattern(single_mgr.name):
+                    if single_mgr.name not in self.pattern_mgr_dict:
+                        self.pattern_mgr_dict[single_mgr.name] = single_mgr
+                        self._pattern_trie.add(single_mgr.name)
+                    self._on_pattern_mgr_changed(single_mgr.name)
+
     def has_handler(self, handler: EventHandler):
         pass
 
@@ -235,17 +1956,95 @@ class EventManager:
                 )
             )
         """
-        single_mgr = self._try_get_single_mgr(event_name=handler.event_name)
-        single_mgr.remove(registrant=handler.registrant, identifier=handler.identifier)
+        with self._registry_lock:
+            if is_pattern(handler.event_name):
+                try:
+                    single_mgr = self.pattern_mgr_dict[handler.event_name]
+                except KeyError:
+                    raise event_errors.HandlerNotFound(
+                        registrant=handler.registrant, identifier=handler.identifier
+                    )
+            else:
+                single_mgr = self._try_get_single_mgr(event_name=handler.event_name)
+
+            single_mgr.remove(
+                registrant=handler.registrant, identifier=handler.identifier
+            )
+
+            if not single_mgr.has(handler.registrant):
+                self._unindex_registrant(handler.registrant, single_mgr.name)
+            if is_pattern(handler.event_name):
+                self._on_pattern_mgr_changed(handler.event_name)
 
     @validate_call
     def remove_all_by_registrant(self, registrant: RRSSEntityIdField):
-        """Remove all handlers with specific registrant"""
-        for single_mgr in self._single_managers():
-            try:
-                single_mgr.remove(registrant=registrant, identifier=None)
-            except event_errors.HandlerNotFound:
-                continue
+        """
+        Remove all handlers with specific registrant
+
+        Only events and patterns the registrant has handlers on are touched.
+        """
+        with self._registry_lock:
+            for name in self.registrant_index.pop(registrant, set()):
+                if is_pattern(name):
+                    self.pattern_mgr_dict[name].remove(
+                        registrant=registrant, identifier=None
+                    )
+                    self._on_pattern_mgr_changed(name)
+                else:
+                    self.event_handler_mgr_dict[name].remove(
+                        registrant=registrant, identifier=None
+                    )
+
+    def _unindex_registrant(self, registrant: str, name: str) -> None:
+        """Remove `name` from the events and patterns indexed for `registrant`"""
+        names = self.registrant_index.get(registrant, None)
+        if names is None:
+            return
+        names.discard(name)
+        if not names:
+            del self.registrant_index[registrant]
+
+    def _new_single_mgr(self, name: str) -> _SingleEventMgr[Any]:
+        """Create a single event manager sharing resources of this manager"""
+        return _SingleEventMgr(
+            name,
+            executors=self.executors,
+            stats=self.handler_stats,
+            tracer=self.tracer,
+            dead_letters=self.dead_letters,
+        )
+
+    def _rebuild_all_dispatch_plans(self) -> None:
+        """Re-generate dispatch plans of all events and patterns"""
+        with self._registry_lock:
+            # pattern managers first, since event managers combine their plans
+            for pattern_mgr in self.pattern_mgr_dict.values():
+                pattern_mgr._rebuild_dispatch_plan(rebuild_calls=True)
+            for single_mgr in self._single_managers():
+                single_mgr._rebuild_dispatch_plan(rebuild_calls=True)
+
+    def _match_pattern_mgrs(
+        self, event_name: RRSSEntityIdField
+    ) -> tuple[_SingleEventMgr[Any], ...]:
+        """Return all pattern managers whose pattern matches `event_name`"""
+        return tuple(
+            self.pattern_mgr_dict[pattern]
+            for pattern in self._pattern_trie.match(event_name)
+        )
+
+    def _on_pattern_mgr_changed(self, pattern: str) -> None:
+        """
+        Drop the pattern manager if it has no handler, then refresh dispatch plans
+        of all events matching `pattern`
+        """
+        pattern_mgr = self.pattern_mgr_dict.get(pattern, None)
+        if pattern_mgr is not None and not pattern_mgr.handler_dict:
+            del self.pattern_mgr_dict[pattern]
+            self._pattern_trie.remove(pattern)
+
+        for event_name, single_mgr in self.event_handler_mgr_dict.items():
+            if match_pattern(pattern, event_name):
+                single_mgr.set_inherited(self._match_pattern_mgrs(event_name))
 
     def _try_get_single_mgr(self, event_name: RRSSEntityIdField):
         """
@@ -273,8 +2072,21 @@ def get_instance():
     return instance
 
 
+_restart_lock = Lock()
+
+
 def restart_manager():
+    """
+    Replace the singleton instance with a new event manager.
+
+    New emits through `get_instance()` go to the new manager at once. The old manager
+    is retired, it's shut down after the emits still running on it finished, check
+    out `EventManager.retire()`. Code holding a reference of the old manager should
+    get the instance again.
+    """
     global instance
     _logger.debug("Restart RRSS event manager...")
-    instance = EventManager()
+    with _restart_lock:
+        old, instance = instance, EventManager()
+    old.retire()
     _logger.info("RRSS event manager has been restarted")
@@ -0,0 +1,199 @@
+"""
+Durable event outbox backed by SQLite.
+
+Events of durable event names are appended to the outbox before being dispatched, and
+removed after all handlers finished successfully. Events left in the outbox, e.g.:
+after a crash, could be replayed on next startup. Delivery is at-least-once.
+
+Writes are group committed: while a transaction is being committed on a worker thread,
+new appends and done-marks are collected into the next transaction, so under load
+many events share a single fsync.
+"""
+
+import pickle
+import sqlite3
+import threading
+from pathlib import Path
+from time import time
+from typing import Any, Literal
+
+import anyio
+from anyio import to_thread
+
+from .types import Event
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rrss_event_outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    event_name TEXT NOT NULL,
+    sender TEXT,
+    data BLOB NOT NULL,
+    created_at REAL NOT NULL
+)
+"""
+
+
+class _Batch:
+    """Appends and done-marks committed in the same transaction"""
+
+    __slots__ = ("rows", "done_ids", "ids", "error", "committed")
+
+    def __init__(self):
+        self.rows: list[tuple[str, str | None, bytes, float]] = []
+        self.done_ids: list[int] = []
+        self.ids: list[int] = []
+        self.error: BaseException | None = None
+        self.committed = anyio.Event()
+
+
+class SQLiteOutbox:
+    """
+    Durable outbox of events stored in a SQLite database file.
+
+    Event data is pickled, so it should be picklable and the database should not be
+    writable by untrusted parties.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        synchronous: Literal["OFF", "NORMAL", "FULL", "EXTRA"] = "FULL",
+    ):
+        """
+        Args:
+            path: Database file, created if not exists.
+            synchronous: SQLite `synchronous` pragma, `FULL` survives power loss,
+                `NORMAL` survives process crash only.
+        """
+        self.path = Path(path)
+        self.commits = 0
+        """Number of committed transactions, for monitoring group commit efficiency"""
+
+        self._conn = sqlite3.connect(
+            self.path, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"PRAGMA synchronous={synchronous}")
+        self._conn.execute(_SCHEMA)
+        self._conn_lock = threading.Lock()
+
+        self._current: _Batch | None = None
+        self._commit_finished: anyio.Event | None = None
+
+    def _get_current(self) -> _Batch:
+        if self._current is None:
+            self._current = _Batch()
+        return self._current
+
+    async def append(self, event: Event[Any]) -> int:
+        """Durably store an event, return its row ID"""
+        (row_id,) = await self.append_many([event])
+        return row_id
+
+    async def append_many(self, events: list[Event[Any]]) -> list[int]:
+        """Durably store events in a single transaction, return their row IDs"""
+        batch = self._get_current()
+        start = len(batch.rows)
+        now = time()
+        batch.rows.extend(
+            (
+                event.event_name,
+                event.sender,
+                pickle.dumps(event.data, protocol=pickle.HIGHEST_PROTOCOL),
+                now,
+            )
+            for event in events
+        )
+        await self._wait_committed(batch)
+        return batch.ids[start : start + len(events)]
+
+    async def mark_done(self, *row_ids: int) -> None:
+        """Remove handled events from the outbox"""
+        batch = self._get_current()
+        batch.done_ids.extend(row_ids)
+        await self._wait_committed(batch)
+
+    async def flush(self) -> None:
+        """Commit pending appends and done-marks"""
+        if self._current is not None:
+            await self._wait_committed(self._current)
+
+    async def _wait_committed(self, batch: _Batch) -> None:
+        while not batch.committed.is_set():
+            if self._commit_finished is not None:
+                # another task is committing, wait and check again
+                await self._commit_finished.wait()
+            else:
+                await self._commit_current()
+
+        if batch.error is not None:
+            raise batch.error
+
+    async def _commit_current(self) -> None:
+        batch = self._get_current()
+        self._current = None
+        finished = self._commit_finished = anyio.Event()
+        try:
+            batch.ids = await to_thread.run_sync(
+                self._write, batch.rows, batch.done_ids
+            )
+        except BaseException as e:
+            batch.error = e
+            raise
+        finally:
+            self._commit_finished = None
+            batch.committed.set()
+            finished.set()
+
+    def _write(
+        self, rows: list[tuple[str, str | None, bytes, float]], done_ids: list[int]
+    ) -> list[int]:
+        with self._conn_lock:
+            cursor = self._conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                ids = [
+                    cursor.execute(
+                        "INSERT INTO rrss_event_outbox "
+                        "(event_name, sender, data, created_at) VALUES (?, ?, ?, ?)",
+                        row,
+                    ).lastrowid
+                    for row in rows
+                ]
+                if done_ids:
+                    cursor.executemany(
+                        "DELETE FROM rrss_event_outbox WHERE id = ?",
+                        [(row_id,) for row_id in done_ids],
+                    )
+                cursor.execute("COMMIT")
+            except BaseException:
+                cursor.execute("ROLLBACK")
+                raise
+            self.commits += 1
+            return [row_id for row_id in ids if row_id is not None]
+
+    def pending(self) -> list[tuple[int, Event[Any]]]:
+        """Return all events in the outbox as `(row_id, event)` pairs, oldest first"""
+        with self._conn_lock:
+            rows = self._conn.execute(
+                "SELECT id, event_name, sender, data FROM rrss_event_outbox ORDER BY id"
+            ).fetchall()
+        return [
+            (
+                row_id,
+                Event.trusted(
+                    event_name=event_name, sender=sender, data=pickle.loads(data)
+                ),
+            )
+            for row_id, event_name, sender, data in rows
+        ]
+
+    def close(self) -> None:
+        """
+        Close the database connection.
+
+        Call `flush()` before closing, otherwise pending done-marks are lost and those
+        events will be replayed.
+        """
+        with self._conn_lock:
+            self._conn.close()
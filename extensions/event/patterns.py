@@ -0,0 +1,133 @@
+"""
+Wildcard event name patterns.
+
+Patterns are dot-separated like event names, and each segment could also be:
+
+- `*`: Match exactly one segment, e.g.: `rrss.feed.*` matches `rrss.feed.entry_added`
+  but not `rrss.feed` or `rrss.feed.entry.added`
+- `**`: Match zero or more segments, e.g.: `rrss.**` matches `rrss`, `rrss.feed` and
+  `rrss.feed.entry_added`
+"""
+
+SINGLE_WILDCARD = "*"
+MULTI_WILDCARD = "**"
+
+
+def is_pattern(name: str) -> bool:
+    """Check if an event name contains any wildcard segment"""
+    return SINGLE_WILDCARD in name
+
+
+def match_pattern(pattern: str, event_name: str) -> bool:
+    """Check if a concrete `event_name` matches `pattern`"""
+    return _match_segments(pattern.split("."), 0, event_name.split("."), 0)
+
+
+def _match_segments(
+    pattern_segs: list[str], p: int, name_segs: list[str], n: int
+) -> bool:
+    while p < len(pattern_segs):
+        seg = pattern_segs[p]
+        if seg == MULTI_WILDCARD:
+            # try consuming zero or more name segments
+            return any(
+                _match_segments(pattern_segs, p + 1, name_segs, i)
+                for i in range(n, len(name_segs) + 1)
+            )
+        if n >= len(name_segs):
+            return False
+        if seg != SINGLE_WILDCARD and seg != name_segs[n]:
+            return False
+        p += 1
+        n += 1
+    return n == len(name_segs)
+
+
+class _TrieNode:
+    __slots__ = ("children", "pattern")
+
+    def __init__(self):
+        self.children: dict[str, _TrieNode] = dict()
+        self.pattern: str | None = None
+        """Pattern ends at this node, if any"""
+
+
+class EventPatternTrie:
+    """
+    Segment trie of event name patterns.
+
+    Used to find all patterns matching a concrete event name, walking only the
+    branches that could match instead of testing every registered pattern.
+    """
+
+    def __init__(self):
+        self._root = _TrieNode()
+        self._patterns: set[str] = set()
+
+    def __contains__(self, pattern: str) -> bool:
+        return pattern in self._patterns
+
+    def __len__(self) -> int:
+        return len(self._patterns)
+
+    def add(self, pattern: str) -> None:
+        """Add a pattern, do nothing if it already exists"""
+        if pattern in self._patterns:
+            return
+
+        node = self._root
+        for seg in pattern.split("."):
+            node = node.children.setdefault(seg, _TrieNode())
+        node.pattern = pattern
+        self._patterns.add(pattern)
+
+    def remove(self, pattern: str) -> None:
+        """Remove a pattern and prune empty branches, do nothing if it not exists"""
+        if pattern not in self._patterns:
+            return
+
+        path = [self._root]
+        segs = pattern.split(".")
+        for seg in segs:
+            path.append(path[-1].children[seg])
+        path[-1].pattern = None
+        self._patterns.remove(pattern)
+
+        # prune from leaf to root
+        for seg, parent, node in zip(
+            reversed(segs), reversed(path[:-1]), reversed(path[1:])
+        ):
+            if node.children or node.pattern is not None:
+                break
+            del parent.children[seg]
+
+    def match(self, event_name: str) -> list[str]:
+        """Return all patterns matching a concrete `event_name`"""
+        found: dict[str, None] = dict()
+        self._match(self._root, event_name.split("."), 0, found)
+        return list(found)
+
+    def _match(
+        self, node: _TrieNode, segs: list[str], i: int, found: dict[str, None]
+    ) -> None:
+        multi = node.children.get(MULTI_WILDCARD, None)
+
+        if i == len(segs):
+            if node.pattern is not None:
+                found[node.pattern] = None
+            # `**` could match zero segment
+            if multi is not None:
+                self._match(multi, segs, i, found)
+            return
+
+        exact = node.children.get(segs[i], None)
+        if exact is not None:
+            self._match(exact, segs, i + 1, found)
+
+        single = node.children.get(SINGLE_WILDCARD, None)
+        if single is not None:
+            self._match(single, segs, i + 1, found)
+
+        if multi is not None:
+            for j in range(i, len(segs) + 1):
+                self._match(multi, segs, j, found)
@@ -0,0 +1,162 @@
+from collections import deque
+from enum import StrEnum
+from time import perf_counter
+from typing import Any
+
+import anyio
+from pydantic import BaseModel
+
+from .types import Event
+from . import errors as event_errors
+
+DEFAULT_QUEUE_NAME = "default"
+
+
+class OverflowPolicy(StrEnum):
+    """Determine what `EventQueue.put()` does when the queue is full"""
+
+    BLOCK = "block"
+    """Wait until the queue has free space"""
+
+    DROP_OLDEST = "drop_oldest"
+    """Drop the oldest event in the queue to make space for the new one"""
+
+    FAIL = "fail"
+    """Raise `EventQueueFull` immediately"""
+
+
+class QueueStats(BaseModel):
+    """Snapshot of the usage of an event queue"""
+
+    name: str
+    """Name of the queue"""
+    depth: int
+    """Number of events waiting in the queue"""
+    max_size: int
+    """Capacity of the queue"""
+    workers: int
+    """Number of dispatcher tasks draining this queue"""
+    enqueued: int
+    """Total number of events put into the queue"""
+    dispatched: int
+    """Total number of events taken by dispatchers"""
+    dropped: int
+    """Total number of events dropped because of `DROP_OLDEST` overflow policy"""
+    avg_latency: float
+    """Average seconds from enqueue to dispatch"""
+    max_latency: float
+    """Max seconds from enqueue to dispatch"""
+
+
+class EventQueue:
+    """
+    Bounded FIFO queue of events, drained by dispatcher tasks of `EventManager`.
+
+    Note that the synchronization primitives of this queue are bound to the event
+    loop which first uses them.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_size: int = 1024,
+        overflow: OverflowPolicy = OverflowPolicy.BLOCK,
+        workers: int = 1,
+    ):
+        if max_size < 1:
+            raise ValueError("Queue max_size must be a positive integer")
+        if workers < 1:
+            raise ValueError("Queue workers must be a positive integer")
+
+        self.name = name
+        self.max_size = max_size
+        self.overflow = overflow
+        self.workers = workers
+
+        # items are (event, enqueue time) pairs
+        self._items: deque[tuple[Event[Any], float]] = deque()
+        self._unfinished = 0
+
+        # single condition for all state changes, waiters re-check their own predicate
+        self._changed = anyio.Condition()
+
+        self.enqueued = 0
+        self.dispatched = 0
+        self.dropped = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    async def put(self, event: Event[Any]) -> None:
+        """
+        Put an event into the queue, follow `overflow` policy if queue is full.
+
+        Raises:
+            EventQueueFull: Queue is full and overflow policy is `FAIL`.
+        """
+        async with self._changed:
+            if len(self._items) >= self.max_size:
+                if self.overflow == OverflowPolicy.FAIL:
+                    raise event_errors.EventQueueFull(
+                        queue=self.name, event_name=event.event_name
+                    )
+                elif self.overflow == OverflowPolicy.DROP_OLDEST:
+                    self._items.popleft()
+                    self._unfinished -= 1
+                    self.dropped += 1
+                else:
+                    while len(self._items) >= self.max_size:
+                        await self._changed.wait()
+
+            self._items.append((event, perf_counter()))
+            self._unfinished += 1
+            self.enqueued += 1
+            self._changed.notify_all()
+
+    async def get(self) -> Event[Any]:
+        """
+        Take the oldest event from the queue, wait if the queue is empty.
+
+        `task_done()` should be called after the event is processed.
+        """
+        async with self._changed:
+            while not self._items:
+                await self._changed.wait()
+            event, enqueued_at = self._items.popleft()
+            self._changed.notify_all()
+
+        latency = perf_counter() - enqueued_at
+        self.dispatched += 1
+        self._latency_total += latency
+        self._latency_max = max(self._latency_max, latency)
+        return event
+
+    async def task_done(self) -> None:
+        """Mark an event returned by `get()` as processed"""
+        async with self._changed:
+            self._unfinished -= 1
+            if self._unfinished == 0:
+                self._changed.notify_all()
+
+    async def join(self) -> None:
+        """Wait until all events put into this queue are processed"""
+        async with self._changed:
+            while self._unfinished > 0:
+                await self._changed.wait()
+
+    def stats(self) -> QueueStats:
+        return QueueStats(
+            name=self.name,
+            depth=len(self._items),
+            max_size=self.max_size,
+            workers=self.workers,
+            enqueued=self.enqueued,
+            dispatched=self.dispatched,
+            dropped=self.dropped,
+            avg_latency=(
+                self._latency_total / self.dispatched if self.dispatched else 0.0
+            ),
+            max_latency=self._latency_max,
+        )
@@ -0,0 +1,160 @@
+"""
+Retry and failure isolation of event handler calls.
+
+A handler with a `RetryPolicy` is called again after a backoff when it raises. An
+`isolated` handler never raises to the emit, so its siblings are not cancelled by the
+task group. Instead, the failure is stored as a `DeadLetter`, which could be re-driven
+later to that handler only.
+"""
+
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Iterator
+
+from anyio import sleep
+from loguru import logger as _logger
+from pydantic import BaseModel, ConfigDict
+
+from .types import EventHandler, RetryPolicy
+
+redriving: ContextVar[bool] = ContextVar("rrss_event_redriving", default=False)
+"""
+If `True`, failures of isolated handlers are raised instead of stored as dead letters.
+Set by `EventManager.redrive_dead_letters()`, which stores them itself.
+"""
+
+
+class DeadLetter(BaseModel):
+    """A failed handler call, with everything needed to call it again"""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True, frozen=True)
+
+    event_name: str
+    """Name of the emitted event"""
+    registrant: str
+    identifier: str
+    payload: Any
+    """The event passed to the handler, or the list of events for batch handlers"""
+    batch: bool
+    """If `payload` is a batch of events passed to `batch_handler()`"""
+    error: BaseException
+    """Exception raised by the last call"""
+    attempts: int
+    """Number of calls failed so far, including retries and re-drives"""
+    failed_at: datetime
+
+
+class DeadLetterQueue:
+    """
+    Bounded FIFO of dead letters, the oldest letters are dropped when full.
+    """
+
+    def __init__(self, max_size: int = 1024):
+        if max_size < 1:
+            raise ValueError("Dead letter queue max_size must be a positive integer")
+        self.max_size = max_size
+        self.dropped = 0
+        """Total number of letters dropped because the queue is full"""
+        self._letters: deque[DeadLetter] = deque()
+
+    def append(self, letter: DeadLetter) -> None:
+        if len(self._letters) >= self.max_size:
+            self._letters.popleft()
+            self.dropped += 1
+        self._letters.append(letter)
+
+    def take(
+        self,
+        registrant: str | None = None,
+        identifier: str | None = None,
+        event_name: str | None = None,
+    ) -> list[DeadLetter]:
+        """Remove and return all letters matching the conditions which are not `None`"""
+        taken: list[DeadLetter] = []
+        kept: deque[DeadLetter] = deque()
+        for letter in self._letters:
+            if (
+                (registrant is None or letter.registrant == registrant)
+                and (identifier is None or letter.identifier == identifier)
+                and (event_name is None or letter.event_name == event_name)
+            ):
+                taken.append(letter)
+            else:
+                kept.append(letter)
+        self._letters = kept
+        return taken
+
+    def remove(self, letter: DeadLetter) -> bool:
+        """Remove a letter, return `False` if it's not in the queue"""
+        try:
+            self._letters.remove(letter)
+        except ValueError:
+            return False
+        return True
+
+    def __len__(self) -> int:
+        return len(self._letters)
+
+    def __iter__(self) -> Iterator[DeadLetter]:
+        return iter(list(self._letters))
+
+
+def wrap_retry(
+    call: Callable[..., Awaitable[Any]], policy: RetryPolicy
+) -> Callable[..., Awaitable[Any]]:
+    """Wrap an async handler call so it's retried following `policy`"""
+
+    async def wrapper(*args: Any) -> Any:
+        retry = 0
+        while True:
+            try:
+                return await call(*args)
+            except Exception:
+                retry += 1
+                if retry >= policy.attempts:
+                    raise
+            await sleep(policy.delay(retry))
+
+    return wrapper
+
+
+def wrap_isolated(
+    call: Callable[..., Awaitable[Any]],
+    handler_model: EventHandler[Any],
+    dead_letters: DeadLetterQueue | None,
+    batch: bool = False,
+) -> Callable[..., Awaitable[Any]]:
+    """
+    Wrap an async handler call so exceptions are logged and stored in `dead_letters`
+    instead of raised. A failed call returns `None`.
+    """
+    attempts = handler_model.retry.attempts if handler_model.retry is not None else 1
+
+    async def wrapper(payload: Any) -> Any:
+        try:
+            return await call(payload)
+        except Exception as e:
+            if redriving.get():
+                raise
+            event_name = payload[0].event_name if batch else payload.event_name
+            _logger.opt(exception=e).error(
+                f"Isolated event handler {handler_model!r} failed handling "
+                f"{event_name!r} after {attempts} attempts"
+            )
+            if dead_letters is not None:
+                dead_letters.append(
+                    DeadLetter(
+                        event_name=event_name,
+                        registrant=handler_model.registrant,
+                        identifier=handler_model.identifier,
+                        payload=payload,
+                        batch=batch,
+                        error=e,
+                        attempts=attempts,
+                        failed_at=datetime.now(timezone.utc),
+                    )
+                )
+            return None
+
+    return wrapper
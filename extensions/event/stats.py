@@ -0,0 +1,281 @@
+"""
+Low overhead per-handler instrumentation of the event system.
+
+Each handler (keyed by `event_name`, `registrant` and `identifier`) has a `HandlerStats`
+record, which counts calls, errors and timeouts, and keeps two latency histograms:
+
+- queued: Seconds from the emit starting to the handler actually starting to run,
+  e.g.: waiting for a task to be scheduled or a free thread of the executor pool.
+- running: Seconds the handler itself runs.
+"""
+
+from contextvars import ContextVar
+from functools import wraps
+from threading import Lock
+from time import perf_counter
+from typing import Any, Awaitable, Callable
+
+from loguru import logger as _logger
+from pydantic import BaseModel
+
+_BUCKET_COUNT = 32
+"""Bucket `i` counts latencies in `[2^(i-1), 2^i)` microseconds, the last is unbounded"""
+
+dispatch_started_at: ContextVar[float | None] = ContextVar(
+    "rrss_event_dispatch_started_at", default=None
+)
+"""
+`perf_counter()` value when current emit started to dispatch handlers.
+
+Set by the emitter before scheduling handler tasks, copied into tasks and worker threads
+together with the context, and used to calculate queued time.
+"""
+
+
+class HistogramSnapshot(BaseModel):
+    """Snapshot of a `LatencyHistogram`, all times are in seconds"""
+
+    count: int
+    total: float
+    max: float
+    p50: float
+    p90: float
+    p99: float
+    buckets: list[int]
+    """Counts of each power-of-two microsecond bucket, check out `LatencyHistogram`"""
+
+
+class LatencyHistogram:
+    """
+    Fixed-size histogram with power-of-two microsecond buckets.
+
+    Recording is O(1) and allocation free. Percentiles are estimated with the upper
+    bound of the bucket, so they are accurate within a factor of two.
+    """
+
+    __slots__ = ("buckets", "count", "total", "max")
+
+    def __init__(self):
+        self.buckets = [0] * _BUCKET_COUNT
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        index = int(seconds * 1_000_000).bit_length()
+        self.buckets[index if index < _BUCKET_COUNT else _BUCKET_COUNT - 1] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q: float) -> float:
+        """Estimate the `q` (0 to 1) percentile in seconds"""
+        if self.count == 0:
+            return 0.0
+
+        rank = q * self.count
+        accumulated = 0
+        for index, bucket_count in enumerate(self.buckets):
+            accumulated += bucket_count
+            if accumulated >= rank:
+                return min((1 << index) / 1_000_000, self.max)
+        return self.max
+
+    def snapshot(self) -> HistogramSnapshot:
+        return HistogramSnapshot(
+            count=self.count,
+            total=self.total,
+            max=self.max,
+            p50=self.percentile(0.5),
+            p90=self.percentile(0.9),
+            p99=self.percentile(0.99),
+            buckets=list(self.buckets),
+        )
+
+
+class HandlerStatsSnapshot(BaseModel):
+    """Snapshot of the `HandlerStats` of a handler"""
+
+    event_name: str
+    """Event name or pattern the handler subscribed to"""
+    registrant: str
+    identifier: str
+    calls: int
+    errors: int
+    timeouts: int
+    """Calls cancelled, or abandoned for sync handlers, after their deadline"""
+    queued: HistogramSnapshot
+    running: HistogramSnapshot
+
+
+class HandlerStats:
+    """
+    Mutable statistics record of a single handler.
+
+    Could be updated from both event loop and worker threads.
+    """
+
+    __slots__ = (
+        "event_name",
+        "registrant",
+        "identifier",
+        "calls",
+        "errors",
+        "timeouts",
+        "queued",
+        "running",
+        "slow_threshold",
+        "_lock",
+    )
+
+    def __init__(
+        self,
+        event_name: str,
+        registrant: str,
+        identifier: str,
+        slow_threshold: float | None = None,
+    ):
+        self.event_name = event_name
+        self.registrant = registrant
+        self.identifier = identifier
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.queued = LatencyHistogram()
+        self.running = LatencyHistogram()
+        self.slow_threshold = slow_threshold
+        self._lock = Lock()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.calls = 0
+            self.errors = 0
+            self.timeouts = 0
+            self.queued = LatencyHistogram()
+            self.running = LatencyHistogram()
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def record(self, queued: float, running: float, failed: bool) -> None:
+        with self._lock:
+            self.calls += 1
+            if failed:
+                self.errors += 1
+            self.queued.record(queued)
+            self.running.record(running)
+
+        if self.slow_threshold is not None and running >= self.slow_threshold:
+            _logger.warning(
+                "Slow event handler: event={!r} registrant={!r} identifier={!r} "
+                "running={:.3f}s queued={:.3f}s",
+                self.event_name,
+                self.registrant,
+                self.identifier,
+                running,
+                queued,
+            )
+
+    def wrap_sync[T](self, func: Callable[..., T]) -> Callable[..., T]:
+        """Instrument a sync function, the result is still a sync function"""
+
+        @wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> T:
+            started_at = perf_counter()
+            dispatched_at = dispatch_started_at.get()
+            failed = True
+            try:
+                ret = func(*args, **kwargs)
+                failed = False
+                return ret
+            finally:
+                self.record(
+                    queued=(
+                        started_at - dispatched_at if dispatched_at is not None else 0.0
+                    ),
+                    running=perf_counter() - started_at,
+                    failed=failed,
+                )
+
+        return wrapper
+
+    def wrap_async[
+        T
+    ](self, func: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        """Instrument a coroutine function, the result is still a coroutine function"""
+
+        @wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> T:
+            started_at = perf_counter()
+            dispatched_at = dispatch_started_at.get()
+            failed = True
+            try:
+                ret = await func(*args, **kwargs)
+                failed = False
+                return ret
+            finally:
+                self.record(
+                    queued=(
+                        started_at - dispatched_at if dispatched_at is not None else 0.0
+                    ),
+                    running=perf_counter() - started_at,
+                    failed=failed,
+                )
+
+        return wrapper
+
+    def snapshot(self) -> HandlerStatsSnapshot:
+        with self._lock:
+            return HandlerStatsSnapshot(
+                event_name=self.event_name,
+                registrant=self.registrant,
+                identifier=self.identifier,
+                calls=self.calls,
+                errors=self.errors,
+                timeouts=self.timeouts,
+                queued=self.queued.snapshot(),
+                running=self.running.snapshot(),
+            )
+
+
+class EventStatsRegistry:
+    """
+    Store `HandlerStats` of all handlers of an `EventManager`.
+
+    Records are kept after handlers are removed, and reused if a handler with the same
+    key is added again.
+    """
+
+    def __init__(self, slow_threshold: float | None = None):
+        """
+        Args:
+            slow_threshold:
+                Log a warning when a handler runs longer than this many seconds.
+                If `None`, slow handlers are not logged.
+        """
+        self.slow_threshold = slow_threshold
+        self._records: dict[tuple[str, str, str], HandlerStats] = dict()
+
+    def get(self, event_name: str, registrant: str, identifier: str) -> HandlerStats:
+        """Return the stats record of a handler, create if not exists"""
+        key = (event_name, registrant, identifier)
+        record = self._records.get(key, None)
+        if record is None:
+            record = HandlerStats(
+                event_name=event_name,
+                registrant=registrant,
+                identifier=identifier,
+                slow_threshold=self.slow_threshold,
+            )
+            self._records[key] = record
+        return record
+
+    def snapshot(self) -> list[HandlerStatsSnapshot]:
+        return [record.snapshot() for record in list(self._records.values())]
+
+    def reset(self) -> None:
+        """Reset all records to zero"""
+        for record in list(self._records.values()):
+            record.reset()
@@ -0,0 +1,127 @@
+"""
+Deadlines of event handler calls.
+
+A handler call past its deadline is cancelled. Sync handlers running in a worker thread
+or process could not be interrupted, they are abandoned and keep running in background,
+while the emit returns on time.
+
+Timed out handlers are not raised from the handler task, otherwise the sibling handlers
+would be cancelled by the task group. Instead, they are appended to the list in
+`timed_out_handlers` of current emit, which reports them after all handlers finished.
+
+Handlers with retry or isolation raise `HandlerCallTimeout` from each timed out call
+instead, so the call is retried or stored as a dead letter. Only the outermost layer,
+`wrap_report_timeout()`, reports a handler which is not isolated.
+"""
+
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable
+
+from anyio import CancelScope, current_time
+from loguru import logger as _logger
+
+from . import errors as event_errors
+from .executors import abandon_on_cancel
+from .stats import HandlerStats
+from .types import EventHandler
+
+timed_out_handlers: ContextVar[list[EventHandler[Any]] | None] = ContextVar(
+    "rrss_event_timed_out_handlers", default=None
+)
+"""
+Handlers timed out during current emit, set by the emitter before scheduling handler
+tasks. The list object is shared by all tasks copying the context.
+"""
+
+
+def _on_timeout(handler_model: EventHandler[Any], record: HandlerStats | None) -> None:
+    if record is not None:
+        record.record_timeout()
+    timed_out = timed_out_handlers.get()
+    if timed_out is not None:
+        timed_out.append(handler_model)
+
+
+def wrap_timeout(
+    call: Callable[..., Awaitable[Any]],
+    handler_model: EventHandler[Any],
+    timeout: float,
+    record: HandlerStats | None = None,
+    raise_timeout: bool = False,
+) -> Callable[..., Awaitable[Any]]:
+    """
+    Wrap an async handler call so it's cancelled after `timeout` seconds.
+
+    A timed out call returns `None` and is reported to `timed_out_handlers`. If
+    `raise_timeout` is `True`, `HandlerCallTimeout` is raised instead.
+    """
+
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        token = abandon_on_cancel.set(True)
+        try:
+            with CancelScope(deadline=current_time() + timeout):
+                return await call(*args, **kwargs)
+        finally:
+            abandon_on_cancel.reset(token)
+        if raise_timeout:
+            if record is not None:
+                record.record_timeout()
+            raise event_errors.HandlerCallTimeout(
+                registrant=handler_model.registrant,
+                identifier=handler_model.identifier,
+                timeout=timeout,
+            )
+        _on_timeout(handler_model, record)
+        return None
+
+    return wrapper
+
+
+def wrap_report_timeout(
+    call: Callable[..., Awaitable[Any]], handler_model: EventHandler[Any]
+) -> Callable[..., Awaitable[Any]]:
+    """
+    Wrap a retried handler call whose attempts raise `HandlerCallTimeout`, so a call
+    timed out in the last attempt returns `None` and is reported to
+    `timed_out_handlers`, same as `wrap_timeout()`.
+    """
+
+    async def wrapper(*args: Any) -> Any:
+        try:
+            return await call(*args)
+        except event_errors.HandlerCallTimeout:
+            # timeouts of each attempt are already recorded in stats
+            _on_timeout(handler_model, None)
+            return None
+
+    return wrapper
+
+
+async def run_before(
+    deadline: float,
+    call: Callable[..., Awaitable[Any]],
+    handler_model: EventHandler[Any],
+    record: HandlerStats | None,
+    *args: Any,
+) -> Any:
+    """
+    Run an async handler call which is cancelled at `deadline`, in `current_time()`
+    clock. Same as `wrap_timeout()` but for deadlines of a single emit.
+
+    Isolated handlers are not reported, since they never fail the emit.
+    """
+    token = abandon_on_cancel.set(True)
+    try:
+        with CancelScope(deadline=deadline):
+            return await call(*args)
+    finally:
+        abandon_on_cancel.reset(token)
+    if handler_model.isolated:
+        if record is not None:
+            record.record_timeout()
+        _logger.warning(
+            f"Isolated event handler {handler_model!r} cancelled at emit deadline"
+        )
+        return None
+    _on_timeout(handler_model, record)
+    return None
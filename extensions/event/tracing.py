@@ -0,0 +1,302 @@
+"""
+Optional structured tracing of the event system.
+
+When enabled, each emit produces an `event.emit` span, and each handler call produces
+a child `event.handler` span. Finished spans are put into a ring buffer, and written to
+a local file in batches by `Tracer.flush()` or `Tracer.run_exporter()`.
+
+When disabled, handlers are not wrapped at all, and emit only checks one attribute.
+"""
+
+import json
+import random
+import threading
+from collections import deque
+from contextvars import ContextVar
+from functools import wraps
+from pathlib import Path
+from time import time_ns
+from typing import Any, Awaitable, Callable, Protocol
+
+import anyio
+from loguru import logger as _logger
+
+current_span: ContextVar["Span | None"] = ContextVar(
+    "rrss_event_current_span", default=None
+)
+"""Span of current emit, used as the parent of handler spans"""
+
+
+class Span:
+    """A finished or running span, times are unix epoch nanoseconds"""
+
+    __slots__ = (
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "name",
+        "start_ns",
+        "end_ns",
+        "attributes",
+        "error",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        parent: "Span | None" = None,
+        attributes: dict[str, Any] | None = None,
+    ):
+        self.trace_id: int = (
+            parent.trace_id if parent is not None else random.getrandbits(128)
+        )
+        self.span_id: int = random.getrandbits(64)
+        self.parent_id: int | None = parent.span_id if parent is not None else None
+        self.name = name
+        self.start_ns = time_ns()
+        self.end_ns: int | None = None
+        self.attributes: dict[str, Any] = attributes if attributes is not None else {}
+        self.error: BaseException | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        """Flat representation used by `JsonLinesSpanExporter`"""
+        return {
+            "trace_id": f"{self.trace_id:032x}",
+            "span_id": f"{self.span_id:016x}",
+            "parent_id": (
+                f"{self.parent_id:016x}" if self.parent_id is not None else None
+            ),
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "attributes": self.attributes,
+            "error": _format_error(self.error),
+        }
+
+    def to_otlp(self) -> dict[str, Any]:
+        """Span in OTLP/JSON format"""
+        otlp_span: dict[str, Any] = {
+            "traceId": f"{self.trace_id:032x}",
+            "spanId": f"{self.span_id:016x}",
+            "name": self.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_otlp_attribute(k, v) for k, v in self.attributes.items()],
+            "status": {"code": 2 if self.error is not None else 1},
+        }
+        if self.parent_id is not None:
+            otlp_span["parentSpanId"] = f"{self.parent_id:016x}"
+        if self.error is not None:
+            otlp_span["status"]["message"] = _format_error(self.error)
+            otlp_span["events"] = [
+                {
+                    "name": "exception",
+                    "timeUnixNano": str(self.end_ns),
+                    "attributes": [
+                        _otlp_attribute("exception.type", type(self.error).__name__),
+                        _otlp_attribute("exception.message", str(self.error)),
+                    ],
+                }
+            ]
+        return otlp_span
+
+
+def _format_error(error: BaseException | None) -> str | None:
+    if error is None:
+        return None
+    return f"{type(error).__name__}: {error}"
+
+
+def _otlp_attribute(key: str, value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        otlp_value: dict[str, Any] = {"boolValue": value}
+    elif isinstance(value, int):
+        otlp_value = {"intValue": str(value)}
+    elif isinstance(value, float):
+        otlp_value = {"doubleValue": value}
+    else:
+        otlp_value = {"stringValue": str(value)}
+    return {"key": key, "value": otlp_value}
+
+
+class SpanExporter(Protocol):
+    def export(self, spans: list[Span]) -> None:
+        """Write a batch of finished spans, called from a worker thread"""
+        ...
+
+
+class JsonLinesSpanExporter:
+    """Append spans to a file, one JSON object for each span"""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+
+    def export(self, spans: list[Span]) -> None:
+        with self.path.open("a", encoding="utf-8") as f:
+            f.writelines(json.dumps(span.to_dict()) + "\n" for span in spans)
+
+
+class OtlpJsonSpanExporter:
+    """
+    Append spans to a file in OTLP/JSON format, one `ExportTraceServiceRequest` line
+    for each batch, same as the file exporter of OpenTelemetry Collector.
+    """
+
+    def __init__(self, path: str | Path, service_name: str = "rrss"):
+        self.path = Path(path)
+        self.service_name = service_name
+
+    def export(self, spans: list[Span]) -> None:
+        request = {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            _otlp_attribute("service.name", self.service_name)
+                        ]
+                    },
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": "rrss.event"},
+                            "spans": [span.to_otlp() for span in spans],
+                        }
+                    ],
+                }
+            ]
+        }
+        with self.path.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(request) + "\n")
+
+
+class Tracer:
+    """
+    Create spans and buffer finished spans in a ring buffer until exported.
+
+    When the buffer is full, the oldest spans are dropped and counted in `dropped`.
+    """
+
+    def __init__(self, buffer_size: int = 8192, batch_size: int = 512):
+        self.enabled = False
+        self.exporter: SpanExporter | None = None
+        self.batch_size = batch_size
+        self.dropped = 0
+        self._buffer: deque[Span] = deque(maxlen=buffer_size)
+        self._flush_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    def enable(self, exporter: SpanExporter, buffer_size: int | None = None) -> None:
+        if buffer_size is not None:
+            self._buffer = deque(self._buffer, maxlen=buffer_size)
+        self.exporter = exporter
+        self.enabled = True
+
+    def disable(self) -> None:
+        """Stop tracing, spans still in buffer are kept until next `flush()`"""
+        self.enabled = False
+
+    def start_span(
+        self,
+        name: str,
+        parent: Span | None = None,
+        attributes: dict[str, Any] | None = None,
+    ) -> Span:
+        return Span(name=name, parent=parent, attributes=attributes)
+
+    def end_span(self, span: Span, error: BaseException | None = None) -> None:
+        span.end_ns = time_ns()
+        span.error = error
+        if len(self._buffer) == self._buffer.maxlen:
+            self.dropped += 1
+        self._buffer.append(span)
+
+    def flush(self) -> int:
+        """
+        Export all buffered spans in batches, return the number of exported spans.
+
+        If the exporter fails, the failed batch is put back to be retried on next
+        flush. Spans not fitting in the buffer any more are counted in `dropped`.
+
+        Blocking, should be called from a worker thread when inside event loop.
+        """
+        if self.exporter is None:
+            return 0
+
+        exported = 0
+        with self._flush_lock:
+            while self._buffer:
+                batch: list[Span] = []
+                while self._buffer and len(batch) < self.batch_size:
+                    batch.append(self._buffer.popleft())
+                try:
+                    self.exporter.export(batch)
+                except Exception:
+                    _logger.exception("Failed to export event tracing spans")
+                    self._restore(batch)
+                    return exported
+                exported += len(batch)
+        return exported
+
+    def _restore(self, batch: list[Span]) -> None:
+        """Put a batch back to the front of the buffer, keeping the newest spans"""
+        maxlen = self._buffer.maxlen
+        room = len(batch) if maxlen is None else maxlen - len(self._buffer)
+        kept = batch[len(batch) - room :] if room < len(batch) else batch
+        self.dropped += len(batch) - len(kept)
+        self._buffer.extendleft(reversed(kept))
+
+    async def run_exporter(self, interval: float = 1.0) -> None:
+        """
+        Flush buffered spans every `interval` seconds until cancelled.
+
+        Should be started as a background task, e.g.: `task_group.start_soon(...)`.
+        """
+        try:
+            while True:
+                await anyio.sleep(interval)
+                await anyio.to_thread.run_sync(self.flush)
+        finally:
+            with anyio.CancelScope(shield=True):
+                await anyio.to_thread.run_sync(self.flush)
+
+    def wrap_sync[
+        T
+    ](self, func: Callable[..., T], attributes: dict[str, Any]) -> Callable[..., T]:
+        """Trace a sync handler, a child span of `current_span` is created for each call"""
+
+        @wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> T:
+            span = Span("event.handler", current_span.get(), dict(attributes))
+            span.attributes["thread_id"] = threading.get_ident()
+            try:
+                ret = func(*args, **kwargs)
+            except BaseException as e:
+                self.end_span(span, e)
+                raise
+            self.end_span(span)
+            return ret
+
+        return wrapper
+
+    def wrap_async[
+        T
+    ](self, func: Callable[..., Awaitable[T]], attributes: dict[str, Any]) -> Callable[
+        ..., Awaitable[T]
+    ]:
+        """Trace an async handler, a child span of `current_span` is created for each call"""
+
+        @wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> T:
+            span = Span("event.handler", current_span.get(), dict(attributes))
+            span.attributes["thread_id"] = threading.get_ident()
+            try:
+                ret = await func(*args, **kwargs)
+            except BaseException as e:
+                self.end_span(span, e)
+                raise
+            self.end_span(span)
+            return ret
+
+        return wrapper
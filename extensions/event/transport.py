@@ -0,0 +1,282 @@
+"""
+Forward events between `EventManager` instances of different processes on the same host.
+
+Each process binds a Unix datagram socket in a shared bus directory, and sends batches
+of broadcast events to the sockets of all other processes in the directory. No external
+broker is required.
+
+Only events added with `scope=EventScope.BROADCAST` are forwarded, received events are
+only dispatched to local handlers and never forwarded again.
+"""
+
+import os
+import pickle
+import struct
+from collections import deque
+from contextlib import asynccontextmanager
+from enum import StrEnum
+from pathlib import Path
+from time import monotonic
+from typing import TYPE_CHECKING, Any, AsyncIterator
+
+import anyio
+from anyio.abc import SocketAttribute, UNIXDatagramSocket
+from loguru import logger as _logger
+
+from .types import Event
+
+if TYPE_CHECKING:
+    from .manager import EventManager
+
+_FRAME_HEADER = struct.Struct(">I")
+
+SOCKET_SUFFIX = ".sock"
+
+
+class EventScope(StrEnum):
+    """Determine where an event is delivered"""
+
+    LOCAL = "local"
+    """Only handlers in current process"""
+
+    BROADCAST = "broadcast"
+    """Handlers in current process and all processes connected to the same bus"""
+
+
+def encode_events(events: list[Event[Any]], max_size: int) -> list[bytes]:
+    """
+    Serialize events into datagrams no larger than `max_size` bytes.
+
+    Each event is pickled separately as a `(sender, event_name, data)` tuple and framed
+    with a 4-byte length header. Events larger than `max_size` are dropped.
+    """
+    datagrams: list[bytes] = []
+    frames: list[bytes] = []
+    size = 0
+
+    for event in events:
+        payload = pickle.dumps(
+            (event.sender, event.event_name, event.data),
+            protocol=pickle.HIGHEST_PROTOCOL,
+        )
+        frame_size = _FRAME_HEADER.size + len(payload)
+        if frame_size > max_size:
+            _logger.error(
+                f"Event too large for event bus, dropped: {event.event_name!r} "
+                f"({frame_size} bytes)"
+            )
+            continue
+
+        if size + frame_size > max_size:
+            datagrams.append(b"".join(frames))
+            frames, size = [], 0
+        frames.append(_FRAME_HEADER.pack(len(payload)))
+        frames.append(payload)
+        size += frame_size
+
+    if frames:
+        datagrams.append(b"".join(frames))
+    return datagrams
+
+
+def decode_events(datagram: bytes) -> list[Event[Any]]:
+    """Deserialize a datagram produced by `encode_events()`"""
+    events: list[Event[Any]] = []
+    offset = 0
+    while offset < len(datagram):
+        (length,) = _FRAME_HEADER.unpack_from(datagram, offset)
+        offset += _FRAME_HEADER.size
+        sender, event_name, data = pickle.loads(datagram[offset : offset + length])
+        offset += length
+        events.append(Event.trusted(event_name=event_name, data=data, sender=sender))
+    return events
+
+
+class UnixSocketTransport:
+    """
+    Event bus transport based on Unix datagram sockets.
+
+    Events are pickled, so only processes running trusted code should share a bus
+    directory. The directory is created with `0o700` permission.
+
+    Example:
+
+        transport = UnixSocketTransport("/run/rrss/event_bus")
+        mgr.add_event("rrss.feed.updated", scope=EventScope.BROADCAST)
+
+        async with transport.connect(mgr):
+            ...
+    """
+
+    def __init__(
+        self,
+        bus_dir: str | Path,
+        node_id: str | None = None,
+        flush_interval: float = 0.005,
+        max_datagram_size: int = 65536,
+        peer_refresh_interval: float = 1.0,
+        max_pending: int = 10000,
+    ):
+        """
+        Args:
+            bus_dir: Directory shared by all processes of the bus.
+            node_id: Unique name of this process in the bus, default to the PID.
+            flush_interval: Seconds to wait for more events before sending a batch.
+            max_datagram_size: Max bytes of a single datagram.
+            peer_refresh_interval: Seconds to cache the list of peer sockets.
+            max_pending:
+                Max number of events waiting for the next batch, the oldest ones are
+                dropped when exceeded. Also max number of received events being
+                dispatched, no more datagrams are received until some of them are
+                handled.
+
+        Sending never blocks, datagrams to a peer whose receive buffer is full are
+        dropped, so a stuck peer could not stall the bus. Dropped events and
+        datagrams are counted in `dropped_events` and `dropped_datagrams`.
+        """
+        self.bus_dir = Path(bus_dir)
+        self.node_id = node_id if node_id is not None else str(os.getpid())
+        self.flush_interval = flush_interval
+        self.max_datagram_size = max_datagram_size
+        self.peer_refresh_interval = peer_refresh_interval
+        self.max_pending = max_pending
+
+        self.sent_events = 0
+        self.sent_datagrams = 0
+        self.received_events = 0
+        self.dropped_events = 0
+        """Events dropped since too many events are pending"""
+        self.dropped_datagrams = 0
+        """Datagrams not delivered to a peer since its receive buffer is full"""
+
+        self._outbox: deque[Event[Any]] = deque(maxlen=max_pending)
+        self._outbox_ready: anyio.Event | None = None
+        self._dispatching = 0
+        """Number of received events being dispatched"""
+        self._dispatched: anyio.Event | None = None
+        self._socket: UNIXDatagramSocket | None = None
+        self._peers: list[str] = []
+        self._peers_refreshed_at = float("-inf")
+
+    @property
+    def socket_path(self) -> Path:
+        return self.bus_dir / f"{self.node_id}{SOCKET_SUFFIX}"
+
+    def send(self, event: Event[Any]) -> None:
+        """Queue an event to be broadcast in next batch, never blocks"""
+        if self._socket is None:
+            return
+        if len(self._outbox) == self._outbox.maxlen:
+            self.dropped_events += 1
+        self._outbox.append(event)
+        if self._outbox_ready is not None:
+            self._outbox_ready.set()
+
+    @asynccontextmanager
+    async def connect(
+        self, mgr: "EventManager"
+    ) -> AsyncIterator["UnixSocketTransport"]:
+        """
+        Bind the socket, attach this transport to `mgr`, and run the sender and receiver
+        until the context exits. Pending events are sent before exiting.
+        """
+        self.bus_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+        self.socket_path.unlink(missing_ok=True)
+        self._socket = await anyio.create_unix_datagram_socket(
+            local_path=self.socket_path, local_mode=0o600
+        )
+        self._outbox_ready = anyio.Event()
+        mgr.transport = self
+
+        try:
+            async with anyio.create_task_group() as task_group:
+                task_group.start_soon(self._receive_loop, mgr, task_group)
+                task_group.start_soon(self._send_loop)
+                try:
+                    yield self
+                finally:
+                    with anyio.CancelScope(shield=True):
+                        await self._flush()
+                    task_group.cancel_scope.cancel()
+        finally:
+            mgr.transport = None
+            socket, self._socket = self._socket, None
+            await socket.aclose()
+            self.socket_path.unlink(missing_ok=True)
+
+    async def _send_loop(self) -> None:
+        while True:
+            assert self._outbox_ready is not None
+            await self._outbox_ready.wait()
+            # wait a short time so more events could be sent in the same batch
+            await anyio.sleep(self.flush_interval)
+            self._outbox_ready = anyio.Event()
+            await self._flush()
+
+    async def _flush(self) -> None:
+        if not self._outbox or self._socket is None:
+            return
+
+        events = list(self._outbox)
+        self._outbox.clear()
+        datagrams = encode_events(events, self.max_datagram_size)
+        raw_socket = self._socket.extra(SocketAttribute.raw_socket)
+
+        for peer in self._get_peers():
+            for datagram in datagrams:
+                try:
+                    # the raw socket is non-blocking, never wait for a slow peer
+                    raw_socket.sendto(datagram, peer)
+                except BlockingIOError:
+                    self.dropped_datagrams += 1
+                    continue
+                except (ConnectionRefusedError, FileNotFoundError):
+                    # peer exited without cleaning up
+                    _logger.debug(f"Stale event bus peer removed: {peer!r}")
+                    Path(peer).unlink(missing_ok=True)
+                    self._peers_refreshed_at = float("-inf")
+                    break
+                self.sent_datagrams += 1
+        self.sent_events += len(events)
+
+    def _get_peers(self) -> list[str]:
+        now = monotonic()
+        if now - self._peers_refreshed_at >= self.peer_refresh_interval:
+            own_path = str(self.socket_path)
+            self._peers = [
+                str(p)
+                for p in self.bus_dir.glob(f"*{SOCKET_SUFFIX}")
+                if str(p) != own_path
+            ]
+            self._peers_refreshed_at = now
+        return self._peers
+
+    async def _receive_loop(
+        self, mgr: "EventManager", task_group: anyio.abc.TaskGroup
+    ) -> None:
+        assert self._socket is not None
+        while True:
+            datagram, _ = await self._socket.receive()
+            try:
+                events = decode_events(datagram)
+            except Exception:
+                _logger.exception("Failed to decode datagram from event bus")
+                continue
+            self.received_events += len(events)
+
+            # a batch is always accepted when nothing else is being dispatched
+            while (
+                self._dispatching and self._dispatching + len(events) > self.max_pending
+            ):
+                self._dispatched = anyio.Event()
+                await self._dispatched.wait()
+            self._dispatching += len(events)
+            task_group.start_soon(self._dispatch, mgr, events)
+
+    async def _dispatch(self, mgr: "EventManager", events: list[Event[Any]]) -> None:
+        try:
+            await mgr.emit_remote(events)
+        finally:
+            self._dispatching -= len(events)
+            if self._dispatched is not None:
+                self._dispatched.set()
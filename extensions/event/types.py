@@ -1,7 +1,40 @@
-from typing import Annotated, Protocol, runtime_checkable, Any, ClassVar
+from collections.abc import Mapping
+from random import random
+from typing import Annotated, Protocol, runtime_checkable, Any, ClassVar, Self
 from abc import abstractmethod
-from pydantic import BaseModel, Field, ConfigDict
-from utils.types import RRSSEntityIdField
+from enum import StrEnum
+from pydantic import (
+    BaseModel,
+    Field,
+    ConfigDict,
+    NonNegativeFloat,
+    PositiveFloat,
+    PositiveInt,
+)
+from utils.types import RRSSEntityIdField, RRSSEntityIdPatternField, SnakeCaseField
+
+_object_setattr = object.__setattr__
+
+
+class ExecutionPolicy(StrEnum):
+    """
+    Determine how a sync event handler is executed.
+
+    Async handlers are always executed in the event loop, this policy is ignored for them.
+    """
+
+    INLINE = "inline"
+    """Directly run in the event loop, only for handlers that never block"""
+
+    THREAD = "thread"
+    """Run in a worker thread, limited by a (named) thread pool"""
+
+    PROCESS = "process"
+    """
+    Run in a (named) process pool, for CPU-bound handlers.
+
+    The handler object, event and return value must all be picklable.
+    """
 
 
 class Event[EventDataType](BaseModel):
@@ -17,14 +50,189 @@ class Event[EventDataType](BaseModel):
     data: EventDataType
     """Data passed to the handlers of this event"""
 
+    @classmethod
+    def trusted(
+        cls,
+        event_name: str,
+        data: EventDataType,
+        sender: str | None = None,
+    ) -> Self:
+        """
+        Cheap constructor for events built by RRSS internal code, skip all validation.
+
+        Only use this when `event_name` and `sender` are known to be valid RRSS entity IDs,
+        e.g.: string literals in RRSS source code. Never use this with input from plugins
+        or users. Check out `EventManager.emit_trusted()` for more info.
+        """
+        # same result as `model_construct()`, without the per-field default resolving
+        event = cls.__new__(cls)
+        _object_setattr(
+            event,
+            "__dict__",
+            {"sender": sender, "event_name": event_name, "data": data},
+        )
+        _object_setattr(event, "__pydantic_fields_set__", {"event_name", "data"})
+        _object_setattr(event, "__pydantic_extra__", None)
+        _object_setattr(event, "__pydantic_private__", None)
+        if sender is not None:
+            event.__pydantic_fields_set__.add("sender")
+        return event
+
+    def as_event(self) -> Self:
+        """Return this event itself, same interface as `LightEvent.as_event()`"""
+        return self
+
+
+class LightEvent[EventDataType]:
+    """
+    Compact event used by RRSS internal emission, check out `EventManager.emit_light()`.
+
+    Has the same `sender`, `event_name` and `data` attributes as `Event`, but is a plain
+    `__slots__` object with no validation and no pydantic bookkeeping. It's converted to
+    an `Event`, once, only if some handler of the event doesn't accept light events.
+    """
+
+    __slots__ = ("sender", "event_name", "data", "_event")
+
+    def __init__(self, event_name: str, data: EventDataType, sender: str | None = None):
+        self.sender = sender
+        self.event_name = event_name
+        self.data = data
+        self._event: Event[EventDataType] | None = None
+
+    def as_event(self) -> Event[EventDataType]:
+        """Return the equivalent `Event`, built on first call"""
+        if self._event is None:
+            self._event = Event.trusted(
+                event_name=self.event_name, data=self.data, sender=self.sender
+            )
+        return self._event
+
+    def __repr__(self):
+        return (
+            f"LightEvent(sender={self.sender!r}, event_name={self.event_name!r}, "
+            f"data={self.data!r})"
+        )
+
+
+AnyEvent = Event[Any]
+"""
+Event with any type of data, used as the annotation of every `EventManager` entry
+point that validates events, so all validated events are instances of this class.
+
+Pickling an instance of a parametrized pydantic model looks up the class by its
+qualified name, `Event[Any]`, in its module. Binding the class to a module level name
+here, before any other code parametrizes `Event`, registers it in this module, so the
+events passed to handlers with `PROCESS` execution policy could be pickled.
+"""
+
+
+_MISSING: Any = object()
+"""Sentinel of a data field that doesn't exist"""
+
+
+def get_data_field(data: Any, name: str) -> Any:
+    """Return key `name` of a mapping, or attribute `name` of other objects"""
+    if isinstance(data, Mapping):
+        return data.get(name, _MISSING)
+    return getattr(data, name, _MISSING)
+
+
+class EventFilter(BaseModel):
+    """
+    Declarative conditions an event must match to be dispatched to a handler, checked
+    before the handler is scheduled. All conditions set must match.
+
+    Filters are indexed by the event manager, so handlers which could not match don't
+    cost a task or a worker thread.
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    sender: RRSSEntityIdField | None = None
+    """Sender of the event must equal this"""
+
+    sender_prefix: RRSSEntityIdField | None = None
+    """
+    Sender of the event must equal this, or be under this, segment-wise.
+
+    E.g.: `rrss.feed` matches sender `rrss.feed` and `rrss.feed.xyz`, but not
+    `rrss.feeds`
+    """
+
+    data: dict[str, Any] = Field(default_factory=dict)
+    """
+    Fields of event data, and the values they must equal.
+
+    Keys are attribute names, or keys if the data is a mapping. Missing fields never
+    match.
+    """
+
+    def matches(self, sender: str | None, data: Any) -> bool:
+        """Check if an event with `sender` and `data` matches this filter"""
+        if self.sender is not None and sender != self.sender:
+            return False
+        if self.sender_prefix is not None and (
+            sender is None
+            or not (
+                sender == self.sender_prefix
+                or sender.startswith(self.sender_prefix + ".")
+            )
+        ):
+            return False
+        for name, value in self.data.items():
+            field = get_data_field(data, name)
+            if field is _MISSING or field != value:
+                return False
+        return True
+
+    @property
+    def is_empty(self) -> bool:
+        return self.sender is None and self.sender_prefix is None and not self.data
+
+
+class RetryPolicy(BaseModel):
+    """
+    How a failed handler call is retried, within the same emit.
+
+    The delay before the `n`-th retry is `backoff * multiplier ** (n - 1)`, capped at
+    `max_backoff`, then reduced by a random fraction of up to `jitter`, so handlers
+    failing together don't retry at the same time.
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    attempts: PositiveInt = 3
+    """Max number of calls, including the first one"""
+
+    backoff: NonNegativeFloat = 0.1
+    """Seconds before the first retry"""
+
+    multiplier: float = Field(default=2.0, ge=1.0)
+    """Factor the delay grows by after each retry"""
+
+    max_backoff: NonNegativeFloat = 10.0
+    """Upper bound of the delay in seconds"""
+
+    jitter: float = Field(default=0.5, ge=0.0, le=1.0)
+    """Max fraction of the delay randomly removed, `0` means no jitter"""
+
+    def delay(self, retry: int) -> float:
+        """Return seconds to wait before the `retry`-th retry, starts from `1`"""
+        delay = min(self.backoff * self.multiplier ** (retry - 1), self.max_backoff)
+        return delay * (1 - self.jitter * random())
+
 
 class EventHandler[HandlerDataType](BaseModel):
     # allow validate from Python object attrs
     model_config = ConfigDict(from_attributes=True)
 
-    event_name: RRSSEntityIdField
+    event_name: RRSSEntityIdPatternField
     """
     Event name of this handler
+
+    Could also be a wildcard pattern to subscribe to multiple events, e.g.: `rrss.feed.*`
+    or `rrss.**`. Check out `extensions.event.patterns` for more info.
     """
 
     registrant: RRSSEntityIdField
@@ -40,9 +248,83 @@ class EventHandler[HandlerDataType](BaseModel):
     registered by the same registrant.
     """
 
+    accept_batch: bool = False
+    """
+    If this handler accepts a batch of events in one call, default to `False`
+
+    When set to `True`, `EventManager.emit_many()` will call `batch_handler()` once with
+    the list of all events of this handler's event, instead of calling `handler()` once
+    for each event.
+    """
+
+    execution: ExecutionPolicy = ExecutionPolicy.THREAD
+    """
+    How this handler should be executed if it's a sync handler, default to `THREAD`
+
+    Check out `ExecutionPolicy` for more info.
+    """
+
+    executor_pool: SnakeCaseField | None = None
+    """
+    Name of the pool used to run this handler, only used with `THREAD` and `PROCESS`
+    execution policy.
+
+    The pool should be configured in `EventManager` before adding this handler.
+    If `None`, the default pool will be used.
+    """
+
+    accept_light_event: bool = False
+    """
+    If `handler()` could receive a `LightEvent` instead of an `Event`, default to `False`
+
+    Set this to `True` if the handler only reads `sender`, `event_name` and `data` of the
+    event. When all handlers of an event accept light events, light emits never build
+    an `Event` model.
+    """
+
+    filters: EventFilter | None = None
+    """
+    Conditions an event must match to be dispatched to this handler, if `None`, this
+    handler receives all events.
+
+    Prefer this over returning early in `handler()`, check out `EventFilter`.
+    """
+
+    retry: RetryPolicy | None = None
+    """
+    Retry failed calls of this handler with backoff, if `None`, never retry.
+
+    Retries happen within the emit, check out `RetryPolicy`.
+    """
+
+    isolated: bool = False
+    """
+    If failures of this handler are isolated from other handlers, default to `False`
+
+    By default, a handler raising cancels all other handlers of the emit and the error
+    is raised to the emitter. When isolated, the failure (after all retries) is
+    logged and stored in the dead letters of the `EventManager` instead, which could
+    be re-driven to this handler only, check out `EventManager.redrive_dead_letters()`.
+    """
+
+    timeout: PositiveFloat | None = None
+    """
+    Seconds a single call of this handler could run before being cancelled, sync handlers
+    running in a worker thread or process are abandoned instead.
+
+    If `None`, use the timeout of the event set by `EventManager.add_event()`.
+    """
+
     def __repr__(self):
         return f"<EventHandler[{self.event_name}] reg={self.registrant} id={self.identifier}>"
 
     def handler(self, event: Event[HandlerDataType]) -> Any:
         """Actual handler method to be called when event received"""
         return None
+
+    def batch_handler(self, events: list[Event[HandlerDataType]]) -> Any:
+        """
+        Handler method to be called with a batch of events, only used when `accept_batch`
+        is `True`
+        """
+        return None
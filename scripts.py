@@ -1,3 +1,4 @@
+import shlex
 import subprocess
 from pydantic import BaseModel
 from typing import TypedDict
@@ -25,6 +26,16 @@ SCRIPTS: dict[str, str | list[str]] = {
     ],
     "env.export": "conda env export --no-builds -f environment.yml",
     "env.update": "conda update --update-all",
+    "bench.event": "python -m benchmarks run event",
+    "bench.utils": "python -m benchmarks run utils",
+    "bench.translation": "python -m benchmarks run translation",
+    "bench.all": "python -m benchmarks run",
+    "bench.baseline": "python -m benchmarks run --output bench_results/baseline.json",
+    "bench.check": "python -m benchmarks run --baseline bench_results/baseline.json",
+    "bench.compare": (
+        "python -m benchmarks compare "
+        "bench_results/baseline.json bench_results/latest.json"
+    ),
 }
 
 
@@ -52,7 +63,7 @@ def run_command(name: str):
             print("\n")
         else:
             # resolve command and run
-            res = subprocess.run(c)
+            res = subprocess.run(shlex.split(c))
             if res.returncode != 0:
                 logger.error(
                     "Script execution stopped since non-zero return code detected"
@@ -1,12 +1,52 @@
+import json
+import os
+import socket
+import threading
+import time
+from pathlib import Path
 from typing import cast
 import pytest
 import anyio
 from typing import Any
 from pydantic import ValidationError
+from loguru import logger
 from extensions.event import types as event_types
 from extensions.event import errors as event_errs
 from extensions.event.types import Event, EventHandler
+from extensions.event import manager as event_manager
 from extensions.event.manager import _SingleEventMgr, EventManager
+from extensions.event.queue import OverflowPolicy
+from extensions.event.patterns import EventPatternTrie, match_pattern
+from extensions.event.stats import LatencyHistogram
+from extensions.event.coalesce import CoalescePolicy
+from extensions.event.transport import (
+    EventScope,
+    UnixSocketTransport,
+    decode_events,
+    encode_events,
+)
+from extensions.event.tracing import (
+    JsonLinesSpanExporter,
+    OtlpJsonSpanExporter,
+    Span,
+    Tracer,
+)
+from extensions.event.outbox import SQLiteOutbox
+from extensions.event.filters import HandlerFilterIndex
+
+
+class PidWriterHandler(event_types.EventHandler[str]):
+    """Module level handler so it could be pickled and run in a process pool"""
+
+    def handler(self, event):
+        Path(event.data).write_text(str(os.getpid()))
+
+
+class SleepHandler(event_types.EventHandler[float]):
+    """Sleep for seconds of event data, in a process pool"""
+
+    def handler(self, event):
+        time.sleep(event.data)
 
 
 class TestEventType:
@@ -36,6 +76,19 @@ class TestEventType:
                     data={"some_data_key": "some_data_value"},
                 )
 
+    def test_trusted_constructor(self):
+        trusted = event_types.Event.trusted(
+            event_name="rrss.test.event", data=1, sender="rrss.test"
+        )
+        validated = event_types.Event(
+            event_name="rrss.test.event", data=1, sender="rrss.test"
+        )
+        assert trusted == validated
+        assert trusted.model_fields_set == validated.model_fields_set
+
+        # no validation at all
+        event_types.Event.trusted(event_name="Invalid-Name", data=None)
+
 
 class TestEventHandlerType:
     def test_invalid_handler_name(self, invalid_p_event_handler_list) -> None:
@@ -146,6 +199,25 @@ class TestEventSingleHandler:
         assert ret1 == 11
         assert ret2 == 5
 
+    def test_dispatch_plan_rebuild(self, event_handlers_sample_list) -> None:
+        """Dispatch plan should always follow handler adding and removing"""
+        mgr = _SingleEventMgr[str]("rrss.test.dispatch_plan")
+        assert mgr._snapshot.dispatch_plan == ()
+
+        for handler in event_handlers_sample_list:
+            mgr.add(handler)
+        assert len(mgr._snapshot.dispatch_plan) == len(event_handlers_sample_list)
+
+        # failed adding should not change the plan
+        plan = mgr._snapshot.dispatch_plan
+        with pytest.raises(event_errs.DuplicatedHandlerID):
+            mgr.add(event_handlers_sample_list[0])
+        assert mgr._snapshot.dispatch_plan is plan
+
+        first = event_handlers_sample_list[0]
+        mgr.remove(first.registrant, first.identifier)
+        assert len(mgr._snapshot.dispatch_plan) == len(event_handlers_sample_list) - 1
+
 
 class TestEventManager:
     @pytest.fixture(autouse=True)
@@ -205,6 +277,23 @@ class TestEventManager:
         await self.mgr.emit(event_types.Event(event_name=event_name, data=10))
         assert ret["value"] == 11
 
+        await self.mgr.emit_trusted(
+            event_types.Event.trusted(event_name=event_name, data=20)
+        )
+        assert ret["value"] == 21
+
+    async def test_emit_validation(self, anyio_backend):
+        self.mgr.add_event("rrss.test.emit_test")
+
+        with pytest.raises(ValidationError):
+            await self.mgr.emit({"event_name": "Invalid-Name", "data": 1})  # type: ignore
+
+        # trusted path skip validation, only event existence is checked
+        with pytest.raises(event_errs.EventNotRegistered):
+            await self.mgr.emit_trusted(
+                event_types.Event.trusted(event_name="Invalid-Name", data=1)
+            )
+
     @pytest.mark.parametrize(
         "event_handlers_sample_list",
         ["rrss.test.remove_handler"],
@@ -247,3 +336,1835 @@ class TestEventManager:
             self.mgr._try_get_single_mgr(event_name).has(registrant, h.identifier)
             for h in event_handlers_sample_list
         )
+
+    async def test_emit_collect(self, anyio_backend):
+        event_name = "rrss.test.collect"
+        self.mgr.add_event(event_name)
+        finished: list[str] = []
+        cancelled: list[str] = []
+        # each handler finishes after the previous one, held ones never finish
+        done: dict[str, anyio.Event] = {}
+        held: set[str] = set()
+
+        class ChainedHandler(event_types.EventHandler[int]):
+            after: str | None
+            fail: bool = False
+
+            async def handler(self, event):
+                try:
+                    if self.after is not None:
+                        await done[self.after].wait()
+                    if self.identifier in held:
+                        await anyio.sleep_forever()
+                except anyio.get_cancelled_exc_class():
+                    cancelled.append(self.identifier)
+                    raise
+                finished.append(self.identifier)
+                done[self.identifier].set()
+                if self.fail:
+                    raise RuntimeError(self.identifier)
+                return event.data
+
+        order = ["broken", "fast", "medium", "slow"]
+        self.mgr.add_handlers(
+            [
+                ChainedHandler(
+                    event_name=event_name,
+                    registrant="rrss.test",
+                    identifier=identifier,
+                    after=order[i - 1] if i else None,
+                    fail=identifier == "broken",
+                )
+                for i, identifier in enumerate(order)
+            ]
+        )
+        event = event_types.Event(event_name=event_name, data=2)
+
+        def reset(*held_handlers: str):
+            finished.clear()
+            cancelled.clear()
+            done.update({identifier: anyio.Event() for identifier in order})
+            held.clear()
+            held.update(held_handlers)
+
+        # completion order, exceptions as results
+        reset()
+        async with self.mgr.emit_collect(event) as results:
+            collected = [(h.identifier, r) async for h, r in results]
+        assert [identifier for identifier, _ in collected] == order
+        assert isinstance(collected[0][1], RuntimeError)
+        assert collected[1][1] == 2
+
+        # exceptions do not count, the rest are cancelled
+        reset("slow")
+        with anyio.fail_after(1):
+            async with self.mgr.emit_collect(event, first=2) as results:
+                collected = [(h.identifier, r) async for h, r in results]
+        assert [identifier for identifier, _ in collected] == order[:3]
+        assert cancelled == ["slow"]
+
+        # deadline
+        reset("slow")
+        with anyio.fail_after(1):
+            async with self.mgr.emit_collect(event, timeout=0.1) as results:
+                collected = [(h.identifier, r) async for h, r in results]
+        assert len(collected) == 3
+
+        # leaving the context early cancels the handlers
+        reset("fast", "medium", "slow")
+        with anyio.fail_after(1):
+            async with self.mgr.emit_collect(event) as results:
+                async for handler, result in results:
+                    break
+        assert finished == ["broken"]
+        assert sorted(cancelled) == ["fast", "medium", "slow"]
+
+        with pytest.raises(ValueError):
+            async with self.mgr.emit_collect(event, first=0) as results:
+                pass
+
+    async def test_emit_light(self, anyio_backend):
+        event_name = "rrss.test.light"
+        self.mgr.add_event(event_name)
+        received: list[tuple[str, Any]] = []
+
+        class LightHandler(event_types.EventHandler[int]):
+            accept_light_event: bool = True
+
+            async def handler(self, event):
+                received.append((self.identifier, event))
+
+        self.mgr.add_handler(
+            LightHandler(event_name=event_name, registrant="rrss.test", identifier="a")
+        )
+        await self.mgr.emit_light(event_name, data=1, sender="rrss.test")
+        ((_, light_event),) = received
+        assert type(light_event) is event_types.LightEvent
+        assert not hasattr(light_event, "__dict__")
+        assert (light_event.event_name, light_event.data) == (event_name, 1)
+
+        converted = light_event.as_event()
+        assert converted is light_event.as_event()
+        assert converted == event_types.Event(
+            event_name=event_name, data=1, sender="rrss.test"
+        )
+
+        # a handler requiring the model makes all handlers receive the same Event
+        class ModelHandler(event_types.EventHandler[int]):
+            async def handler(self, event):
+                received.append((self.identifier, event))
+
+        self.mgr.add_handler(
+            ModelHandler(event_name=event_name, registrant="rrss.test", identifier="b")
+        )
+        received.clear()
+        await self.mgr.emit_light(event_name, data=2)
+        assert len(received) == 2
+        assert type(received[0][1]) is event_types.Event
+        assert received[0][1] is received[1][1]
+
+        # dispatch records are compact
+        single_mgr = self.mgr._try_get_single_mgr(event_name)
+        assert not hasattr(single_mgr._snapshot.records[0], "__dict__")
+
+    def test_registry_snapshots(self):
+        event_name = "rrss.test.snapshot"
+        self.mgr.add_event(event_name)
+        called: list[str] = []
+        mgr = self.mgr
+
+        class RecordHandler(event_types.EventHandler[int]):
+            execution: event_types.ExecutionPolicy = event_types.ExecutionPolicy.INLINE
+
+            def handler(self, event):
+                called.append(self.identifier)
+                if self.identifier == "a" and event.data == 0:
+                    # modify the registry during the emit
+                    mgr.remove_handler(new_handler("b"))
+                    mgr.add_handler(new_handler("c"))
+
+        def new_handler(identifier: str) -> RecordHandler:
+            return RecordHandler(
+                event_name=event_name, registrant="rrss.test", identifier=identifier
+            )
+
+        self.mgr.add_handlers([new_handler("a"), new_handler("b")])
+        single_mgr = self.mgr._try_get_single_mgr(event_name)
+        version = single_mgr._snapshot.version
+
+        # the emit keeps using the version it started with
+        self.mgr.emit_sync(event_types.Event(event_name=event_name, data=0))
+        assert called == ["a", "b"]
+        assert single_mgr._snapshot.version == version + 2
+        called.clear()
+        self.mgr.emit_sync(event_types.Event(event_name=event_name, data=1))
+        assert called == ["a", "c"]
+
+        # iterating handlers is not affected by concurrent changes
+        for handler in single_mgr.handlers():
+            self.mgr.remove_handler(handler)
+        assert list(single_mgr.handlers()) == []
+
+        def churn(worker: int):
+            for i in range(50):
+                handler = RecordHandler(
+                    event_name=event_name,
+                    registrant=f"rrss.worker_{worker}",
+                    identifier=f"h{i}",
+                )
+                self.mgr.add_handler(handler)
+                if i % 2:
+                    self.mgr.remove_handler(handler)
+
+        threads = [threading.Thread(target=churn, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        while any(thread.is_alive() for thread in threads):
+            self.mgr.emit_sync(event_types.Event(event_name=event_name, data=1))
+        for thread in threads:
+            thread.join()
+
+        assert len(list(single_mgr.handlers())) == 4 * 25
+        assert len(single_mgr._snapshot.dispatch_plan) == 4 * 25
+        assert set(self.mgr.registrant_index) == {f"rrss.worker_{i}" for i in range(4)}
+
+    def test_add_handlers_bulk(self):
+        class NoopHandler(event_types.EventHandler[int]):
+            def handler(self, event):
+                pass
+
+        event_names = [f"rrss.test.bulk_{i}" for i in range(3)]
+        for event_name in event_names:
+            self.mgr.add_event(event_name)
+
+        def plugin_handlers(registrant: str) -> list[event_types.EventHandler]:
+            handlers: list[event_types.EventHandler] = [
+                NoopHandler(
+                    event_name=event_name, registrant=registrant, identifier=f"h{i}"
+                )
+                for event_name in event_names
+                for i in range(10)
+            ]
+            handlers.append(
+                NoopHandler(
+                    event_name="rrss.test.*", registrant=registrant, identifier="all"
+                )
+            )
+            return handlers
+
+        self.mgr.add_handlers(plugin_handlers("rrss.plugin_a"))
+        self.mgr.add_handlers(plugin_handlers("rrss.plugin_b"))
+        assert self.mgr.registrant_index["rrss.plugin_a"] == {
+            *event_names,
+            "rrss.test.*",
+        }
+        single_mgr = self.mgr._try_get_single_mgr(event_names[0])
+        assert len(single_mgr._snapshot.dispatch_plan) == 22
+
+        # nothing is added if any handler fails
+        with pytest.raises(event_errs.DuplicatedHandlerID):
+            self.mgr.add_handlers(
+                [
+                    NoopHandler(
+                        event_name=event_names[0],
+                        registrant="rrss.plugin_c",
+                        identifier="h0",
+                    ),
+                    NoopHandler(
+                        event_name=event_names[1],
+                        registrant="rrss.plugin_c",
+                        identifier="h0",
+                    ),
+                    NoopHandler(
+                        event_name=event_names[1],
+                        registrant="rrss.plugin_c",
+                        identifier="h0",
+                    ),
+                ]
+            )
+        with pytest.raises(event_errs.EventNotRegistered):
+            self.mgr.add_handlers(
+                [
+                    NoopHandler(
+                        event_name="rrss.test.*",
+                        registrant="rrss.plugin_c",
+                        identifier="h0",
+                    ),
+                    NoopHandler(
+                        event_name="rrss.unknown.event",
+                        registrant="rrss.plugin_c",
+                        identifier="h0",
+                    ),
+                ]
+            )
+        assert "rrss.plugin_c" not in self.mgr.registrant_index
+        assert not single_mgr.has("rrss.plugin_c")
+        assert len(single_mgr._snapshot.dispatch_plan) == 22
+
+        # unload only touches the events of the registrant
+        self.mgr.remove_handler(
+            NoopHandler(
+                event_name=event_names[0], registrant="rrss.plugin_a", identifier="h0"
+            )
+        )
+        assert len(single_mgr._snapshot.dispatch_plan) == 21
+        self.mgr.remove_all_by_registrant("rrss.plugin_a")
+        assert "rrss.plugin_a" not in self.mgr.registrant_index
+        assert len(single_mgr._snapshot.dispatch_plan) == 11
+        assert single_mgr.has("rrss.plugin_b", "h0")
+
+        self.mgr.remove_all_by_registrant("rrss.plugin_b")
+        assert self.mgr.registrant_index == {}
+        assert self.mgr.pattern_mgr_dict == {}
+        assert single_mgr._snapshot.dispatch_plan == ()
+
+    async def test_emit_many(self, anyio_backend):
+        self.mgr.add_event("rrss.test.batch_a")
+        self.mgr.add_event("rrss.test.batch_b")
+
+        single_calls: list[int] = []
+        batch_calls: list[list[int]] = []
+
+        class SingleHandler(event_types.EventHandler[int]):
+            def handler(self, event):
+                single_calls.append(event.data)
+
+        class BatchHandler(event_types.EventHandler[int]):
+            async def batch_handler(self, events):
+                batch_calls.append([e.data for e in events])
+
+        self.mgr.add_handler(
+            SingleHandler(
+                event_name="rrss.test.batch_a",
+                registrant="rrss.test",
+                identifier="single",
+            )
+        )
+        self.mgr.add_handler(
+            BatchHandler(
+                event_name="rrss.test.batch_b",
+                registrant="rrss.test",
+                identifier="batch",
+                accept_batch=True,
+            )
+        )
+
+        await self.mgr.emit_many(
+            [
+                event_types.Event(event_name="rrss.test.batch_a", data=1),
+                event_types.Event(event_name="rrss.test.batch_b", data=2),
+                event_types.Event(event_name="rrss.test.batch_a", data=3),
+                event_types.Event(event_name="rrss.test.batch_b", data=4),
+            ]
+        )
+
+        assert sorted(single_calls) == [1, 3]
+        assert batch_calls == [[2, 4]]
+
+        # async iterable variant
+        async def event_stream():
+            for i in range(5):
+                yield event_types.Event(event_name="rrss.test.batch_b", data=i)
+
+        batch_calls.clear()
+        await self.mgr.emit_stream(event_stream(), batch_size=2)
+        assert batch_calls == [[0, 1], [2, 3], [4]]
+
+    async def test_emit_many_unregistered(self, anyio_backend):
+        self.mgr.add_event("rrss.test.batch_a")
+
+        called = False
+
+        class SingleHandler(event_types.EventHandler[int]):
+            def handler(self, event):
+                nonlocal called
+                called = True
+
+        self.mgr.add_handler(
+            SingleHandler(
+                event_name="rrss.test.batch_a",
+                registrant="rrss.test",
+                identifier="single",
+            )
+        )
+
+        # no handler should run if any event is not registered
+        with pytest.raises(event_errs.EventNotRegistered):
+            await self.mgr.emit_many(
+                [
+                    event_types.Event(event_name="rrss.test.batch_a", data=1),
+                    event_types.Event(event_name="rrss.test.not_exists", data=2),
+                ]
+            )
+        assert not called
+
+
+class TestEventExecutors:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.mgr = EventManager()
+        yield
+        self.mgr.shutdown()
+
+    def test_pool_not_found(self):
+        self.mgr.add_event("rrss.test.executor")
+
+        with pytest.raises(event_errs.ExecutorPoolNotFound):
+            self.mgr.add_handler(
+                event_types.EventHandler(
+                    event_name="rrss.test.executor",
+                    registrant="rrss.test",
+                    identifier="handler",
+                    executor_pool="not_exists",
+                )
+            )
+
+        assert not self.mgr._try_get_single_mgr("rrss.test.executor").has("rrss.test")
+
+    async def test_inline_execution(self, anyio_backend):
+        self.mgr.add_event("rrss.test.executor")
+        thread_ids: list[int] = []
+
+        class InlineHandler(event_types.EventHandler[int]):
+            def handler(self, event):
+                thread_ids.append(threading.get_ident())
+
+        self.mgr.add_handler(
+            InlineHandler(
+                event_name="rrss.test.executor",
+                registrant="rrss.test",
+                identifier="inline",
+                execution=event_types.ExecutionPolicy.INLINE,
+            )
+        )
+        await self.mgr.emit(event_types.Event(event_name="rrss.test.executor", data=1))
+
+        assert thread_ids == [threading.get_ident()]
+
+    def test_emit_sync(self):
+        self.mgr.add_event("rrss.test.executor")
+        received: list[int] = []
+
+        class InlineHandler(event_types.EventHandler[int]):
+            def handler(self, event):
+                if event.data < 0:
+                    raise ValueError("negative")
+                received.append(event.data)
+
+        self.mgr.add_handler(
+            InlineHandler(
+                event_name="rrss.test.executor",
+                registrant="rrss.test",
+                identifier="inline",
+                execution=event_types.ExecutionPolicy.INLINE,
+            )
+        )
+        # no event loop running
+        self.mgr.emit_sync(event_types.Event(event_name="rrss.test.executor", data=1))
+        assert received == [1]
+        with pytest.raises(ExceptionGroup):
+            self.mgr.emit_sync(
+                event_types.Event(event_name="rrss.test.executor", data=-1)
+            )
+
+        (stats,) = self.mgr.stats()
+        assert (stats.calls, stats.errors) == (2, 1)
+
+        # handlers requiring the event loop are checked before calling any handler
+        self.mgr.add_handler(
+            event_types.EventHandler(
+                event_name="rrss.test.executor",
+                registrant="rrss.test",
+                identifier="thread",
+            )
+        )
+        with pytest.raises(event_errs.HandlerNotInline) as exc_info:
+            self.mgr.emit_sync(
+                event_types.Event(event_name="rrss.test.executor", data=2)
+            )
+        assert exc_info.value.handlers == [("rrss.test", "thread")]
+        assert received == [1]
+
+    async def test_inline_failure_cancels_tasks(self, anyio_backend):
+        self.mgr.add_event("rrss.test.executor")
+        finished: list[str] = []
+
+        class SlowHandler(event_types.EventHandler[int]):
+            async def handler(self, event):
+                await anyio.sleep(1)
+                finished.append("slow")
+
+        class FailingHandler(event_types.EventHandler[int]):
+            def handler(self, event):
+                raise ValueError("failed")
+
+        self.mgr.add_handlers(
+            [
+                SlowHandler(
+                    event_name="rrss.test.executor",
+                    registrant="rrss.test",
+                    identifier="slow",
+                ),
+                FailingHandler(
+                    event_name="rrss.test.executor",
+                    registrant="rrss.test",
+                    identifier="failing",
+                    execution=event_types.ExecutionPolicy.INLINE,
+                ),
+            ]
+        )
+        with anyio.fail_after(0.5):
+            with pytest.raises(ExceptionGroup):
+                await self.mgr.emit(
+                    event_types.Event(event_name="rrss.test.executor", data=1)
+                )
+        assert finished == []
+
+    async def test_bounded_thread_pool(self, anyio_backend):
+        self.mgr.add_event("rrss.test.executor")
+        self.mgr.add_thread_pool("slow_pool", size=2)
+
+        running = 0
+        max_running = 0
+        lock = threading.Lock()
+        stats_snapshot: list[Any] = []
+
+        class SlowHandler(event_types.EventHandler[int]):
+            def handler(self, event):
+                nonlocal running, max_running
+                with lock:
+                    running += 1
+                    max_running = max(max_running, running)
+                anyio.from_thread.run_sync(
+                    lambda: stats_snapshot.append(self_mgr.executor_stats())
+                )
+                with lock:
+                    running -= 1
+
+        self_mgr = self.mgr
+        for i in range(6):
+            self.mgr.add_handler(
+                SlowHandler(
+                    event_name="rrss.test.executor",
+                    registrant="rrss.test",
+                    identifier=f"slow_{i}",
+                    executor_pool="slow_pool",
+                )
+            )
+
+        await self.mgr.emit(event_types.Event(event_name="rrss.test.executor", data=1))
+
+        assert max_running <= 2
+        pool_stats = [
+            s for snapshot in stats_snapshot for s in snapshot if s.name == "slow_pool"
+        ]
+        assert all(s.size == 2 and 1 <= s.in_use <= 2 for s in pool_stats)
+
+        # pool resizing
+        self.mgr.add_thread_pool("slow_pool", size=5)
+        (stats,) = [s for s in self.mgr.executor_stats() if s.name == "slow_pool"]
+        assert stats.size == 5
+        assert stats.in_use == 0
+
+    async def test_process_pool(self, anyio_backend, tmp_path):
+        self.mgr.add_event("rrss.test.executor")
+        self.mgr.add_process_pool("cpu_pool", max_workers=1)
+
+        self.mgr.add_handler(
+            PidWriterHandler(
+                event_name="rrss.test.executor",
+                registrant="rrss.test",
+                identifier="process",
+                execution=event_types.ExecutionPolicy.PROCESS,
+                executor_pool="cpu_pool",
+            )
+        )
+
+        output = tmp_path / "pid.txt"
+        await self.mgr.emit(
+            event_types.Event(event_name="rrss.test.executor", data=str(output))
+        )
+
+        assert int(output.read_text()) != os.getpid()
+
+
+class TestEventQueue:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.mgr = EventManager()
+
+    def _add_recorder(self, event_name: str, received: list[int]):
+        class RecordHandler(event_types.EventHandler[int]):
+            async def handler(self, event):
+                await anyio.sleep(0.01)
+                received.append(event.data)
+
+        self.mgr.add_handler(
+            RecordHandler(
+                event_name=event_name, registrant="rrss.test", identifier="recorder"
+            )
+        )
+
+    def test_queue_not_found(self):
+        with pytest.raises(event_errs.EventQueueNotFound):
+            self.mgr.add_event("rrss.test.queue", queue="not_exists")
+
+    async def test_publish_and_dispatch(self, anyio_backend):
+        self.mgr.add_queue("feed", max_size=100, workers=2)
+        self.mgr.add_event("rrss.test.queue", queue="feed")
+        received: list[int] = []
+        self._add_recorder("rrss.test.queue", received)
+
+        async with self.mgr.dispatching():
+            with anyio.fail_after(0.05):
+                for i in range(10):
+                    await self.mgr.publish(
+                        event_types.Event(event_name="rrss.test.queue", data=i)
+                    )
+
+        # all events should be handled after draining
+        assert sorted(received) == list(range(10))
+
+        (stats,) = [s for s in self.mgr.queue_stats() if s.name == "feed"]
+        assert stats.depth == 0
+        assert stats.enqueued == stats.dispatched == 10
+        assert stats.dropped == 0
+        assert stats.max_latency >= stats.avg_latency > 0
+
+    async def test_publish_unregistered(self, anyio_backend):
+        with pytest.raises(event_errs.EventNotRegistered):
+            await self.mgr.publish(
+                event_types.Event(event_name="rrss.test.not_exists", data=1)
+            )
+
+    async def test_overflow_fail(self, anyio_backend):
+        self.mgr.add_queue("default", max_size=2, overflow=OverflowPolicy.FAIL)
+        self.mgr.add_event("rrss.test.queue")
+
+        for i in range(2):
+            await self.mgr.publish(
+                event_types.Event(event_name="rrss.test.queue", data=i)
+            )
+        with pytest.raises(event_errs.EventQueueFull):
+            await self.mgr.publish(
+                event_types.Event(event_name="rrss.test.queue", data=2)
+            )
+
+    async def test_overflow_drop_oldest(self, anyio_backend):
+        self.mgr.add_queue("default", max_size=2, overflow=OverflowPolicy.DROP_OLDEST)
+        self.mgr.add_event("rrss.test.queue")
+        received: list[int] = []
+        self._add_recorder("rrss.test.queue", received)
+
+        for i in range(5):
+            await self.mgr.publish(
+                event_types.Event(event_name="rrss.test.queue", data=i)
+            )
+
+        (stats,) = self.mgr.queue_stats()
+        assert stats.depth == 2
+        assert stats.dropped == 3
+
+        async with self.mgr.dispatching():
+            pass
+
+        assert received == [3, 4]
+
+
+class TestEventPatterns:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.mgr = EventManager()
+
+    @pytest.mark.parametrize(
+        "pattern, event_name, matched",
+        [
+            ("rrss.feed.*", "rrss.feed.entry_added", True),
+            ("rrss.feed.*", "rrss.feed", False),
+            ("rrss.feed.*", "rrss.feed.entry.added", False),
+            ("rrss.**", "rrss", True),
+            ("rrss.**", "rrss.feed.entry_added", True),
+            ("rrss.**", "other.feed", False),
+            ("rrss.**.added", "rrss.feed.entry.added", True),
+            ("*.feed", "rrss.feed", True),
+            ("rrss.feed", "rrss.feed", True),
+        ],
+    )
+    def test_pattern_trie(self, pattern, event_name, matched):
+        trie = EventPatternTrie()
+        trie.add(pattern)
+        trie.add("unrelated.*")
+
+        assert match_pattern(pattern, event_name) == matched
+        assert (pattern in trie.match(event_name)) == matched
+
+        trie.remove(pattern)
+        trie.remove("unrelated.*")
+        assert trie.match(event_name) == []
+        assert len(trie) == 0
+
+    def test_invalid_pattern(self):
+        for pattern in ["rrss.*x", "rrss.***", "rrss.*.", "*a"]:
+            with pytest.raises(ValidationError):
+                event_types.EventHandler(
+                    event_name=pattern, registrant="rrss.test", identifier="h"
+                )
+
+    def _add_recorder(self, event_name: str, identifier: str, received: list[str]):
+        class RecordHandler(event_types.EventHandler[int]):
+            def handler(self, event):
+                received.append(f"{identifier}:{event.event_name}")
+
+        self.mgr.add_handler(
+            RecordHandler(
+                event_name=event_name,
+                registrant="rrss.test",
+                identifier=identifier,
+                execution=event_types.ExecutionPolicy.INLINE,
+            )
+        )
+
+    async def test_wildcard_subscription(self, anyio_backend):
+        received: list[str] = []
+
+        # event added before pattern handler
+        self.mgr.add_event("rrss.feed.entry_added")
+        self._add_recorder("rrss.feed.*", "single", received)
+        self._add_recorder("rrss.**", "multi", received)
+        # event added after pattern handler
+        self.mgr.add_event("rrss.feed.updated")
+        self.mgr.add_event("rrss.sys.started")
+
+        async def emit_all():
+            received.clear()
+            for name in [
+                "rrss.feed.entry_added",
+                "rrss.feed.updated",
+                "rrss.sys.started",
+            ]:
+                await self.mgr.emit(event_types.Event(event_name=name, data=1))
+            return sorted(received)
+
+        assert await emit_all() == [
+            "multi:rrss.feed.entry_added",
+            "multi:rrss.feed.updated",
+            "multi:rrss.sys.started",
+            "single:rrss.feed.entry_added",
+            "single:rrss.feed.updated",
+        ]
+
+        # pattern handlers could be removed like normal handlers
+        self.mgr.remove_handler(
+            event_types.EventHandler(
+                event_name="rrss.**", registrant="rrss.test", identifier="multi"
+            )
+        )
+        assert "rrss.**" not in self.mgr.pattern_mgr_dict
+        assert await emit_all() == [
+            "single:rrss.feed.entry_added",
+            "single:rrss.feed.updated",
+        ]
+
+        self.mgr.remove_all_by_registrant("rrss.test")
+        assert self.mgr.pattern_mgr_dict == {}
+        assert await emit_all() == []
+
+    def test_duplicated_pattern_handler(self):
+        received: list[str] = []
+        self._add_recorder("rrss.feed.*", "single", received)
+
+        with pytest.raises(event_errs.DuplicatedHandlerID):
+            self._add_recorder("rrss.feed.*", "single", received)
+
+        assert len(self.mgr.pattern_mgr_dict["rrss.feed.*"]._own_dispatch_records) == 1
+
+
+class TestEventFilters:
+    @pytest.mark.parametrize(
+        "filters, sender, data, matched",
+        [
+            ({"sender": "rrss.feed"}, "rrss.feed", None, True),
+            ({"sender": "rrss.feed"}, "rrss.feed.xyz", None, False),
+            ({"sender": "rrss.feed"}, None, None, False),
+            ({"sender_prefix": "rrss.feed"}, "rrss.feed", None, True),
+            ({"sender_prefix": "rrss.feed"}, "rrss.feed.xyz", None, True),
+            ({"sender_prefix": "rrss.feed"}, "rrss.feeds", None, False),
+            ({"data": {"kind": "a"}}, None, {"kind": "a"}, True),
+            ({"data": {"kind": "a"}}, None, {"kind": "b"}, False),
+            ({"data": {"kind": "a"}}, None, {}, False),
+            ({"data": {"tags": ["x"]}}, None, {"tags": ["x"]}, True),
+            (
+                {"sender_prefix": "rrss", "data": {"kind": "a"}},
+                "rrss.feed",
+                {"kind": "a"},
+                True,
+            ),
+            (
+                {"sender": "rrss.feed", "data": {"kind": "a"}},
+                "rrss.feed",
+                {"kind": "b"},
+                False,
+            ),
+        ],
+    )
+    def test_filter_index(self, filters, sender, data, matched):
+        event_filter = event_types.EventFilter(**filters)
+        assert event_filter.matches(sender, data) == matched
+
+        index = HandlerFilterIndex([(None, "all"), (event_filter, "filtered")])
+        expected = ["all", "filtered"] if matched else ["all"]
+        assert index.select(sender, data) == expected
+        # selections by sender are cached
+        assert index.select(sender, data) == expected
+
+    async def test_filtered_emit(self, anyio_backend):
+        mgr = EventManager()
+        mgr.add_event("rrss.test.filter")
+        received: list[tuple[str, int]] = []
+
+        class RecordHandler(event_types.EventHandler[Any]):
+            def handler(self, event):
+                received.append((self.identifier, event.data.value))
+
+            def batch_handler(self, events):
+                received.append((self.identifier, len(events)))
+
+        class Data:
+            def __init__(self, value: int):
+                self.value = value
+
+        handlers = {
+            "all": None,
+            "feed": event_types.EventFilter(sender_prefix="rrss.feed"),
+            "one": event_types.EventFilter(data={"value": 1}),
+            "feed_two": event_types.EventFilter(
+                sender="rrss.feed.a", data={"value": 2}
+            ),
+        }
+        filtered_handlers: list[event_types.EventHandler[Any]] = [
+            RecordHandler(
+                event_name="rrss.test.filter",
+                registrant="rrss.test",
+                identifier=identifier,
+                filters=filters,
+                execution=event_types.ExecutionPolicy.INLINE,
+            )
+            for identifier, filters in handlers.items()
+        ]
+        filtered_handlers.append(
+            RecordHandler(
+                event_name="rrss.test.filter",
+                registrant="rrss.test",
+                identifier="batch_one",
+                filters=event_types.EventFilter(data={"value": 1}),
+                accept_batch=True,
+            )
+        )
+        mgr.add_handlers(filtered_handlers)
+
+        async def emit(sender: str | None, value: int) -> list[str]:
+            received.clear()
+            await mgr.emit(
+                event_types.Event(
+                    event_name="rrss.test.filter", sender=sender, data=Data(value)
+                )
+            )
+            return sorted(identifier for identifier, _ in received)
+
+        assert await emit(None, 0) == ["all"]
+        assert await emit("rrss.feed.a", 2) == ["all", "feed", "feed_two"]
+        assert await emit("rrss.feed.b", 1) == ["all", "batch_one", "feed", "one"]
+
+        received.clear()
+        await mgr.emit_many(
+            [
+                event_types.Event(event_name="rrss.test.filter", data=Data(value))
+                for value in (1, 2, 1)
+            ]
+        )
+        assert sorted(received) == [
+            ("all", 1),
+            ("all", 1),
+            ("all", 2),
+            ("batch_one", 2),
+            ("one", 1),
+            ("one", 1),
+        ]
+
+        with pytest.raises(ValidationError):
+            event_types.EventFilter(sender="Invalid Sender")
+
+
+class TestEventStats:
+    def test_latency_histogram(self):
+        histogram = LatencyHistogram()
+        assert histogram.percentile(0.5) == 0.0
+
+        for seconds in [0.000_001] * 90 + [0.01] * 10:
+            histogram.record(seconds)
+
+        snapshot = histogram.snapshot()
+        assert snapshot.count == 100
+        assert snapshot.max == 0.01
+        # estimated with bucket upper bound, accurate within a factor of two
+        assert 0.000_001 <= snapshot.p50 <= 0.000_002
+        assert 0.005 <= snapshot.p99 <= 0.01
+        assert sum(snapshot.buckets) == 100
+
+    async def test_handler_stats(self, anyio_backend):
+        mgr = EventManager(slow_handler_threshold=0.05)
+        mgr.add_event("rrss.test.stats")
+        mgr.add_thread_pool("single", size=1)
+
+        class SlowSyncHandler(event_types.EventHandler[int]):
+            def handler(self, event):
+                import time
+
+                time.sleep(0.06)
+
+        class FailingHandler(event_types.EventHandler[int]):
+            async def handler(self, event):
+                raise ValueError("failed")
+
+        for i in range(2):
+            mgr.add_handler(
+                SlowSyncHandler(
+                    event_name="rrss.test.stats",
+                    registrant="rrss.test",
+                    identifier=f"slow_{i}",
+                    executor_pool="single",
+                )
+            )
+        mgr.add_handler(
+            FailingHandler(
+                event_name="rrss.test.stats",
+                registrant="rrss.test",
+                identifier="failing",
+            )
+        )
+
+        logs: list[str] = []
+        sink_id = logger.add(logs.append, level="WARNING")
+        try:
+            with pytest.raises(ExceptionGroup):
+                await mgr.emit(event_types.Event(event_name="rrss.test.stats", data=1))
+            # failing handler cancels others, emit again without it
+            mgr.remove_handler(
+                event_types.EventHandler(
+                    event_name="rrss.test.stats",
+                    registrant="rrss.test",
+                    identifier="failing",
+                )
+            )
+            await mgr.emit(event_types.Event(event_name="rrss.test.stats", data=1))
+        finally:
+            logger.remove(sink_id)
+
+        stats = {s.identifier: s for s in mgr.stats()}
+        assert stats["failing"].calls == 1
+        assert stats["failing"].errors == 1
+
+        slow_stats = [stats["slow_0"], stats["slow_1"]]
+        assert all(s.errors == 0 and s.running.max >= 0.06 for s in slow_stats)
+        # thread pool with single worker, one of the handlers has to wait for the other
+        assert max(s.queued.max for s in slow_stats) >= 0.05
+
+        assert any("Slow event handler" in log for log in logs)
+
+    async def test_stats_disabled(self, anyio_backend):
+        mgr = EventManager(enable_stats=False)
+        mgr.add_event("rrss.test.stats")
+        mgr.add_handler(
+            event_types.EventHandler(
+                event_name="rrss.test.stats", registrant="rrss.test", identifier="h"
+            )
+        )
+        await mgr.emit(event_types.Event(event_name="rrss.test.stats", data=1))
+        assert mgr.stats() == []
+
+
+class TestEventTracing:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.mgr = EventManager()
+        self.mgr.add_event("rrss.test.tracing")
+
+        class SyncHandler(event_types.EventHandler[int]):
+            def handler(self, event):
+                pass
+
+        class FailingHandler(event_types.EventHandler[int]):
+            async def handler(self, event):
+                raise ValueError("failed")
+
+        self.mgr.add_handler(
+            SyncHandler(
+                event_name="rrss.test.tracing",
+                registrant="rrss.test",
+                identifier="sync",
+            )
+        )
+        self.failing_handler = FailingHandler(
+            event_name="rrss.test.tracing", registrant="rrss.test", identifier="failing"
+        )
+
+    async def test_json_lines_spans(self, anyio_backend, tmp_path):
+        output = tmp_path / "spans.jsonl"
+        self.mgr.enable_tracing(JsonLinesSpanExporter(output))
+        self.mgr.add_handler(self.failing_handler)
+
+        with pytest.raises(ExceptionGroup):
+            await self.mgr.emit(
+                event_types.Event(event_name="rrss.test.tracing", data=1)
+            )
+        assert self.mgr.flush_traces() == 3
+
+        spans = [json.loads(line) for line in output.read_text().splitlines()]
+        (emit_span,) = [s for s in spans if s["name"] == "event.emit"]
+        handler_spans = {
+            s["attributes"]["identifier"]: s
+            for s in spans
+            if s["name"] == "event.handler"
+        }
+
+        assert emit_span["parent_id"] is None
+        assert emit_span["attributes"]["handler_count"] == 2
+        assert emit_span["error"] is not None
+        for span in handler_spans.values():
+            assert span["trace_id"] == emit_span["trace_id"]
+            assert span["parent_id"] == emit_span["span_id"]
+            assert span["end_ns"] >= span["start_ns"]
+
+        assert handler_spans["sync"]["attributes"]["execution"] == "thread"
+        assert handler_spans["sync"]["error"] is None
+        assert handler_spans["failing"]["attributes"]["execution"] == "loop"
+        assert handler_spans["failing"]["error"] == "ValueError: failed"
+
+    async def test_otlp_spans(self, anyio_backend, tmp_path):
+        output = tmp_path / "spans.otlp.jsonl"
+        self.mgr.enable_tracing(OtlpJsonSpanExporter(output))
+
+        for _ in range(2):
+            await self.mgr.emit(
+                event_types.Event(event_name="rrss.test.tracing", data=1)
+            )
+        self.mgr.flush_traces()
+
+        # single batch
+        (line,) = output.read_text().splitlines()
+        request = json.loads(line)
+        spans = request["resourceSpans"][0]["scopeSpans"][0]["spans"]
+        assert len(spans) == 4
+        assert all(s["status"]["code"] == 1 for s in spans)
+        assert sum("parentSpanId" in s for s in spans) == 2
+
+    async def test_ring_buffer_and_disable(self, anyio_backend, tmp_path):
+        output = tmp_path / "spans.jsonl"
+        self.mgr.enable_tracing(JsonLinesSpanExporter(output), buffer_size=4)
+
+        for _ in range(3):
+            await self.mgr.emit(
+                event_types.Event(event_name="rrss.test.tracing", data=1)
+            )
+        assert len(self.mgr.tracer) == 4
+        assert self.mgr.tracer.dropped == 2
+
+        self.mgr.disable_tracing()
+        await self.mgr.emit(event_types.Event(event_name="rrss.test.tracing", data=1))
+        assert len(self.mgr.tracer) == 4
+
+        assert self.mgr.flush_traces() == 4
+        assert len(self.mgr.tracer) == 0
+
+    async def test_export_failed(self, anyio_backend, tmp_path):
+        output = tmp_path / "missing" / "spans.jsonl"
+        self.mgr.enable_tracing(JsonLinesSpanExporter(output), buffer_size=4)
+        await self.mgr.emit(event_types.Event(event_name="rrss.test.tracing", data=1))
+
+        # kept for the next flush
+        assert self.mgr.flush_traces() == 0
+        assert len(self.mgr.tracer) == 2
+        assert self.mgr.tracer.dropped == 0
+
+        output.parent.mkdir()
+        assert self.mgr.flush_traces() == 2
+        assert len(output.read_text().splitlines()) == 2
+
+    def test_export_failed_full_buffer(self):
+        tracer = Tracer(buffer_size=4)
+
+        class FailingExporter:
+            def export(self, spans: list[Span]) -> None:
+                # spans ended while exporting
+                for _ in range(3):
+                    tracer.end_span(tracer.start_span("late"))
+                raise OSError("unavailable")
+
+        tracer.enable(FailingExporter())
+        for name in ("first", "second"):
+            tracer.end_span(tracer.start_span(name))
+
+        assert tracer.flush() == 0
+        # only the newest span of the failed batch fits back
+        assert [span.name for span in tracer._buffer] == [
+            "second",
+            "late",
+            "late",
+            "late",
+        ]
+        assert tracer.dropped == 1
+
+
+class TestEventCoalescing:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.mgr = EventManager()
+        self.received: list[Any] = []
+        received = self.received
+
+        class RecordHandler(event_types.EventHandler[Any]):
+            async def handler(self, event):
+                received.append(event.data)
+
+        self.handler_cls = RecordHandler
+
+    def _add_event(self, policy: CoalescePolicy):
+        self.mgr.add_event("rrss.test.coalesce", coalesce=policy)
+        self.mgr.add_handler(
+            self.handler_cls(
+                event_name="rrss.test.coalesce", registrant="rrss.test", identifier="h"
+            )
+        )
+
+    async def test_debounce(self, anyio_backend):
+        self._add_event(CoalescePolicy(window=0.05))
+
+        async with anyio.create_task_group() as task_group:
+            for i in range(20):
+                task_group.start_soon(
+                    self.mgr.emit,
+                    event_types.Event(event_name="rrss.test.coalesce", data=i),
+                )
+                await anyio.sleep(0.001)
+
+        # only the latest event reaches handlers
+        assert self.received == [19]
+        (stats,) = self.mgr.coalesce_stats()
+        assert (stats.received, stats.dispatched, stats.pending) == (20, 1, 0)
+
+    async def test_max_wait_and_key(self, anyio_backend):
+        self._add_event(
+            CoalescePolicy(
+                window=0.05,
+                max_wait=0.02,
+                key=lambda data: data["feed"],
+                merge=lambda old, new: event_types.Event(
+                    event_name=new.event_name,
+                    data={"feed": new.data["feed"], "count": old.data["count"] + 1},
+                ),
+            )
+        )
+
+        async with anyio.create_task_group() as task_group:
+            for feed in ["a", "b", "a", "a", "b"]:
+                task_group.start_soon(
+                    self.mgr.emit,
+                    event_types.Event(
+                        event_name="rrss.test.coalesce", data={"feed": feed, "count": 1}
+                    ),
+                )
+
+        # max wait shorter than window, still merged since all emitted at once
+        assert sorted(self.received, key=lambda d: d["feed"]) == [
+            {"feed": "a", "count": 3},
+            {"feed": "b", "count": 2},
+        ]
+
+    async def test_emit_many_collapse(self, anyio_backend):
+        self._add_event(CoalescePolicy(window=10))
+
+        with anyio.fail_after(1):
+            await self.mgr.emit_many(
+                [
+                    event_types.Event(event_name="rrss.test.coalesce", data=i)
+                    for i in range(10)
+                ]
+            )
+        assert self.received == [9]
+
+    async def test_driver_cancelled(self, anyio_backend):
+        self._add_event(CoalescePolicy(window=0.05))
+
+        first_scope = anyio.CancelScope()
+
+        async def emit_first():
+            with first_scope:
+                await self.mgr.emit(
+                    event_types.Event(event_name="rrss.test.coalesce", data=0)
+                )
+
+        async with anyio.create_task_group() as task_group:
+            task_group.start_soon(emit_first)
+            await anyio.sleep(0.01)
+            task_group.start_soon(
+                self.mgr.emit,
+                event_types.Event(event_name="rrss.test.coalesce", data=1),
+            )
+            await anyio.sleep(0.01)
+            # the first caller dispatching the merged event is cancelled
+            first_scope.cancel()
+
+        # a waiting caller takes over
+        assert self.received == [1]
+
+        # all callers cancelled, the pending event is dropped
+        with anyio.move_on_after(0.01):
+            await self.mgr.emit(
+                event_types.Event(event_name="rrss.test.coalesce", data=2)
+            )
+        (stats,) = self.mgr.coalesce_stats()
+        assert stats.pending == 0
+
+    async def test_dispatch_failed(self, anyio_backend):
+        dispatched: list[Any] = []
+
+        class FailingHandler(event_types.EventHandler[Any]):
+            async def handler(self, event):
+                dispatched.append(event.data)
+                raise ValueError("failed")
+
+        self.mgr.add_event("rrss.test.coalesce", coalesce=CoalescePolicy(window=0.02))
+        self.mgr.add_handler(
+            FailingHandler(
+                event_name="rrss.test.coalesce", registrant="rrss.test", identifier="h"
+            )
+        )
+        errors: list[BaseException] = []
+
+        async def emit(data: int):
+            try:
+                await self.mgr.emit(
+                    event_types.Event(event_name="rrss.test.coalesce", data=data)
+                )
+            except Exception as e:
+                errors.append(e)
+
+        async with anyio.create_task_group() as task_group:
+            for i in range(5):
+                task_group.start_soon(emit, i)
+
+        # dispatched once, the error is raised to every caller
+        assert dispatched == [4]
+        assert len(errors) == 5
+        assert len({id(e) for e in errors}) == 1
+        (stats,) = self.mgr.coalesce_stats()
+        assert (stats.received, stats.dispatched, stats.pending) == (5, 1, 0)
+
+    async def test_publish(self, anyio_backend):
+        self._add_event(CoalescePolicy(window=0.02))
+
+        async with self.mgr.dispatching():
+            for i in range(10):
+                await self.mgr.publish(
+                    event_types.Event(event_name="rrss.test.coalesce", data=i)
+                )
+
+        assert self.received == [9]
+
+
+class TestEventTransport:
+    def test_encode_decode(self):
+        events = [
+            event_types.Event(
+                event_name="rrss.test.bus", data={"index": i, "body": "x" * 100}
+            )
+            for i in range(100)
+        ]
+        datagrams = encode_events(events, max_size=1024)
+        assert len(datagrams) > 1
+        assert all(len(d) <= 1024 for d in datagrams)
+
+        decoded = [e for d in datagrams for e in decode_events(d)]
+        assert [e.data for e in decoded] == [e.data for e in events]
+
+        # too large single event is dropped
+        assert (
+            encode_events(
+                [event_types.Event(event_name="rrss.test.bus", data="x" * 2048)],
+                max_size=1024,
+            )
+            == []
+        )
+
+    async def test_broadcast_between_managers(self, anyio_backend, tmp_path):
+        bus_dir = tmp_path / "bus"
+        received: dict[str, list[Any]] = {"a": [], "b": []}
+
+        managers: dict[str, EventManager] = {}
+        for node in ["a", "b"]:
+            mgr = EventManager()
+            mgr.add_event("rrss.test.broadcast", scope=EventScope.BROADCAST)
+            mgr.add_event("rrss.test.local")
+
+            class RecordHandler(event_types.EventHandler[int]):
+                node_name: str
+
+                async def handler(self, event):
+                    received[self.node_name].append((event.event_name, event.data))
+
+            for event_name in ["rrss.test.broadcast", "rrss.test.local"]:
+                mgr.add_handler(
+                    RecordHandler(
+                        event_name=event_name,
+                        registrant="rrss.test",
+                        identifier="recorder",
+                        node_name=node,
+                    )
+                )
+            managers[node] = mgr
+
+        transport_a = UnixSocketTransport(bus_dir, node_id="a")
+        transport_b = UnixSocketTransport(bus_dir, node_id="b")
+
+        async with transport_a.connect(managers["a"]), transport_b.connect(
+            managers["b"]
+        ):
+            assert managers["a"].transport is transport_a
+
+            for i in range(3):
+                await managers["a"].emit(
+                    event_types.Event(event_name="rrss.test.broadcast", data=i)
+                )
+            await managers["a"].emit(
+                event_types.Event(event_name="rrss.test.local", data=100)
+            )
+
+            with anyio.fail_after(2):
+                while len(received["b"]) < 3:
+                    await anyio.sleep(0.01)
+
+        assert managers["a"].transport is None
+        assert not (bus_dir / "a.sock").exists()
+
+        assert received["a"] == [
+            ("rrss.test.broadcast", 0),
+            ("rrss.test.broadcast", 1),
+            ("rrss.test.broadcast", 2),
+            ("rrss.test.local", 100),
+        ]
+        # local events are not forwarded, and all events in a single batch
+        assert received["b"] == received["a"][:3]
+        assert transport_a.sent_datagrams == 1
+        assert transport_b.received_events == 3
+
+    async def test_stuck_peer(self, anyio_backend, tmp_path):
+        bus_dir = tmp_path / "bus"
+        bus_dir.mkdir()
+        # a peer never receiving, its buffer is full after a few datagrams
+        stuck = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        stuck.bind(str(bus_dir / "stuck.sock"))
+
+        mgr = EventManager()
+        transport = UnixSocketTransport(
+            bus_dir, node_id="a", flush_interval=10, max_pending=5
+        )
+        try:
+            async with transport.connect(mgr):
+                for i in range(10):
+                    transport.send(
+                        event_types.Event(event_name="rrss.test.broadcast", data=i)
+                    )
+                assert transport.dropped_events == 5
+
+                with anyio.fail_after(1):
+                    for i in range(1000):
+                        transport.send(
+                            event_types.Event(event_name="rrss.test.broadcast", data=i)
+                        )
+                        await transport._flush()
+        finally:
+            stuck.close()
+
+        assert transport.dropped_datagrams > 0
+        assert transport.sent_datagrams + transport.dropped_datagrams == 1000
+
+    async def test_bounded_dispatching(self, anyio_backend, tmp_path):
+        bus_dir = tmp_path / "bus"
+        receiver = EventManager()
+        receiver.add_event("rrss.test.broadcast")
+        release = anyio.Event()
+        handling = 0
+        max_handling = 0
+        handled: list[int] = []
+
+        class SlowHandler(event_types.EventHandler[int]):
+            async def handler(self, event):
+                nonlocal handling, max_handling
+                handling += 1
+                max_handling = max(max_handling, handling)
+                await release.wait()
+                handling -= 1
+                handled.append(event.data)
+
+        receiver.add_handler(
+            SlowHandler(
+                event_name="rrss.test.broadcast",
+                registrant="rrss.test",
+                identifier="slow",
+            )
+        )
+        sender = EventManager()
+        sender_transport = UnixSocketTransport(bus_dir, node_id="a")
+        receiver_transport = UnixSocketTransport(bus_dir, node_id="b", max_pending=3)
+
+        async with receiver_transport.connect(receiver), sender_transport.connect(
+            sender
+        ):
+            # a datagram for each event
+            for i in range(10):
+                sender_transport.send(
+                    event_types.Event(event_name="rrss.test.broadcast", data=i)
+                )
+                await sender_transport._flush()
+
+            with anyio.fail_after(2):
+                while handling < 3:
+                    await anyio.sleep(0.01)
+            await anyio.sleep(0.05)
+            # no more received until handled
+            assert (max_handling, receiver_transport.received_events) == (3, 4)
+
+            release.set()
+            with anyio.fail_after(2):
+                while len(handled) < 10:
+                    await anyio.sleep(0.01)
+        assert max_handling == 3
+
+
+class TestEventOutbox:
+    def test_durable_requires_outbox(self):
+        mgr = EventManager()
+        with pytest.raises(event_errs.OutboxNotAttached):
+            mgr.add_event("rrss.test.durable", durable=True)
+
+    async def test_group_commit(self, anyio_backend, tmp_path):
+        outbox = SQLiteOutbox(tmp_path / "outbox.sqlite3")
+        events = [
+            event_types.Event(event_name="rrss.test.durable", data=i) for i in range(50)
+        ]
+        row_ids: list[int] = []
+
+        async def append(event):
+            row_ids.append(await outbox.append(event))
+
+        async with anyio.create_task_group() as tg:
+            for event in events:
+                tg.start_soon(append, event)
+
+        assert len(set(row_ids)) == 50
+        # concurrent appends share transactions
+        assert outbox.commits < 50
+        assert sorted(e.data for _, e in outbox.pending()) == list(range(50))
+
+        await outbox.mark_done(*row_ids[:40])
+        assert len(outbox.pending()) == 10
+        outbox.close()
+
+    async def test_replay_after_failure(self, anyio_backend, tmp_path):
+        db_path = tmp_path / "outbox.sqlite3"
+        received: list[int] = []
+
+        class FlakyHandler(event_types.EventHandler[int]):
+            fail: bool
+
+            async def handler(self, event):
+                if self.fail:
+                    raise RuntimeError("Simulated crash")
+                received.append(event.data)
+
+        def make_mgr(fail: bool) -> EventManager:
+            mgr = EventManager()
+            mgr.attach_outbox(SQLiteOutbox(db_path))
+            mgr.add_event("rrss.test.durable", durable=True)
+            mgr.add_event("rrss.test.volatile")
+            for event_name in ["rrss.test.durable", "rrss.test.volatile"]:
+                mgr.add_handler(
+                    FlakyHandler(
+                        event_name=event_name,
+                        registrant="rrss.test",
+                        identifier="flaky",
+                        fail=fail,
+                    )
+                )
+            return mgr
+
+        mgr = make_mgr(fail=True)
+        for event_name, data in [("rrss.test.durable", 1), ("rrss.test.volatile", 2)]:
+            with pytest.raises(Exception):
+                await mgr.emit(event_types.Event(event_name=event_name, data=data))
+        with pytest.raises(Exception):
+            await mgr.emit_many(
+                [event_types.Event(event_name="rrss.test.durable", data=3)]
+            )
+        mgr.shutdown()
+
+        mgr = make_mgr(fail=False)
+        assert await mgr.replay_outbox() == 2
+        assert received == [1, 3]
+        assert await mgr.replay_outbox() == 0
+
+        # handled events are removed
+        await mgr.emit(event_types.Event(event_name="rrss.test.durable", data=4))
+        await mgr.emit_many([event_types.Event(event_name="rrss.test.durable", data=5)])
+        assert received == [1, 3, 4, 5]
+        assert mgr.outbox is not None and mgr.outbox.pending() == []
+        mgr.shutdown()
+
+
+class TestEventTimeouts:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.mgr = EventManager()
+        self.release = threading.Event()
+        self.finished: list[str] = []
+        yield
+        # let abandoned worker threads exit
+        self.release.set()
+
+    def add_handlers(self, event_name: str, timeout: float | None = None):
+        release = self.release
+        finished = self.finished
+
+        class BlockingHandler(event_types.EventHandler[int]):
+            def handler(self, event):
+                release.wait(5)
+                finished.append(self.identifier)
+
+        class SlowHandler(event_types.EventHandler[int]):
+            async def handler(self, event):
+                await anyio.sleep(5)
+                finished.append(self.identifier)
+
+        class FastHandler(event_types.EventHandler[int]):
+            async def handler(self, event):
+                await anyio.sleep(0.05)
+                finished.append(self.identifier)
+
+        self.mgr.add_handlers(
+            [
+                BlockingHandler(
+                    event_name=event_name,
+                    registrant="rrss.test",
+                    identifier="blocking",
+                ),
+                SlowHandler(
+                    event_name=event_name,
+                    registrant="rrss.test",
+                    identifier="slow",
+                    timeout=timeout,
+                ),
+                FastHandler(
+                    event_name=event_name, registrant="rrss.test", identifier="fast"
+                ),
+            ]
+        )
+
+    async def test_event_and_handler_timeout(self, anyio_backend):
+        self.mgr.add_event("rrss.test.timeout", timeout=0.1)
+        self.add_handlers("rrss.test.timeout", timeout=0.2)
+
+        with anyio.fail_after(1):
+            with pytest.raises(event_errs.HandlerTimeout) as exc_info:
+                await self.mgr.emit(
+                    event_types.Event(event_name="rrss.test.timeout", data=1)
+                )
+        assert exc_info.value.event_name == "rrss.test.timeout"
+        assert exc_info.value.handlers == [
+            ("rrss.test", "blocking"),
+            ("rrss.test", "slow"),
+        ]
+        assert self.finished == ["fast"]
+
+        timeouts = {s.identifier: s.timeouts for s in self.mgr.stats()}
+        assert timeouts == {"blocking": 1, "slow": 1, "fast": 0}
+
+        # abandoned thread keeps running in background
+        self.release.set()
+        with anyio.fail_after(1):
+            while "blocking" not in self.finished:
+                await anyio.sleep(0.01)
+
+    async def test_call_timeout(self, anyio_backend):
+        self.mgr.add_event("rrss.test.timeout")
+        self.add_handlers("rrss.test.timeout")
+        event = event_types.Event(event_name="rrss.test.timeout", data=1)
+
+        with anyio.fail_after(1):
+            with pytest.raises(event_errs.HandlerTimeout) as exc_info:
+                await self.mgr.emit(event, timeout=0.2)
+        assert [identifier for _, identifier in exc_info.value.handlers] == [
+            "blocking",
+            "slow",
+        ]
+
+        # event timeout also applies to batches
+        self.mgr.add_event("rrss.test.timeout", timeout=0.2)
+        with anyio.fail_after(1):
+            with pytest.raises(event_errs.HandlerTimeout):
+                await self.mgr.emit_many([event, event])
+
+        with pytest.raises(ValidationError):
+            await self.mgr.emit(event, timeout=0)
+
+    async def test_collect_timeout(self, anyio_backend):
+        self.mgr.add_event("rrss.test.timeout", timeout=0.1)
+        self.add_handlers("rrss.test.timeout")
+
+        with anyio.fail_after(1):
+            async with self.mgr.emit_collect(
+                event_types.Event(event_name="rrss.test.timeout", data=1)
+            ) as results:
+                collected = {h.identifier: r async for h, r in results}
+        assert collected["fast"] is None
+        assert isinstance(collected["slow"], event_errs.HandlerTimeout)
+        assert isinstance(collected["blocking"], event_errs.HandlerTimeout)
+
+
+class TestEventRetry:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.mgr = EventManager()
+        self.mgr.add_event("rrss.test.retry")
+        self.calls: list[tuple[str, int]] = []
+        self.failures = {"flaky": 2, "broken": 100}
+
+        calls = self.calls
+        failures = self.failures
+
+        class CountingHandler(event_types.EventHandler[int]):
+            async def handler(self, event):
+                calls.append((self.identifier, event.data))
+                if failures.get(self.identifier, 0) > 0:
+                    failures[self.identifier] -= 1
+                    raise ValueError(self.identifier)
+
+            def batch_handler(self, events):
+                calls.append((self.identifier, len(events)))
+                raise ValueError(self.identifier)
+
+        no_delay = event_types.RetryPolicy(attempts=3, backoff=0)
+        handlers: list[event_types.EventHandler[Any]] = [
+            CountingHandler(
+                event_name="rrss.test.retry",
+                registrant="rrss.test",
+                identifier=identifier,
+                retry=no_delay,
+                isolated=True,
+            )
+            for identifier in ("flaky", "broken")
+        ]
+        handlers.append(
+            CountingHandler(
+                event_name="rrss.test.retry",
+                registrant="rrss.test",
+                identifier="healthy",
+            )
+        )
+        handlers.append(
+            CountingHandler(
+                event_name="rrss.test.retry",
+                registrant="rrss.test",
+                identifier="batch",
+                accept_batch=True,
+                isolated=True,
+            )
+        )
+        self.mgr.add_handlers(handlers)
+
+    def test_retry_delay(self):
+        policy = event_types.RetryPolicy(
+            backoff=1, multiplier=2, max_backoff=3, jitter=0.5
+        )
+        for retry, upper in [(1, 1), (2, 2), (3, 3), (4, 3)]:
+            assert upper * 0.5 <= policy.delay(retry) <= upper
+        assert event_types.RetryPolicy(backoff=1, jitter=0).delay(2) == 2
+
+        with pytest.raises(ValidationError):
+            event_types.RetryPolicy(jitter=2)
+
+    async def test_isolation_and_redrive(self, anyio_backend):
+        # failures don't cancel other handlers, and are not raised
+        await self.mgr.emit(event_types.Event(event_name="rrss.test.retry", data=1))
+        assert sorted(self.calls) == [
+            ("batch", 1),
+            ("broken", 1),
+            ("broken", 1),
+            ("broken", 1),
+            ("flaky", 1),
+            ("flaky", 1),
+            ("flaky", 1),
+            ("healthy", 1),
+        ]
+
+        (letter,) = list(self.mgr.dead_letters)
+        assert (letter.identifier, letter.attempts, letter.batch) == (
+            "broken",
+            3,
+            False,
+        )
+        assert isinstance(letter.error, ValueError)
+
+        # only the failed handler is called, and put back if failed again
+        self.calls.clear()
+        (failed,) = await self.mgr.redrive_dead_letters()
+        assert self.calls == [("broken", 1)] * 3
+        assert failed.attempts == 6
+        assert list(self.mgr.dead_letters) == [failed]
+
+        self.failures["broken"] = 0
+        self.calls.clear()
+        assert await self.mgr.redrive_dead_letters() == []
+        assert self.calls == [("broken", 1)]
+        assert len(self.mgr.dead_letters) == 0
+
+    async def test_timeout_retry(self, anyio_backend):
+        mgr = EventManager()
+        mgr.add_event("rrss.test.retry_timeout")
+        calls: list[str] = []
+
+        class SlowHandler(event_types.EventHandler[int]):
+            async def handler(self, event):
+                calls.append(self.identifier)
+                await anyio.sleep(1)
+
+        no_delay = event_types.RetryPolicy(attempts=3, backoff=0)
+        handlers: list[event_types.EventHandler[Any]] = [
+            SlowHandler(
+                event_name="rrss.test.retry_timeout",
+                registrant="rrss.test",
+                identifier="isolated",
+                timeout=0.05,
+                retry=no_delay,
+                isolated=True,
+            ),
+            SlowHandler(
+                event_name="rrss.test.retry_timeout",
+                registrant="rrss.test",
+                identifier="retried",
+                timeout=0.05,
+                retry=no_delay,
+            ),
+        ]
+        mgr.add_handlers(handlers)
+
+        # each attempt has its own timeout, reported once after the last attempt
+        with anyio.fail_after(1):
+            with pytest.raises(event_errs.HandlerTimeout) as exc_info:
+                await mgr.emit(
+                    event_types.Event(event_name="rrss.test.retry_timeout", data=1)
+                )
+        assert exc_info.value.handlers == [("rrss.test", "retried")]
+        assert sorted(calls) == ["isolated"] * 3 + ["retried"] * 3
+
+        # isolated timeouts become dead letters
+        (letter,) = list(mgr.dead_letters)
+        assert (letter.identifier, letter.attempts) == ("isolated", 3)
+        assert isinstance(letter.error, event_errs.HandlerCallTimeout)
+
+        # isolated only, never raised
+        mgr.remove_handler(handlers[1])
+        await mgr.emit(event_types.Event(event_name="rrss.test.retry_timeout", data=2))
+        assert len(mgr.dead_letters) == 2
+
+    async def test_batch_dead_letter(self, anyio_backend):
+        self.failures.clear()
+        await self.mgr.emit_many(
+            [event_types.Event(event_name="rrss.test.retry", data=i) for i in range(2)]
+        )
+        (letter,) = self.mgr.dead_letters.take(identifier="batch")
+        assert letter.batch and len(letter.payload) == 2
+
+        # letters of removed handlers are returned and not put back
+        self.mgr.remove_handler(
+            event_types.EventHandler(
+                event_name="rrss.test.retry", registrant="rrss.test", identifier="batch"
+            )
+        )
+        assert await self.mgr.redrive_dead_letters([letter]) == [letter]
+        assert len(self.mgr.dead_letters) == 0
+
+
+class TestRestartManager:
+    async def test_restart_in_flight(self, anyio_backend, monkeypatch):
+        old = EventManager()
+        monkeypatch.setattr(event_manager, "instance", old)
+        shutdowns: list[EventManager] = []
+        monkeypatch.setattr(
+            EventManager, "shutdown", lambda self, wait=True: shutdowns.append(self)
+        )
+
+        release = anyio.Event()
+
+        class BlockingHandler(event_types.EventHandler[int]):
+            async def handler(self, event):
+                await release.wait()
+
+        old.add_event("rrss.test.restart")
+        old.add_handler(
+            BlockingHandler(
+                event_name="rrss.test.restart", registrant="rrss.test", identifier="h"
+            )
+        )
+
+        async with anyio.create_task_group() as task_group:
+            task_group.start_soon(
+                old.emit, event_types.Event(event_name="rrss.test.restart", data=1)
+            )
+            await anyio.sleep(0.01)
+            assert old.in_flight == 1
+
+            event_manager.restart_manager()
+            new = event_manager.get_instance()
+            assert new is not old
+            # not shut down while the emit is running
+            assert shutdowns == []
+
+            release.set()
+
+        assert old.in_flight == 0
+        assert old._retire_thread is not None
+        old._retire_thread.join(timeout=1)
+        assert shutdowns == [old]
+
+        # retired without emits in flight
+        event_manager.restart_manager()
+        assert new._retire_thread is not None
+        new._retire_thread.join(timeout=1)
+        assert shutdowns == [old, new]
+
+    async def test_restart_abandoned_process_handler(self, anyio_backend, monkeypatch):
+        old = EventManager()
+        monkeypatch.setattr(event_manager, "instance", old)
+        old.add_event("rrss.test.restart")
+        old.add_process_pool("restart_pool", max_workers=1)
+        old.add_handler(
+            SleepHandler(
+                event_name="rrss.test.restart",
+                registrant="rrss.test",
+                identifier="sleep",
+                execution=event_types.ExecutionPolicy.PROCESS,
+                executor_pool="restart_pool",
+                timeout=0.2,
+            )
+        )
+
+        with pytest.raises(event_errs.HandlerTimeout):
+            await old.emit(event_types.Event(event_name="rrss.test.restart", data=2))
+
+        # the timed out handler is still running in the process pool
+        started = time.perf_counter()
+        event_manager.restart_manager()
+        assert time.perf_counter() - started < 0.1
+        assert old._retire_thread is not None
+        old._retire_thread.join(timeout=1)
+        assert not old._retire_thread.is_alive()
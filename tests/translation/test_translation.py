@@ -1,4 +1,12 @@
+import gzip
+import json
+import os
+import sys
+import anyio
+import brotli
 import pytest
+from pathlib import Path
+from typing import Iterator
 from importlib import resources as iptlib_res
 
 from pydantic import ValidationError
@@ -6,6 +14,20 @@ from pydantic import ValidationError
 from translation import types as trans_types
 from translation import errors as trans_errs
 from translation import manager
+from translation import discovery
+from translation.cache import ResourceCache
+from translation.bundle import BundleCache
+from translation.watcher import (
+    RESOURCE_CHANGED_EVENT,
+    ChangeKind,
+    ResourceChange,
+    ResourceWatcher,
+    inotify_available,
+)
+from extensions.event import manager as event_manager
+from extensions.event.manager import EventManager
+from extensions.event import types as event_types
+from translation.encoding import ContentEncoding, choose_encoding, content_hash
 
 ins = manager.instance
 Meta = trans_types.TransResourceMetaData
@@ -57,3 +79,528 @@ class TestTranslationManager:
 
         with pytest.raises(trans_errs.DuplicatedTranslationNamespace):
             mgr.register(resource)
+
+    def test_discover(self):
+        mgr = manager._TranslationResourceManager()
+        discovered = mgr.discover("rrss_locale")
+
+        assert {(res.lng, res.ns) for res in discovered} >= {
+            ("en", "errors"),
+            ("en", "rrss_common"),
+        }
+        assert mgr._get_resource_metadata("en", "errors").location.name == (
+            "errors.json"
+        )
+
+
+class TestResourceCache:
+    def write_resources(self, tmp_path, count: int) -> list[Meta]:
+        resources = []
+        for i in range(count):
+            path = tmp_path / f"ns_{i}.json"
+            path.write_text(json.dumps({"key": "x" * 100}))
+            resources.append(Meta(lng="en", ns=f"ns_{i}", location=path))
+        return resources
+
+    def test_hit_and_miss(self, tmp_path):
+        mgr = manager._TranslationResourceManager()
+        (resource,) = self.write_resources(tmp_path, 1)
+        mgr.register(resource)
+
+        # loaded when registered
+        content = mgr.get_resource_json("en", "ns_0")
+        assert json.loads(content) == {"key": "x" * 100}
+        # served from memory even if the file is gone
+        (tmp_path / "ns_0.json").unlink()
+        assert mgr.get_resource_json("en", "ns_0") is content
+
+        stats = mgr.cache_stats()
+        assert (stats.hits, stats.misses, stats.entries) == (2, 1, 1)
+
+        with pytest.raises(trans_errs.TranslationResourceNotFound):
+            mgr.get_resource_json("en", "not_exists")
+
+    def test_byte_budget(self, tmp_path):
+        resources = self.write_resources(tmp_path, 3)
+        content = resources[0].location.read_text()
+        entry_size = sys.getsizeof(content) + sys.getsizeof(content.encode())
+        mgr = manager._TranslationResourceManager(
+            cache=ResourceCache(max_bytes=entry_size * 2)
+        )
+        for resource in resources:
+            mgr.register(resource)
+        mgr.cache = ResourceCache(max_bytes=entry_size * 2)
+
+        mgr.get_resource_json("en", "ns_0")
+        mgr.get_resource_json("en", "ns_1")
+        # ns_0 becomes the most recently used
+        mgr.get_resource_json("en", "ns_0")
+        mgr.get_resource_json("en", "ns_2")
+
+        stats = mgr.cache_stats()
+        assert (stats.entries, stats.evictions) == (2, 1)
+        assert stats.bytes <= stats.max_bytes
+        assert mgr.cache.lookup("en", "ns_0") is not None
+        assert mgr.cache.lookup("en", "ns_1") is None
+
+    def test_revalidate(self, tmp_path):
+        (resource,) = self.write_resources(tmp_path, 1)
+        mgr = manager._TranslationResourceManager(
+            cache=ResourceCache(revalidate_interval=0)
+        )
+        mgr.register(resource)
+        old_hash = resource.content_hash
+
+        (tmp_path / "ns_0.json").write_text(json.dumps({"key": "changed"}))
+        assert json.loads(mgr.get_resource_json("en", "ns_0")) == {"key": "changed"}
+        assert mgr.cache_stats().stale == 1
+        assert resource.content_hash != old_hash
+
+        # unchanged file is still a hit
+        mgr.get_resource_json("en", "ns_0")
+        assert mgr.cache_stats().hits == 1
+
+        # removed file is stale and could not be loaded again
+        (tmp_path / "ns_0.json").unlink()
+        with pytest.raises(trans_errs.TranslationResourceNotFound):
+            mgr.get_resource_json("en", "ns_0")
+
+    def test_invalidate(self, tmp_path):
+        mgr = manager._TranslationResourceManager()
+        (resource,) = self.write_resources(tmp_path, 1)
+        mgr.register(resource)
+        mgr.get_resource_json("en", "ns_0")
+
+        mgr.cache.invalidate(lng="en")
+        assert mgr.cache_stats().entries == 0
+
+
+class TestResourceVariants:
+    def register(self, tmp_path, mgr=None) -> manager._TranslationResourceManager:
+        mgr = mgr or manager._TranslationResourceManager()
+        path = tmp_path / "ns_0.json"
+        path.write_text(json.dumps({f"key_{i}": "text" for i in range(100)}))
+        mgr.register(Meta(lng="en", ns="ns_0", location=path))
+        return mgr
+
+    def test_content_hash(self, tmp_path):
+        mgr = self.register(tmp_path)
+        resource = mgr.resources["en"]["ns_0"]
+        data = resource.location.read_bytes()
+        assert resource.content_hash == content_hash(data)
+
+        discovered = mgr.discover("rrss_locale", add_to_res=False)
+        assert discovered
+        assert all(res.content_hash is not None for res in discovered)
+
+    def test_register_unreadable(self, tmp_path):
+        mgr = manager._TranslationResourceManager()
+        path = tmp_path / "ns_0.json"
+        path.write_bytes(b"\xff\xfe")
+        with pytest.raises(UnicodeDecodeError):
+            mgr.register(Meta(lng="en", ns="ns_0", location=path))
+        assert "en" not in mgr.resources
+
+        # registered once readable
+        path.write_text("{}")
+        mgr.register(Meta(lng="en", ns="ns_0", location=path))
+        assert mgr.resources["en"]["ns_0"].content_hash is not None
+
+    def test_variants(self, tmp_path):
+        mgr = self.register(tmp_path)
+        content = mgr.get_resource_json("en", "ns_0").encode()
+        identity = mgr.get_resource_variant("en", "ns_0")
+        gzipped = mgr.get_resource_variant("en", "ns_0", ContentEncoding.GZIP)
+        brotlied = mgr.get_resource_variant("en", "ns_0", ContentEncoding.BROTLI)
+
+        assert identity.data == content
+        assert gzip.decompress(gzipped.data) == content
+        assert brotli.decompress(brotlied.data) == content
+        assert len(gzipped.data) < len(content)
+
+        # built once, then served from cache and counted in its budget
+        stats = mgr.cache_stats()
+        assert mgr.get_resource_variant("en", "ns_0", ContentEncoding.GZIP) is gzipped
+        assert mgr.cache_stats().bytes == stats.bytes
+        assert stats.bytes > sys.getsizeof(gzipped.data) + sys.getsizeof(content)
+
+        hash_ = mgr.resources["en"]["ns_0"].content_hash
+        assert identity.etag == f'"{hash_}"'
+        assert gzipped.etag == f'"{hash_}-gzip"'
+        assert brotlied.etag == f'"{hash_}-br"'
+
+    def test_not_modified(self, tmp_path):
+        mgr = self.register(tmp_path)
+        variant = mgr.get_resource_variant("en", "ns_0", ContentEncoding.GZIP)
+        hash_ = mgr.resources["en"]["ns_0"].content_hash
+
+        assert variant.not_modified(variant.etag)
+        assert variant.not_modified(f'W/"{hash_}", "other"')
+        # same content, other encoding
+        assert variant.not_modified(f'"{hash_}-br"')
+        assert variant.not_modified("*")
+        assert not variant.not_modified('"other"')
+        assert not variant.not_modified(None)
+
+    def test_choose_encoding(self):
+        assert choose_encoding(None) == ContentEncoding.IDENTITY
+        assert choose_encoding("gzip, deflate") == ContentEncoding.GZIP
+        assert choose_encoding("gzip, deflate, br") == ContentEncoding.BROTLI
+        assert choose_encoding("br;q=0, gzip;q=0.5") == ContentEncoding.GZIP
+        assert choose_encoding("*") == ContentEncoding.BROTLI
+        assert choose_encoding("deflate") == ContentEncoding.IDENTITY
+        # q-values
+        assert choose_encoding("*, br;q=0") == ContentEncoding.GZIP
+        assert choose_encoding("gzip;q=1, br;q=0.1") == ContentEncoding.GZIP
+        assert choose_encoding("gzip;q=0.5, br;q=0.5") == ContentEncoding.BROTLI
+        assert choose_encoding("gzip;q=0, br;q=0") == ContentEncoding.IDENTITY
+        assert choose_encoding("identity, gzip;q=0.5") == ContentEncoding.IDENTITY
+        assert choose_encoding("GZIP ; Q=0.8, br;q=invalid") == ContentEncoding.GZIP
+
+
+class TestResourceBundle:
+    def write(self, tmp_path, lng: str, ns: str, content: dict) -> Meta:
+        (tmp_path / lng).mkdir(exist_ok=True)
+        path = tmp_path / lng / f"{ns}.json"
+        path.write_text(json.dumps(content))
+        return Meta(lng=lng, ns=ns, location=path)
+
+    def test_bundle(self, tmp_path):
+        mgr = manager._TranslationResourceManager()
+        for lng in ("en", "de"):
+            for ns in ("common", "errors"):
+                mgr.register(self.write(tmp_path, lng, ns, {"key": f"{lng}.{ns}"}))
+
+        bundle = mgr.get_bundle(["de", "en", "de"], ["errors", "common", "missing"])
+        assert json.loads(bundle) == {
+            "de": {"errors": {"key": "de.errors"}, "common": {"key": "de.common"}},
+            "en": {"errors": {"key": "en.errors"}, "common": {"key": "en.common"}},
+        }
+        assert list(json.loads(bundle)) == ["de", "en"]
+
+        assert json.loads(mgr.get_bundle(["fr", "en"], ["common"])) == {
+            "en": {"common": {"key": "en.common"}}
+        }
+        assert mgr.get_bundle([], ["common"]) == "{}"
+
+    def test_memoized(self, tmp_path):
+        mgr = manager._TranslationResourceManager(
+            cache=ResourceCache(revalidate_interval=0), bundles=BundleCache()
+        )
+        mgr.register(self.write(tmp_path, "en", "common", {"key": "old"}))
+
+        bundle = mgr.get_bundle(["en"], ["common", "errors"])
+        assert mgr.get_bundle(["en"], ["common", "errors"]) is bundle
+        assert mgr.bundles.hits == 1
+
+        # changed resource
+        self.write(tmp_path, "en", "common", {"key": "new"})
+        bundle = mgr.get_bundle(["en"], ["common", "errors"])
+        assert json.loads(bundle) == {"en": {"common": {"key": "new"}}}
+
+        # added resource
+        mgr.register(self.write(tmp_path, "en", "errors", {"key": "error"}))
+        assert json.loads(mgr.get_bundle(["en"], ["common", "errors"])) == {
+            "en": {"common": {"key": "new"}, "errors": {"key": "error"}}
+        }
+        assert mgr.bundles.hits == 1
+        assert len(mgr.bundles) == 1
+
+    def test_memoized_version(self, tmp_path):
+        mgr = manager._TranslationResourceManager()
+        mgr.register(self.write(tmp_path, "en", "common", {"key": "old"}))
+        bundle = mgr.get_bundle(["en"], ["common"])
+        assert mgr.get_bundle(["en"], ["common"]) is bundle
+
+        # not revalidated, changed once reloaded
+        self.write(tmp_path, "en", "common", {"key": "new"})
+        assert mgr.get_bundle(["en"], ["common"]) is bundle
+        mgr.reload("en", "common")
+        assert json.loads(mgr.get_bundle(["en"], ["common"])) == {
+            "en": {"common": {"key": "new"}}
+        }
+
+        # loading the same content again doesn't outdate bundles
+        bundle = mgr.get_bundle(["en"], ["common"])
+        version = mgr.version
+        mgr.reload("en", "common")
+        assert mgr.version == version
+        assert mgr.get_bundle(["en"], ["common"]) is bundle
+        cache_version = mgr.cache.version
+        mgr.cache.invalidate()
+        mgr.get_resource_json("en", "common")
+        assert mgr.cache.version == cache_version
+        assert mgr.get_bundle(["en"], ["common"]) is bundle
+
+        mgr.unregister("en", "common")
+        assert mgr.get_bundle(["en"], ["common"]) == "{}"
+
+
+class TestDiscovery:
+    def make_package(self, root, name: str, lngs=("en", "de")) -> None:
+        package_dir = root / name
+        package_dir.mkdir()
+        (package_dir / "__init__.py").touch()
+        for lng in lngs:
+            (package_dir / lng).mkdir()
+            for ns in ("common", "errors"):
+                content = json.dumps({"key": f"{name}.{lng}.{ns}"})
+                (package_dir / lng / f"{ns}.json").write_text(content)
+
+    @pytest.fixture
+    def packages(self, tmp_path, monkeypatch) -> Iterator[list[str]]:
+        names = [f"rrss_test_plugin_{i}" for i in range(4)]
+        for name in names:
+            self.make_package(tmp_path, name)
+        monkeypatch.syspath_prepend(str(tmp_path))
+        yield names
+        for name in names:
+            sys.modules.pop(name, None)
+
+    def test_discover_all(self, packages):
+        mgr = manager._TranslationResourceManager()
+        discovered = mgr.discover_all(packages)
+
+        assert len(discovered) == 16
+        # returned in order of anchors
+        anchors = [
+            packages.index(str(res.location).split(os.sep)[-3]) for res in discovered
+        ]
+        assert anchors == sorted(anchors)
+        # same (lng, ns) in all plugins, only the first one is registered
+        assert json.loads(mgr.get_resource_json("de", "errors")) == {
+            "key": f"{packages[0]}.de.errors"
+        }
+        assert all(res.content_hash is not None for res in discovered)
+
+    def test_manifest(self, packages, tmp_path):
+        manifest = tmp_path / "cache" / "manifest.json"
+        scanned = manager._TranslationResourceManager().discover_all(
+            packages, manifest=manifest
+        )
+        assert manifest.is_file()
+
+        restored = manager._TranslationResourceManager().discover_all(
+            packages, manifest=manifest
+        )
+        assert {
+            (res.lng, res.ns, str(res.location), res.content_hash) for res in restored
+        } == {(res.lng, res.ns, str(res.location), res.content_hash) for res in scanned}
+
+        # a new namespace changes the mtime of the language directory
+        lng_dir = tmp_path / packages[1] / "en"
+        (lng_dir / "extra.json").write_text("{}")
+        os.utime(lng_dir, ns=(0, 0))
+        mgr = manager._TranslationResourceManager()
+        rescanned = mgr.discover_all(packages, manifest=manifest)
+        assert len(rescanned) == len(scanned) + 1
+        assert mgr.get_resource_json("en", "extra") == "{}"
+
+    def test_manifest_version(self, packages, tmp_path, monkeypatch):
+        manifest = tmp_path / "manifest.json"
+        looked_up: list[str] = []
+        installed: dict[str, str] = {packages[0]: "1.0"}
+
+        def version(name: str) -> str:
+            looked_up.append(name)
+            try:
+                return installed[name]
+            except KeyError:
+                raise discovery.iptlib_meta.PackageNotFoundError(name)
+
+        monkeypatch.setattr(discovery.iptlib_meta, "version", version)
+        mgr = manager._TranslationResourceManager()
+        mgr.discover_all(packages + [f"{packages[0]}.en"], manifest=manifest)
+        # once per top level package
+        assert sorted(looked_up) == sorted(packages)
+
+        # only installed anchors are looked up when restored
+        looked_up.clear()
+        restored = manager._TranslationResourceManager().discover_all(
+            packages, manifest=manifest
+        )
+        assert looked_up == [packages[0]]
+        assert len(restored) == 16
+
+        # upgraded package is scanned again
+        installed[packages[0]] = "2.0"
+        manager._TranslationResourceManager().discover_all(packages, manifest=manifest)
+        cached = discovery.DiscoveryManifest.load(manifest)
+        assert cached.anchors[packages[0]].version == "2.0"
+
+    def test_unreadable_file(self, packages, tmp_path):
+        (tmp_path / packages[1] / "en" / "broken.json").write_bytes(b"\xff\xfe")
+        mgr = manager._TranslationResourceManager()
+        discovered = mgr.discover_all(packages)
+
+        # only the unreadable file is skipped
+        assert len(discovered) == 16
+        assert "broken" not in mgr.resources["en"]
+
+    def test_invalid_manifest(self, packages, tmp_path):
+        manifest = tmp_path / "manifest.json"
+        manifest.write_text("not json")
+        discovered = manager._TranslationResourceManager().discover(
+            packages[0], manifest=manifest
+        )
+        assert len(discovered) == 4
+        assert packages[0] in manifest.read_text()
+
+
+class TestResourceWatcher:
+    package = "rrss_test_watched_locale"
+
+    @pytest.fixture
+    def package_dir(self, tmp_path, monkeypatch) -> Iterator[Path]:
+        package_dir = tmp_path / self.package
+        (package_dir / "en").mkdir(parents=True)
+        (package_dir / "__init__.py").touch()
+        (package_dir / "en" / "common.json").write_text('{"key": "old"}')
+        monkeypatch.syspath_prepend(str(tmp_path))
+        yield package_dir
+        sys.modules.pop(self.package, None)
+
+    def make_watcher(
+        self, use_inotify: bool
+    ) -> tuple[manager._TranslationResourceManager, ResourceWatcher, list]:
+        mgr = manager._TranslationResourceManager(
+            cache=ResourceCache(revalidate_interval=None)
+        )
+        mgr.discover(self.package)
+        event_mgr = EventManager()
+        received: list[ResourceChange] = []
+
+        class RecordHandler(event_types.EventHandler):
+            event_name: str = RESOURCE_CHANGED_EVENT
+            registrant: str = "rrss.test"
+            identifier: str = "record"
+
+            async def handler(self, event):
+                received.append(event.data)
+
+        watcher = ResourceWatcher(
+            mgr, event_manager=event_mgr, interval=3600, use_inotify=use_inotify
+        )
+        event_mgr.add_handler(RecordHandler())
+        return mgr, watcher, received
+
+    @pytest.mark.anyio
+    async def test_polling(self, package_dir, anyio_backend):
+        mgr, watcher, received = self.make_watcher(use_inotify=False)
+
+        async with watcher.watch():
+            bundle = mgr.get_bundle(["en", "de"], ["common", "errors"])
+            assert await watcher.check() == []
+
+            # modified, the stale cache entry is replaced
+            (package_dir / "en" / "common.json").write_text('{"key": "new!"}')
+            (changed,) = await watcher.check()
+            assert (changed.lng, changed.ns, changed.kind) == (
+                "en",
+                "common",
+                ChangeKind.MODIFIED,
+            )
+            assert changed.content_hash == mgr.resources["en"]["common"].content_hash
+            assert json.loads(mgr.get_resource_json("en", "common")) == {"key": "new!"}
+
+            # added, in a new language directory
+            (package_dir / "de").mkdir()
+            (package_dir / "de" / "errors.json").write_text("{}")
+            (changed,) = await watcher.check()
+            assert (changed.lng, changed.ns, changed.kind) == (
+                "de",
+                "errors",
+                ChangeKind.ADDED,
+            )
+            assert mgr.get_resource_json("de", "errors") == "{}"
+
+            # removed
+            (package_dir / "en" / "common.json").unlink()
+            (changed,) = await watcher.check()
+            assert (changed.kind, changed.content_hash) == (ChangeKind.REMOVED, None)
+            with pytest.raises(trans_errs.TranslationResourceNotFound):
+                mgr.get_resource_json("en", "common")
+
+            assert json.loads(mgr.get_bundle(["en", "de"], ["common", "errors"])) == {
+                "de": {"errors": {}}
+            }
+            assert mgr.get_bundle(["en", "de"], ["common", "errors"]) != bundle
+
+        assert [c.kind for c in received] == [
+            ChangeKind.MODIFIED,
+            ChangeKind.ADDED,
+            ChangeKind.REMOVED,
+        ]
+
+    @pytest.mark.anyio
+    async def test_unowned_resources(self, package_dir, anyio_backend):
+        mgr, watcher, received = self.make_watcher(use_inotify=False)
+        other = package_dir.parent / "other.json"
+        other.write_text("{}")
+        mgr.register(Meta(lng="de", ns="common", location=other))
+
+        async with watcher.watch():
+            # same (lng, ns) as a resource registered from another location
+            (package_dir / "de").mkdir()
+            (package_dir / "de" / "common.json").write_text('{"key": "dup"}')
+            # invalid language code
+            (package_dir / "en_x").mkdir()
+            (package_dir / "en_x" / "common.json").write_text("{}")
+            # not a language directory
+            (package_dir / "__pycache__").mkdir()
+            (package_dir / "__pycache__" / "common.json").write_text("{}")
+            # same content
+            (package_dir / "en" / "common.json").write_text('{"key": "old"}')
+            os.utime(package_dir / "en" / "common.json", ns=(0, 0))
+            assert await watcher.check() == []
+
+        assert mgr.get_resource_json("de", "common") == "{}"
+        assert received == []
+        assert all(d.name != "__pycache__" for d in watcher._files)
+
+    @pytest.mark.anyio
+    async def test_restarted_event_manager(self, package_dir, anyio_backend):
+        mgr = manager._TranslationResourceManager()
+        mgr.discover(self.package)
+        watcher = ResourceWatcher(mgr, use_inotify=False)
+        assert watcher.event_manager is event_manager.get_instance()
+
+        event_manager.restart_manager()
+        restarted = event_manager.get_instance()
+        received: list[ResourceChange] = []
+
+        class RecordHandler(event_types.EventHandler):
+            event_name: str = RESOURCE_CHANGED_EVENT
+            registrant: str = "rrss.test"
+            identifier: str = "record"
+
+            async def handler(self, event):
+                received.append(event.data)
+
+        async with watcher.watch():
+            assert watcher.event_manager is restarted
+            restarted.add_event(RESOURCE_CHANGED_EVENT)
+            restarted.add_handler(RecordHandler())
+            (package_dir / "en" / "common.json").write_text('{"key": "new!"}')
+            await watcher.check()
+        assert [(c.lng, c.ns) for c in received] == [("en", "common")]
+
+    @pytest.mark.anyio
+    @pytest.mark.skipif(not inotify_available(), reason="inotify not available")
+    async def test_inotify(self, package_dir, anyio_backend):
+        mgr, watcher, received = self.make_watcher(use_inotify=True)
+
+        async with watcher.watch():
+            (package_dir / "en" / "common.json").write_text('{"key": "new!"}')
+            (package_dir / "de").mkdir()
+            await anyio.sleep(0.3)
+            (package_dir / "de" / "errors.json").write_text("{}")
+            with anyio.fail_after(2):
+                while len(received) < 2:
+                    await anyio.sleep(0.02)
+
+        assert {(c.lng, c.ns, c.kind) for c in received} == {
+            ("en", "common", ChangeKind.MODIFIED),
+            ("de", "errors", ChangeKind.ADDED),
+        }
+        assert mgr.get_resource_json("de", "errors") == "{}"
@@ -0,0 +1,99 @@
+"""
+Bundles of translation resources in the shape of i18next multiload backend, e.g.:
+
+```json
+{"en": {"common": {...}, "errors": {...}}, "de": {"common": {...}}}
+```
+
+Bundles are serialized by joining cached resource contents, without parsing them, and
+memoized by the version of the resource manager.
+"""
+
+import json
+from collections import OrderedDict
+from threading import Lock
+from typing import Sequence
+
+from .cache import CachedResource
+
+DEFAULT_MAX_BUNDLES = 128
+
+type BundleKey = tuple[tuple[str, ...], tuple[str, ...]]
+"""Deduplicated `(lngs, nss)` of a bundle"""
+type BundleVersion = tuple[int, int]
+"""`(manager version, cache version)` when a bundle is built"""
+
+
+def bundle_key(lngs: Sequence[str], nss: Sequence[str]) -> BundleKey:
+    """Remove duplicated languages and namespaces, keeping their order"""
+    return tuple(dict.fromkeys(lngs)), tuple(dict.fromkeys(nss))
+
+
+def serialize_bundle(key: BundleKey, entries: Sequence[CachedResource | None]) -> str:
+    """
+    Join resource contents into a bundle.
+
+    `entries` are the resources of each `(lng, ns)` pair of `key`, in order of
+    languages then namespaces, `None` entries are omitted. Languages without any
+    found resource are omitted as well.
+    """
+    lngs, nss = key
+    lng_parts: list[str] = []
+    for i, lng in enumerate(lngs):
+        ns_parts = [
+            f"{json.dumps(ns)}:{entry.content}"
+            for ns, entry in zip(nss, entries[i * len(nss) : (i + 1) * len(nss)])
+            if entry is not None
+        ]
+        if ns_parts:
+            lng_parts.append(f"{json.dumps(lng)}:{{{','.join(ns_parts)}}}")
+    return f"{{{','.join(lng_parts)}}}"
+
+
+class BundleCache:
+    """
+    LRU memo of serialized bundles.
+
+    A memoized bundle is only returned if its version matches, so a bundle is
+    rebuilt once any resource changes, is added or removed.
+    """
+
+    def __init__(self, max_bundles: int = DEFAULT_MAX_BUNDLES):
+        """
+        Args:
+            max_bundles: Max number of memoized bundles, `0` disables memoization.
+        """
+        if max_bundles < 0:
+            raise ValueError("max_bundles must not be negative")
+
+        self.max_bundles = max_bundles
+        self.hits = 0
+        self.misses = 0
+        self._bundles: OrderedDict[BundleKey, tuple[BundleVersion, str]] = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: BundleKey, version: BundleVersion) -> str | None:
+        with self._lock:
+            memo = self._bundles.get(key, None)
+            if memo is None or memo[0] != version:
+                self.misses += 1
+                return None
+            self._bundles.move_to_end(key)
+            self.hits += 1
+            return memo[1]
+
+    def put(self, key: BundleKey, version: BundleVersion, bundle: str) -> None:
+        if self.max_bundles == 0:
+            return
+        with self._lock:
+            self._bundles[key] = (version, bundle)
+            self._bundles.move_to_end(key)
+            while len(self._bundles) > self.max_bundles:
+                self._bundles.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._bundles.clear()
+
+    def __len__(self) -> int:
+        return len(self._bundles)
@@ -0,0 +1,284 @@
+"""
+In-memory cache of translation resource contents.
+
+Contents are kept in LRU order within a byte budget, together with their content hash
+and the compressed variants built so far. Resources located on the file system could
+be revalidated against their mtime and size, at most once every `revalidate_interval`
+seconds, so edited files are picked up without a disk read on every lookup.
+"""
+
+import os
+import sys
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+
+from pydantic import BaseModel
+
+from . import errors as trans_errs
+from .types import TransResourceMetaData
+from .encoding import (
+    ContentEncoding,
+    ResourceVariant,
+    compress,
+    content_hash,
+    make_etag,
+)
+
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+
+class ResourceCacheStats(BaseModel):
+    """Snapshot of the usage of a `ResourceCache`"""
+
+    entries: int
+    """Number of cached resources"""
+    bytes: int
+    """Memory used by cached contents and variants"""
+    max_bytes: int
+    hits: int
+    misses: int
+    evictions: int
+    """Number of entries evicted to stay within `max_bytes`"""
+    stale: int
+    """Number of entries found outdated by revalidation and reloaded"""
+
+
+class CachedResource:
+    """Content of a translation resource loaded by `ResourceCache`"""
+
+    __slots__ = (
+        "resource",
+        "content",
+        "encoded",
+        "content_hash",
+        "variants",
+        "size",
+        "signature",
+        "checked_at",
+    )
+
+    def __init__(
+        self,
+        resource: TransResourceMetaData,
+        content: str,
+        signature: tuple[int, int] | None,
+    ):
+        self.resource = resource
+        self.content = content
+        """Decoded JSON content"""
+        self.encoded = content.encode("utf-8")
+        """`content` encoded in UTF-8, same as the identity variant"""
+        self.content_hash = content_hash(self.encoded)
+        self.variants: dict[ContentEncoding, ResourceVariant] = dict()
+        """Variants built so far, check out `ResourceCache.variant()`"""
+        self.size = sys.getsizeof(content) + sys.getsizeof(self.encoded)
+        """Memory used by this entry, increased when variants are added"""
+        self.signature = signature
+        """`(mtime_ns, size)` of the file when loaded, `None` if not on file system"""
+        self.checked_at = monotonic()
+
+
+def _file_signature(resource: TransResourceMetaData) -> tuple[int, int] | None:
+    """Return `(mtime_ns, size)` of the resource file, `None` if not on file system"""
+    location = resource.location
+    if not isinstance(location, os.PathLike):
+        # e.g.: resources inside a zip file, never change
+        return None
+    try:
+        stat = os.stat(location)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class ResourceCache:
+    """
+    LRU cache of translation resource contents, keyed by `(lng, ns)`.
+
+    Thread-safe, the file is read outside the lock so a slow read doesn't block
+    lookups of other resources.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        revalidate_interval: float | None = None,
+    ):
+        """
+        Args:
+            max_bytes:
+                Memory budget of cached contents, `0` disables caching. A resource
+                larger than the budget is never cached.
+            revalidate_interval:
+                Seconds before a cached file is checked again for changes of its
+                mtime or size. If `None`, cached contents are never revalidated,
+                `0` checks on every lookup.
+        """
+        if max_bytes < 0:
+            raise ValueError("max_bytes must not be negative")
+        if revalidate_interval is not None and revalidate_interval < 0:
+            raise ValueError("revalidate_interval must not be negative")
+
+        self.max_bytes = max_bytes
+        self.revalidate_interval = revalidate_interval
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.stale = 0
+        self.version = 0
+        """Incremented whenever a loaded content differs from the known `content_hash`"""
+        self._bytes = 0
+        self._entries: OrderedDict[tuple[str, str], CachedResource] = OrderedDict()
+        self._lock = Lock()
+
+    def lookup(self, lng: str, ns: str) -> CachedResource | None:
+        """
+        Return the cached resource, `None` if it's not cached or found outdated by
+        revalidation.
+        """
+        key = (lng, ns)
+        with self._lock:
+            entry = self._entries.get(key, None)
+            if entry is None:
+                return None
+            interval = self.revalidate_interval
+            if interval is None or monotonic() - entry.checked_at < interval:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        # revalidate outside the lock
+        signature = _file_signature(entry.resource)
+        with self._lock:
+            if signature != entry.signature:
+                if self._entries.get(key, None) is entry:
+                    self._pop(key)
+                self.stale += 1
+                return None
+            entry.checked_at = monotonic()
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def load(self, resource: TransResourceMetaData) -> CachedResource:
+        """
+        Read the content of `resource` and cache it.
+
+        `content_hash` of the resource metadata is updated to the hash of the content.
+
+        Raises:
+            `TranslationResourceNotFound` when the file could not be read, e.g.: it's
+            removed after registered.
+        """
+        # take the signature first, so a change during the read is detected later
+        try:
+            signature = _file_signature(resource)
+            content = resource.location.read_text(encoding="utf-8")
+        except OSError as e:
+            raise trans_errs.TranslationResourceNotFound(
+                lng=resource.lng, ns=resource.ns
+            ) from e
+        entry = CachedResource(resource, content, signature)
+        changed = resource.content_hash != entry.content_hash
+        resource.content_hash = entry.content_hash
+
+        with self._lock:
+            self.misses += 1
+            if changed:
+                self.version += 1
+            key = (resource.lng, resource.ns)
+            if key in self._entries:
+                self._pop(key)
+            if entry.size <= self.max_bytes:
+                self._make_room(entry.size)
+                self._entries[key] = entry
+                self._bytes += entry.size
+        return entry
+
+    def variant(
+        self, entry: CachedResource, encoding: ContentEncoding
+    ) -> ResourceVariant:
+        """
+        Return a variant of a cached resource, compressed with `encoding`.
+
+        Variants are built on first request and kept with the entry, they count
+        towards the byte budget.
+        """
+        variant = entry.variants.get(encoding, None)
+        if variant is not None:
+            return variant
+
+        # compress outside the lock, concurrent builds of the same variant are
+        # harmless since the output is deterministic
+        resource = entry.resource
+        variant = ResourceVariant(
+            lng=resource.lng,
+            ns=resource.ns,
+            encoding=encoding,
+            etag=make_etag(entry.content_hash, encoding),
+            data=compress(entry.encoded, encoding),
+        )
+        with self._lock:
+            if encoding in entry.variants:
+                return entry.variants[encoding]
+            entry.variants[encoding] = variant
+            if encoding == ContentEncoding.IDENTITY:
+                # shares `entry.encoded`
+                return variant
+
+            variant_size = sys.getsizeof(variant.data)
+            entry.size += variant_size
+            key = (resource.lng, resource.ns)
+            if self._entries.get(key, None) is entry:
+                self._bytes += variant_size
+                if self._bytes > self.max_bytes:
+                    # never evict the entry itself for its own variant
+                    self._entries.move_to_end(key)
+                    self._make_room(0, keep=1)
+                    if self._bytes > self.max_bytes:
+                        self._pop(key)
+                        self.evictions += 1
+        return variant
+
+    def invalidate(self, lng: str | None = None, ns: str | None = None) -> int:
+        """
+        Drop cached contents of resources matching `lng` and `ns`, `None` matches
+        any. Return number of dropped entries.
+        """
+        with self._lock:
+            keys = [
+                key
+                for key in self._entries
+                if (lng is None or key[0] == lng) and (ns is None or key[1] == ns)
+            ]
+            for key in keys:
+                self._pop(key)
+            return len(keys)
+
+    def stats(self) -> ResourceCacheStats:
+        with self._lock:
+            return ResourceCacheStats(
+                entries=len(self._entries),
+                bytes=self._bytes,
+                max_bytes=self.max_bytes,
+                hits=self.hits,
+                misses=self.misses,
+                evictions=self.evictions,
+                stale=self.stale,
+            )
+
+    def _make_room(self, size: int, keep: int = 0) -> None:
+        """
+        Evict least recently used entries until `size` more bytes fit the budget,
+        the `keep` most recently used entries are never evicted
+        """
+        while self._bytes + size > self.max_bytes and len(self._entries) > keep:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.size
+            self.evictions += 1
+
+    def _pop(self, key: tuple[str, str]) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
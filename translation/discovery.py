@@ -0,0 +1,244 @@
+"""
+Scanning of translation resource directories, used by
+`_TranslationResourceManager.discover()`.
+
+A scanned anchor could be recorded in a `DiscoveryManifest` saved on disk. On the next
+start, an anchor whose directory mtimes and package version are unchanged is restored
+from the manifest, without listing its directories or reading its files. The mtimes are
+checked first, as looking up a version scans all of `sys.path`.
+
+Note that editing a file in place doesn't change the mtime of its directory, the
+`content_hash` restored from the manifest is then outdated until the resource is
+loaded into the cache, which always hashes the current content.
+"""
+
+import os
+from importlib import metadata as iptlib_meta
+from importlib import resources as iptlib_res
+from importlib.resources.abc import Traversable
+from pathlib import Path
+from types import ModuleType
+
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
+from loguru import logger as _logger
+
+from utils import types as util_types
+from . import types as trans_types
+from .types import TransResourceMetaData
+from .encoding import content_hash
+
+
+class ManifestResource(BaseModel):
+    lng: str
+    ns: str
+    content_hash: str
+
+
+class AnchorManifest(BaseModel):
+    """Resources found in an anchor package, and what they were found from"""
+
+    version: str | None
+    """Version of the distribution providing the anchor package, if any"""
+    mtimes: dict[str, int]
+    """`mtime_ns` of the anchor directory (key `""`) and each language directory"""
+    resources: list[ManifestResource]
+
+
+class DiscoveryManifest(BaseModel):
+    """Scan results of anchors, keyed by anchor name"""
+
+    anchors: dict[str, AnchorManifest] = Field(default_factory=dict)
+
+    @classmethod
+    def load(cls, path: str | os.PathLike) -> "DiscoveryManifest":
+        """Load the manifest from `path`, return an empty one if missing or invalid"""
+        try:
+            return cls.model_validate_json(Path(path).read_bytes())
+        except FileNotFoundError:
+            return cls()
+        except ValidationError as e:
+            _logger.warning(f"Ignored invalid translation discovery manifest: {e}")
+            return cls()
+
+    def save(self, path: str | os.PathLike) -> None:
+        """Write the manifest atomically, so concurrent starts never read half of it"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(self.model_dump_json())
+        os.replace(tmp_path, path)
+
+
+_LngCodeValidator = TypeAdapter(trans_types.LngCodeField)
+
+
+def is_lng_dir_name(name: str) -> bool:
+    """
+    Whether a directory named `name` is a language code directory, other directories
+    in anchors, e.g.: `__pycache__`, are skipped
+    """
+    try:
+        util_types.SnakeCaseValidator.validate_python(name)
+        _LngCodeValidator.validate_python(name)
+    except ValidationError:
+        return False
+    return True
+
+
+def anchor_name(anchor: iptlib_res.Anchor) -> str:
+    return anchor.__name__ if isinstance(anchor, ModuleType) else anchor
+
+
+def package_version(
+    anchor: iptlib_res.Anchor, versions: dict[str, str | None] | None = None
+) -> str | None:
+    """
+    Return version of the distribution named after the top level package of `anchor`,
+    `None` if not installed as a distribution.
+
+    Distributions are looked up by name instead of mapping all installed
+    distributions to their packages, which is much slower.
+
+    Args:
+        versions:
+            Versions looked up so far, keyed by top level package, so anchors of
+            the same package are looked up once.
+    """
+    name = anchor_name(anchor).split(".", 1)[0]
+    if versions is not None and name in versions:
+        return versions[name]
+    try:
+        version: str | None = iptlib_meta.version(name)
+    except iptlib_meta.PackageNotFoundError:
+        version = None
+    if versions is not None:
+        versions[name] = version
+    return version
+
+
+def scan_anchor(
+    anchor: iptlib_res.Anchor,
+    cached: AnchorManifest | None = None,
+    with_manifest: bool = False,
+    versions: dict[str, str | None] | None = None,
+) -> tuple[list[TransResourceMetaData], AnchorManifest | None]:
+    """
+    Find `[lng]/[ns].json` resources in the anchor package, and compute their
+    `content_hash`.
+
+    If `cached` is still valid, resources are restored from it instead.
+
+    Args:
+        with_manifest: Create the manifest of the anchor, implied by `cached`.
+        versions: Versions looked up so far, check out `package_version()`.
+
+    Returns:
+        Found resources, and the manifest of the anchor. The manifest is `None` if the
+        anchor is not located on the file system.
+    """
+    root = iptlib_res.files(anchor=anchor)
+    root_path = root if isinstance(root, Path) else None
+    with_manifest = with_manifest or cached is not None
+
+    if root_path is not None and cached is not None:
+        resources = _restore(root_path, cached)
+        # an anchor not installed as a distribution is validated by mtimes only,
+        # installing it moves its directories anyway
+        if resources is not None and (
+            cached.version is None
+            or cached.version == package_version(anchor, versions)
+        ):
+            return resources, cached
+
+    resources = []
+    mtimes: dict[str, int] = dict()
+    for dir in root.iterdir():
+
+        if not dir.is_dir():
+            continue
+
+        # if it's a language code directory
+        if not is_lng_dir_name(dir.name):
+            continue
+
+        if isinstance(dir, Path):
+            mtimes[dir.name] = dir.stat().st_mtime_ns
+        resources.extend(_scan_lng_dir(lng_code=dir.name, dir=dir))
+
+    if root_path is None or not with_manifest:
+        return resources, None
+
+    # taken after the scan, so changes during the scan invalidate the manifest
+    mtimes[""] = root_path.stat().st_mtime_ns
+    manifest = AnchorManifest(
+        version=package_version(anchor, versions),
+        mtimes=mtimes,
+        resources=[
+            ManifestResource(lng=res.lng, ns=res.ns, content_hash=res.content_hash)
+            for res in resources
+            if res.content_hash is not None
+        ],
+    )
+    return resources, manifest
+
+
+def _scan_lng_dir(lng_code: str, dir: Traversable) -> list[TransResourceMetaData]:
+    resources: list[TransResourceMetaData] = list()
+    for t in dir.iterdir():
+
+        # not file, skip
+        if not t.is_file():
+            continue
+
+        # not json file, skip
+        if not t.name.endswith(".json"):
+            continue
+
+        namespace = t.name[: -len(".json")]
+
+        # unreadable file, skip, so it doesn't stop discovery of other resources
+        try:
+            content = t.read_text(encoding="utf-8")
+        except (OSError, UnicodeDecodeError) as e:
+            _logger.warning(
+                f"Unreadable translation resource skipped: {t}, {e.__class__.__name__}"
+            )
+            continue
+
+        # create new resources, hashed the same way as `ResourceCache` does
+        resources.append(
+            TransResourceMetaData(
+                lng=lng_code,
+                ns=namespace,
+                location=t,
+                content_hash=content_hash(content.encode("utf-8")),
+            )
+        )
+    return resources
+
+
+def _restore(root: Path, cached: AnchorManifest) -> list[TransResourceMetaData] | None:
+    """Restore resources of a manifest, `None` if any directory has changed"""
+    for name, mtime in cached.mtimes.items():
+        try:
+            if (root / name).stat().st_mtime_ns != mtime:
+                return None
+        except OSError:
+            return None
+
+    # validated when the manifest was created
+    lng_dirs: dict[str, Path] = dict()
+    resources: list[TransResourceMetaData] = list()
+    for res in cached.resources:
+        lng_dir = lng_dirs.get(res.lng, None)
+        if lng_dir is None:
+            lng_dir = lng_dirs[res.lng] = root / res.lng
+        resources.append(
+            TransResourceMetaData.model_construct(
+                lng=res.lng,
+                ns=res.ns,
+                location=lng_dir / f"{res.ns}.json",
+                content_hash=res.content_hash,
+            )
+        )
+    return resources
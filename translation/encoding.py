@@ -0,0 +1,134 @@
+"""
+Content hashes, ETags and compressed variants of translation resources, used to serve
+resources over HTTP with conditional requests and pre-compressed bodies.
+"""
+
+import gzip
+import hashlib
+from enum import StrEnum
+
+import brotli
+from pydantic import BaseModel
+
+
+class ContentEncoding(StrEnum):
+    """HTTP `Content-Encoding` of a resource variant"""
+
+    IDENTITY = "identity"
+    GZIP = "gzip"
+    BROTLI = "br"
+
+
+def content_hash(data: bytes) -> str:
+    """Return the hex digest used to identify a version of resource content"""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def compress(data: bytes, encoding: ContentEncoding) -> bytes:
+    """
+    Compress `data` with the best compression level, the output is deterministic
+    so the same content always gives the same bytes.
+    """
+    if encoding == ContentEncoding.GZIP:
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    if encoding == ContentEncoding.BROTLI:
+        return brotli.compress(data, mode=brotli.MODE_TEXT, quality=11)
+    return data
+
+
+_PREFERENCE = (ContentEncoding.BROTLI, ContentEncoding.GZIP, ContentEncoding.IDENTITY)
+"""Encodings in order of server preference, used when q-values are equal"""
+
+
+def choose_encoding(accept_encoding: str | None) -> ContentEncoding:
+    """
+    Choose an encoding accepted by an `Accept-Encoding` header value.
+
+    The encoding with the highest q-value is chosen, ties are broken by server
+    preference, brotli over gzip. An encoding rejected with `q=0` is never chosen,
+    even if `*` is accepted. Identity is used if no compression is accepted.
+    """
+    if not accept_encoding:
+        return ContentEncoding.IDENTITY
+
+    weights: dict[str, float] = dict()
+    for item in accept_encoding.split(","):
+        coding, *params = item.split(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[coding] = min(max(q, 0.0), 1.0)
+
+    star = weights.get("*", None)
+    best: ContentEncoding = ContentEncoding.IDENTITY
+    best_q = 0.0
+    for encoding in _PREFERENCE[:-1]:
+        q = weights.get(encoding, star if star is not None else 0.0)
+        if q > best_q:
+            best, best_q = encoding, q
+
+    # identity is acceptable unless rejected, preferred only with a higher q-value
+    identity_q = weights.get(ContentEncoding.IDENTITY, None)
+    if identity_q is not None and identity_q > best_q:
+        return ContentEncoding.IDENTITY
+    return best
+
+
+class ResourceVariant(BaseModel):
+    """A translation resource encoded and ready to be sent in an HTTP response"""
+
+    lng: str
+    ns: str
+    encoding: ContentEncoding
+    """Value of `Content-Encoding` header, `identity` means no header is needed"""
+    etag: str
+    """
+    Strong ETag, quoted, e.g.: `"3f2a..."`
+
+    Compressed variants have a `-gzip` or `-br` suffix, since they are different
+    representations of the same content.
+    """
+    data: bytes
+    """Response body"""
+
+    def not_modified(self, if_none_match: str | None) -> bool:
+        """
+        Check an `If-None-Match` header value, return `True` if a `304 Not Modified`
+        response should be sent.
+
+        Uses weak comparison as required for `If-None-Match`, and ETags of any variant
+        of the same content match, since they only differ in encoding.
+        """
+        if not if_none_match:
+            return False
+
+        content_tag = _content_tag(self.etag)
+        for tag in if_none_match.split(","):
+            tag = tag.strip()
+            if tag == "*":
+                return True
+            if tag.startswith("W/"):
+                tag = tag[2:]
+            if _content_tag(tag) == content_tag:
+                return True
+        return False
+
+
+def make_etag(hash_: str, encoding: ContentEncoding) -> str:
+    if encoding == ContentEncoding.IDENTITY:
+        return f'"{hash_}"'
+    return f'"{hash_}-{encoding}"'
+
+
+def _content_tag(etag: str) -> str:
+    """Remove quotes and encoding suffix of an ETag"""
+    tag = etag.strip('"')
+    return tag.split("-", 1)[0]
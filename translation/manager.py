@@ -1,6 +1,6 @@
-from typing import Set, Collection
+import os
+from typing import Set, Collection, Sequence
 from importlib import resources as iptlib_res
-from importlib.resources.abc import Traversable
 
 from pydantic import BaseModel, ValidationError, ConfigDict, Field, validate_call
 from loguru import logger as _logger
@@ -9,6 +9,15 @@ from utils import types as util_types
 from . import types as trans_types
 from . import errors as trans_errs
 from .types import TransResourceMetaData
+from .cache import CachedResource, ResourceCache, ResourceCacheStats
+from .encoding import ContentEncoding, ResourceVariant
+from .bundle import BundleCache, BundleKey, bundle_key, serialize_bundle
+from .discovery import (
+    AnchorManifest,
+    DiscoveryManifest,
+    anchor_name,
+    scan_anchor,
+)
 
 
 class _TranslationResourceManager:
@@ -17,20 +26,101 @@ class _TranslationResourceManager:
         dict[util_types.SnakeCaseField, TransResourceMetaData],
     ]
 
-    def __init__(self):
+    cache: ResourceCache
+    """Cache of resource contents used by `get_resource_json()`"""
+
+    bundles: BundleCache
+    """Memo of serialized bundles used by `get_bundle()`"""
+
+    anchors: list[iptlib_res.Anchor]
+    """Anchors passed to `discover()`, in order, watched by `ResourceWatcher`"""
+
+    version: int
+    """
+    Incremented whenever a resource is registered, unregistered, or reloaded with
+    changed content
+    """
+
+    def __init__(
+        self,
+        cache: ResourceCache | None = None,
+        bundles: BundleCache | None = None,
+    ):
+        """
+        Args:
+            cache:
+                Cache of resource contents, if `None`, a `ResourceCache` with default
+                byte budget and no revalidation is used.
+            bundles:
+                Memo of serialized bundles, if `None`, a `BundleCache` with default
+                size is used.
+        """
         self.resources = dict()
+        self.cache = cache if cache is not None else ResourceCache()
+        self.bundles = bundles if bundles is not None else BundleCache()
+        self.anchors = list()
+        self.version = 0
 
     def register(self, resource: TransResourceMetaData) -> None:
         """
         Register a new translation resource
+
+        If the resource is a file without `content_hash`, its content is loaded into
+        `cache` and `resource.content_hash` is set. If the content could not be read,
+        the resource is not registered.
         """
-        lng_res_dict = self.resources.setdefault(resource.lng, dict())
-        if resource.ns in lng_res_dict:
+        if resource.ns in self.resources.get(resource.lng, dict()):
             raise trans_errs.DuplicatedTranslationNamespace(resource=resource)
-        lng_res_dict[resource.ns] = resource
+
+        # loaded before inserted, so a resource failed to load is not registered
+        if resource.content_hash is None and resource.location.is_file():
+            self.cache.load(resource)
+        else:
+            self.cache.invalidate(lng=resource.lng, ns=resource.ns)
+        self.resources.setdefault(resource.lng, dict())[resource.ns] = resource
+        self.version += 1
 
         _logger.debug(f"Translation resource registered: {resource!r}")
 
+    def unregister(self, lng: str, ns: str) -> TransResourceMetaData:
+        """
+        Remove a registered translation resource, and drop its cached content
+
+        Raises:
+            `TranslationResourceNotFound` when the resources is not found.
+        """
+        lng_res_dict = self.resources.get(lng, dict())
+        try:
+            resource = lng_res_dict.pop(ns)
+        except KeyError as e:
+            raise trans_errs.TranslationResourceNotFound(lng=lng, ns=ns)
+        if not lng_res_dict:
+            self.resources.pop(lng, None)
+        self.cache.invalidate(lng=lng, ns=ns)
+        self.version += 1
+
+        _logger.debug(f"Translation resource unregistered: {resource!r}")
+        return resource
+
+    def reload(self, lng: str, ns: str) -> TransResourceMetaData:
+        """
+        Read the content of a registered resource again, after its file is changed.
+
+        The cached content is replaced and `content_hash` is updated, bundles including
+        this resource are rebuilt on next request.
+
+        Raises:
+            `TranslationResourceNotFound` when the resources is not found.
+        """
+        resource = self._get_resource_metadata(lng=lng, ns=ns)
+        old_hash = resource.content_hash
+        self.cache.invalidate(lng=lng, ns=ns)
+        self.cache.load(resource)
+        # memoized bundles are kept if the content is the same
+        if resource.content_hash != old_hash:
+            self.version += 1
+        return resource
+
     @validate_call
     def _get_resource_metadata(
         self,
@@ -48,16 +138,89 @@ class _TranslationResourceManager:
         """
         Return JSON content from translation resource file if exists
 
+        Contents are served from `cache` when possible, repeated lookups of the same
+        resource don't touch the disk, check out `ResourceCache`.
+
+        Raises:
+            `TranslationResourceNotFound` when the resources is not found.
+        """
+        return self._get_cached_resource(lng, ns).content
+
+    def get_resource_variant(
+        self,
+        lng: trans_types.LngCodeField,
+        ns: trans_types.SnakeCaseField,
+        encoding: ContentEncoding = ContentEncoding.IDENTITY,
+    ) -> ResourceVariant:
+        """
+        Return the translation resource encoded with `encoding`, with its ETag.
+
+        Compressed variants are built on first request and cached with the content,
+        use `translation.encoding.choose_encoding()` to pick `encoding` from an
+        `Accept-Encoding` header, and `ResourceVariant.not_modified()` to answer
+        `If-None-Match`.
+
         Raises:
             `TranslationResourceNotFound` when the resources is not found.
         """
+        return self.cache.variant(self._get_cached_resource(lng, ns), encoding)
+
+    def get_bundle(
+        self,
+        lngs: Sequence[trans_types.LngCodeField],
+        nss: Sequence[trans_types.SnakeCaseField],
+    ) -> str:
+        """
+        Return resources of all `lngs` and `nss` as a single JSON document, shaped
+        like the response of i18next multiload backend:
+        `{"<lng>": {"<ns>": {...}, ...}, ...}`
+
+        Pairs of `(lng, ns)` that are not registered are omitted, so fallback
+        languages could be requested together with the active one. Serialized
+        bundles are memoized in `bundles` by `version` of the manager and its cache,
+        and rebuilt once any resource changes.
+        """
+        key = bundle_key(lngs, nss)
+        if self.cache.revalidate_interval is not None:
+            # changed files are loaded again by revalidation, bumping `cache.version`
+            self._get_bundle_entries(key)
+
+        # taken before the entries, so a change while building outdates the bundle
+        version = (self.version, self.cache.version)
+        bundle = self.bundles.get(key, version)
+        if bundle is None:
+            bundle = serialize_bundle(key, self._get_bundle_entries(key))
+            self.bundles.put(key, version, bundle)
+        return bundle
+
+    def _get_bundle_entries(self, key: BundleKey) -> list[CachedResource | None]:
+        entries: list[CachedResource | None] = []
+        for lng in key[0]:
+            for ns in key[1]:
+                try:
+                    entries.append(self._get_cached_resource(lng, ns))
+                except trans_errs.TranslationResourceNotFound:
+                    entries.append(None)
+        return entries
+
+    def _get_cached_resource(self, lng: str, ns: str) -> CachedResource:
+        # only valid resources are cached, no need to validate arguments on hits
+        entry = self.cache.lookup(lng, ns)
+        if entry is not None:
+            return entry
+
         res = self._get_resource_metadata(lng=lng, ns=ns)
-        return res.location.read_text()
+        return self.cache.load(res)
+
+    def cache_stats(self) -> ResourceCacheStats:
+        """Return hit, miss and eviction counters and memory usage of the cache"""
+        return self.cache.stats()
 
     def discover(
         self,
         anchor: iptlib_res.Anchor,
         add_to_res: bool = True,
+        manifest: str | os.PathLike | None = None,
     ) -> list[TransResourceMetaData]:
         """
         Use `importlib.resource` to discover new translation resources
@@ -73,46 +236,72 @@ class _TranslationResourceManager:
                 Means "add to resources".
                 If `add_to_res == True`, try add the newly discovered resources to
                 this manager, if failed, ignore corresponding resource
-        """
 
-        _logger.debug(f"Start discover translation resources with anchor: {anchor}")
+            manifest:
+                Path of the discovery manifest, check out `discover_all()`.
 
-        # store newly discovered translation resources
-        discovered_resources: list[TransResourceMetaData] = list()
+        `content_hash` of each discovered resource is computed.
+        """
+        return self.discover_all([anchor], add_to_res=add_to_res, manifest=manifest)
 
-        def process_lng_dir(lng_code: trans_types.LngCodeField, dir: Traversable):
-            nonlocal discovered_resources
+    def discover_all(
+        self,
+        anchors: Sequence[iptlib_res.Anchor],
+        add_to_res: bool = True,
+        manifest: str | os.PathLike | None = None,
+    ) -> list[TransResourceMetaData]:
+        """
+        Discover translation resources of many anchors, check out `discover()`.
 
-            for t in dir.iterdir():
+        Resources are returned and registered in order of `anchors`.
 
-                # not file, skip
-                if not t.is_file():
-                    continue
+        Args:
+            manifest:
+                Path of a `DiscoveryManifest` file. If provided, anchors whose package
+                version and directory mtimes are unchanged since the manifest is saved
+                are restored from it without scanning, and the manifest is updated.
+        """
+        _logger.debug(f"Start discover translation resources with anchors: {anchors}")
+        if add_to_res:
+            self.anchors.extend(a for a in anchors if a not in self.anchors)
 
-                # not json file, skip
-                if not t.name.endswith(".json"):
-                    continue
+        cached_manifest: DiscoveryManifest | None = None
+        if manifest is not None:
+            cached_manifest = DiscoveryManifest.load(manifest)
 
-                namespace = t.name[:-6]
+        versions: dict[str, str | None] = dict()
 
-                # create new resources
-                discovered_resources.append(
-                    TransResourceMetaData(lng=lng_code, ns=namespace, location=t)
+        results: list[tuple[list[TransResourceMetaData], AnchorManifest | None]] = []
+        for anchor in anchors:
+            if cached_manifest is None:
+                results.append(scan_anchor(anchor))
+            else:
+                results.append(
+                    scan_anchor(
+                        anchor,
+                        cached=cached_manifest.anchors.get(anchor_name(anchor), None),
+                        with_manifest=True,
+                        versions=versions,
+                    )
                 )
 
-        # traverse
-        for dir in iptlib_res.files(anchor=anchor).iterdir():
-
-            if not dir.is_dir():
-                continue
-
-            # if it's a language code directory
-            try:
-                util_types.SnakeCaseValidator.validate_python(dir.name)
-            except ValidationError as e:
-                continue
+        # store newly discovered translation resources
+        discovered_resources: list[TransResourceMetaData] = list()
+        for resources, _ in results:
+            discovered_resources.extend(resources)
 
-            process_lng_dir(lng_code=dir.name, dir=dir)
+        if manifest is not None and cached_manifest is not None:
+            anchor_manifests = {
+                anchor_name(anchor): anchor_manifest
+                for anchor, (_, anchor_manifest) in zip(anchors, results)
+                if anchor_manifest is not None
+            }
+            if any(
+                cached_manifest.anchors.get(name, None) is not anchor_manifest
+                for name, anchor_manifest in anchor_manifests.items()
+            ):
+                cached_manifest.anchors.update(anchor_manifests)
+                cached_manifest.save(manifest)
 
         if add_to_res:
             for res in discovered_resources:
@@ -124,7 +313,6 @@ class _TranslationResourceManager:
                         "automatically skipped. "
                         f"lng={res.lng!r}, ns={res.ns!r}"
                     )
-                    continue
 
         return discovered_resources
 
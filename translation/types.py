@@ -47,6 +47,13 @@ class TransResourceMetaData(BaseModel):
     """Namespace of this resource, must be snake-case named, e.g.: `test_namespace`"""
     location: Traversable
     """A `Traversable` that directly point to the resource .json file"""
+    content_hash: str | None = None
+    """
+    Hash of the content of the resource file, computed when the resource is registered
+    or discovered, and updated when the manager reloads a changed file.
+
+    Used to build ETags, check out `translation.encoding`.
+    """
 
     def __hash__(self):
         """
@@ -0,0 +1,399 @@
+"""
+Hot reload of translation resources.
+
+`ResourceWatcher` watches the `[lng]/[ns].json` files of anchor packages, updates the
+changed resources of a `_TranslationResourceManager`, and emits a
+`rrss.translation.resource_changed` event for each of them, so clients could refetch
+only what changed.
+
+On Linux, directories are watched with inotify, changes are picked up almost
+immediately. Otherwise, all files are checked every `interval` seconds.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+from contextlib import asynccontextmanager
+from enum import StrEnum
+from importlib import resources as iptlib_res
+from pathlib import Path
+from typing import TYPE_CHECKING, AsyncIterator, Sequence
+
+import anyio
+from loguru import logger as _logger
+from pydantic import BaseModel, ValidationError
+
+from extensions.event.manager import EventManager, get_instance
+from extensions.event.types import Event
+from . import errors as trans_errs
+from .discovery import is_lng_dir_name
+from .types import TransResourceMetaData
+
+if TYPE_CHECKING:
+    from .manager import _TranslationResourceManager
+
+RESOURCE_CHANGED_EVENT = "rrss.translation.resource_changed"
+WATCHER_SENDER = "rrss.translation.watcher"
+
+type _Signature = tuple[int, int]
+"""`(mtime_ns, size)` of a resource file"""
+
+
+class ChangeKind(StrEnum):
+    ADDED = "added"
+    MODIFIED = "modified"
+    REMOVED = "removed"
+
+
+class ResourceChange(BaseModel):
+    """Data of `rrss.translation.resource_changed` event"""
+
+    lng: str
+    ns: str
+    kind: ChangeKind
+    content_hash: str | None
+    """New content hash of the resource, `None` if removed"""
+
+
+# inotify constants, check out `man 7 inotify`
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ISDIR = 0x40000000
+_IN_MASK = (
+    _IN_MODIFY
+    | _IN_CLOSE_WRITE
+    | _IN_MOVED_FROM
+    | _IN_MOVED_TO
+    | _IN_CREATE
+    | _IN_DELETE
+)
+_IN_EVENT = struct.Struct("iIII")
+
+
+class _Inotify:
+    """Minimal inotify binding using `ctypes`, only available on Linux"""
+
+    def __init__(self) -> None:
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.fd: int = fd
+        self._watches: dict[int, Path] = dict()
+
+    def add_watch(self, path: Path) -> None:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), _IN_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed: {path}")
+        self._watches[wd] = path
+
+    def read(self, timeout: float) -> set[Path] | None:
+        """
+        Wait up to `timeout` seconds for changes, return paths of directories changed,
+        or `None` if the kernel queue overflowed and changes are lost.
+
+        Blocking, run in a worker thread.
+        """
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return set()
+        try:
+            buffer = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        changed: set[Path] = set()
+        offset = 0
+        while offset < len(buffer):
+            wd, mask, _, name_len = _IN_EVENT.unpack_from(buffer, offset)
+            offset += _IN_EVENT.size
+            name = buffer[offset : offset + name_len].rstrip(b"\0")
+            offset += name_len
+
+            if mask & _IN_Q_OVERFLOW:
+                return None
+            if mask & _IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+            path = self._watches.get(wd, None)
+            if path is None:
+                continue
+            # directory created or removed in a watched directory
+            changed.add(path / os.fsdecode(name) if mask & _IN_ISDIR else path)
+        return changed
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+def inotify_available() -> bool:
+    return (
+        sys.platform.startswith("linux") and ctypes.util.find_library("c") is not None
+    )
+
+
+class ResourceWatcher:
+    """
+    Watch anchor packages of a `_TranslationResourceManager`, check out module docs.
+
+    Only resources registered from the watched files are updated. An added file with
+    a `(lng, ns)` already registered from another location is skipped, same as in
+    `discover()`.
+    """
+
+    def __init__(
+        self,
+        manager: "_TranslationResourceManager",
+        anchors: Sequence[iptlib_res.Anchor] | None = None,
+        event_manager: EventManager | None = None,
+        interval: float = 1.0,
+        debounce: float = 0.05,
+        use_inotify: bool | None = None,
+    ):
+        """
+        Args:
+            anchors:
+                Anchor packages to watch, if `None`, all anchors discovered by
+                `manager` are watched. Anchors not located on the file system are
+                ignored.
+            event_manager:
+                Where `rrss.translation.resource_changed` is emitted, if `None`, the
+                global instance is used, resolved on each emit so a restarted one
+                is followed.
+            interval: Seconds between checks of all files when polling.
+            debounce:
+                Seconds to wait after an inotify event for more changes, so a file
+                written in several steps is reloaded once.
+            use_inotify: If `None`, inotify is used when available.
+        """
+        self.manager = manager
+        self._event_manager = event_manager
+        # added now, so handlers could be added before the first change
+        self._ensure_event()
+        self.interval = interval
+        self.debounce = debounce
+        self.use_inotify = inotify_available() if use_inotify is None else use_inotify
+
+        self.roots: list[Path] = list()
+        for anchor in manager.anchors if anchors is None else anchors:
+            root = iptlib_res.files(anchor)
+            if isinstance(root, Path):
+                self.roots.append(root)
+            else:
+                _logger.warning(f"Translation anchor not watchable: {anchor!r}")
+
+        self._files: dict[Path, dict[str, _Signature]] = dict()
+        """Signatures of `.json` files in each language directory"""
+        self._inotify: _Inotify | None = None
+
+    @property
+    def event_manager(self) -> EventManager:
+        """Where changes are emitted"""
+        if self._event_manager is not None:
+            return self._event_manager
+        return get_instance()
+
+    def _ensure_event(self) -> EventManager:
+        """Return `event_manager`, add `rrss.translation.resource_changed` if missing"""
+        event_manager = self.event_manager
+        if not event_manager.has_event(RESOURCE_CHANGED_EVENT):
+            event_manager.add_event(RESOURCE_CHANGED_EVENT)
+        return event_manager
+
+    @asynccontextmanager
+    async def watch(self) -> AsyncIterator["ResourceWatcher"]:
+        """
+        Record current files as the baseline, and watch for changes until the context
+        exits
+        """
+        try:
+            if self.use_inotify:
+                self._inotify = _Inotify()
+                for root in self.roots:
+                    self._inotify.add_watch(root)
+            await anyio.to_thread.run_sync(self._snapshot, None)
+
+            async with anyio.create_task_group() as task_group:
+                if self._inotify is not None:
+                    task_group.start_soon(self._inotify_loop)
+                else:
+                    task_group.start_soon(self._poll_loop)
+                try:
+                    yield self
+                finally:
+                    task_group.cancel_scope.cancel()
+        finally:
+            inotify, self._inotify = self._inotify, None
+            if inotify is not None:
+                inotify.close()
+
+    async def check(self, dirs: set[Path] | None = None) -> list[ResourceChange]:
+        """
+        Compare files with the last check, apply and emit the changes.
+
+        Args:
+            dirs: Language directories to check, if `None`, check all directories.
+        """
+        diffs = await anyio.to_thread.run_sync(self._snapshot, dirs)
+        changes: list[ResourceChange] = list()
+        for lng_dir, name, kind in diffs:
+            change = self._apply(lng_dir, name, kind)
+            if change is not None:
+                changes.append(change)
+
+        if not changes:
+            return changes
+
+        event_manager = self._ensure_event()
+        for change in changes:
+            _logger.info(
+                f"Translation resource {change.kind}: "
+                f"lng={change.lng!r}, ns={change.ns!r}"
+            )
+            try:
+                await event_manager.emit_trusted(
+                    Event.trusted(RESOURCE_CHANGED_EVENT, change, sender=WATCHER_SENDER)
+                )
+            except Exception:
+                _logger.exception("Handler of translation resource change failed")
+        return changes
+
+    async def _poll_loop(self) -> None:
+        while True:
+            await anyio.sleep(self.interval)
+            await self.check()
+
+    async def _inotify_loop(self) -> None:
+        assert self._inotify is not None
+        inotify = self._inotify
+        while True:
+            # short timeout so the worker thread returns soon after cancellation
+            dirs = await anyio.to_thread.run_sync(inotify.read, 0.2)
+            if dirs is not None and not dirs:
+                continue
+            await anyio.sleep(self.debounce)
+            while dirs is not None:
+                more = await anyio.to_thread.run_sync(inotify.read, 0)
+                if more is None:
+                    # queue overflowed, check all directories
+                    dirs = None
+                elif not more:
+                    break
+                else:
+                    dirs |= more
+            if dirs is not None:
+                dirs = {
+                    d
+                    for d in dirs
+                    if d in self._files
+                    or (d.parent in self.roots and is_lng_dir_name(d.name))
+                }
+            await self.check(dirs)
+
+    def _snapshot(self, dirs: set[Path] | None) -> list[tuple[Path, str, ChangeKind]]:
+        """
+        Update signatures of files in `dirs`, return changed files. Blocking, run in
+        a worker thread.
+        """
+        if dirs is None:
+            dirs = set(self._files)
+            for root in self.roots:
+                dirs.update(_list_dirs(root))
+
+        diffs: list[tuple[Path, str, ChangeKind]] = list()
+        for lng_dir in dirs:
+            old = self._files.get(lng_dir, dict())
+            new = _list_json_files(lng_dir)
+            if new is None:
+                self._files.pop(lng_dir, None)
+                new = dict()
+            else:
+                if lng_dir not in self._files and self._inotify is not None:
+                    self._inotify.add_watch(lng_dir)
+                self._files[lng_dir] = new
+
+            for name, signature in new.items():
+                if name not in old:
+                    diffs.append((lng_dir, name, ChangeKind.ADDED))
+                elif old[name] != signature:
+                    diffs.append((lng_dir, name, ChangeKind.MODIFIED))
+            diffs.extend(
+                (lng_dir, name, ChangeKind.REMOVED) for name in old if name not in new
+            )
+        return diffs
+
+    def _apply(
+        self, lng_dir: Path, name: str, kind: ChangeKind
+    ) -> ResourceChange | None:
+        """Update the manager, return `None` if registered resources are not changed"""
+        lng, ns = lng_dir.name, name[: -len(".json")]
+        location = lng_dir / name
+        registered = self.manager.resources.get(lng, dict()).get(ns, None)
+        owned = registered is not None and registered.location == location
+
+        try:
+            if kind == ChangeKind.REMOVED:
+                if not owned:
+                    return None
+                self.manager.unregister(lng, ns)
+                return ResourceChange(lng=lng, ns=ns, kind=kind, content_hash=None)
+
+            if owned:
+                assert registered is not None
+                old_hash = registered.content_hash
+                resource = self.manager.reload(lng, ns)
+                if resource.content_hash == old_hash:
+                    return None
+                kind = ChangeKind.MODIFIED
+            else:
+                resource = TransResourceMetaData(lng=lng, ns=ns, location=location)
+                self.manager.register(resource)
+                kind = ChangeKind.ADDED
+        except (ValidationError, OSError, trans_errs.TranslationSystemError) as e:
+            _logger.warning(
+                f"Translation resource change skipped: {location}, {e.__class__.__name__}"
+            )
+            return None
+        return ResourceChange(
+            lng=lng, ns=ns, kind=kind, content_hash=resource.content_hash
+        )
+
+
+def _list_dirs(root: Path) -> list[Path]:
+    """Return language code directories in `root`, same as found by discovery"""
+    try:
+        return [
+            Path(e.path)
+            for e in os.scandir(root)
+            if is_lng_dir_name(e.name) and e.is_dir()
+        ]
+    except OSError:
+        return []
+
+
+def _list_json_files(dir: Path) -> dict[str, _Signature] | None:
+    """Return signatures of `.json` files in `dir`, `None` if `dir` doesn't exist"""
+    files: dict[str, _Signature] = dict()
+    try:
+        entries = list(os.scandir(dir))
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+    for entry in entries:
+        if not entry.name.endswith(".json"):
+            continue
+        try:
+            if not entry.is_file():
+                continue
+            stat = entry.stat()
+        except OSError:
+            continue
+        files[entry.name] = (stat.st_mtime_ns, stat.st_size)
+    return files
@@ -1,5 +1,7 @@
 from asyncio import iscoroutinefunction
+from concurrent.futures import Executor
 from typing import Callable, Awaitable, Any, overload
+from anyio import CapacityLimiter, to_thread
 from asyncer import asyncify
 
 
@@ -7,14 +9,17 @@ from asyncer import asyncify
 @overload
 def ensure_asyncify[
     **T_Params, T_Ret
-](func: Callable[T_Params, Awaitable[T_Ret]]) -> Callable[
-    T_Params, Awaitable[T_Ret]
-]: ...
+](
+    func: Callable[T_Params, Awaitable[T_Ret]],
+    limiter: CapacityLimiter | None = None,
+) -> Callable[T_Params, Awaitable[T_Ret]]: ...
 
 
 # overload when function is sync function
 @overload
-def ensure_asyncify[**T_Params, T_Ret](func: Callable[T_Params, T_Ret]) -> Callable[
+def ensure_asyncify[
+    **T_Params, T_Ret
+](func: Callable[T_Params, T_Ret], limiter: CapacityLimiter | None = None) -> Callable[
     T_Params,
     Awaitable[T_Ret],
 ]: ...
@@ -22,15 +27,72 @@ def ensure_asyncify[**T_Params, T_Ret](func: Callable[T_Params, T_Ret]) -> Calla
 
 def ensure_asyncify[
     **T_Params, T_Ret
-](func: Callable[T_Params, T_Ret]) -> (
+](func: Callable[T_Params, T_Ret], limiter: CapacityLimiter | None = None) -> (
     Callable[T_Params, T_Ret] | Callable[T_Params, Awaitable[T_Ret]]
 ):
     """
     Return the received function object,
     asyncify the function if it's not a coroutine function (using `asyncer` package)
 
+    Args:
+        limiter:
+            Capacity limiter used to run the sync function in worker thread.
+            If `None`, the default thread limiter of `anyio` is used.
+
     Check out [Asyncer Docs](https://asyncer.tiangolo.com/tutorial/install/) for more info.
     """
     if not iscoroutinefunction(func):
-        return asyncify(func)
+        return asyncify(func, limiter=limiter)
     return func
+
+
+def inlinify[
+    **T_Params, T_Ret
+](func: Callable[T_Params, T_Ret]) -> Callable[T_Params, Awaitable[T_Ret]]:
+    """
+    Wrap a sync function into a coroutine function which directly run it in the event loop.
+
+    Only use this for functions that never block, since the event loop will be blocked
+    until the function returns.
+    """
+
+    async def wrapper(*args: T_Params.args, **kwargs: T_Params.kwargs) -> T_Ret:
+        return func(*args, **kwargs)
+
+    return wrapper
+
+
+def processify[
+    **T_Params, T_Ret
+](
+    func: Callable[T_Params, T_Ret],
+    executor: Executor,
+    limiter: CapacityLimiter | None = None,
+) -> Callable[T_Params, Awaitable[T_Ret]]:
+    """
+    Wrap a sync function into a coroutine function which run it with `executor`,
+    usually a `ProcessPoolExecutor`.
+
+    The result is waited in a worker thread of `anyio`, so it works with any async
+    backend. When cancelled, the call is cancelled if not started yet, otherwise it's
+    abandoned and left running in `executor`.
+
+    Note that when using a process pool, the function, arguments and return value
+    must all be picklable.
+
+    Args:
+        limiter:
+            Capacity limiter of the threads waiting for results. If `None`, the default
+            thread limiter of `anyio` is used.
+    """
+
+    async def wrapper(*args: T_Params.args, **kwargs: T_Params.kwargs) -> T_Ret:
+        future = executor.submit(func, *args, **kwargs)
+        try:
+            return await to_thread.run_sync(
+                future.result, abandon_on_cancel=True, limiter=limiter
+            )
+        finally:
+            future.cancel()
+
+    return wrapper
@@ -12,6 +12,16 @@ Dot-separated snake-case variable name format.
 E.g.: `rrss.sys.plug.rate_limiter`
 """
 
+RRSSEntityIdPatternField = Annotated[
+    str,
+    Field(pattern=r"^([a-z0-9_]+?|\*\*?)(\.([a-z0-9_]+?|\*\*?))*$"),
+]
+"""
+Same as `RRSSEntityIdField`, but segments could also be wildcard `*` or `**`.
+
+E.g.: `rrss.feed.*`, `rrss.**`
+"""
+
 
 class RRSSEntityIdKeyDict[VT](dict[RRSSEntityIdField, VT]):
     """